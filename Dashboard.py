@@ -1,10 +1,30 @@
+import os
+from html import escape
+
 import streamlit as st
 import pandas as pd
-import json
 from datetime import datetime, timedelta
 import plotly.express as px
 import plotly.graph_objects as go
 
+from tender_data import DEFAULT_JSON_FILE, DEFAULT_QUARANTINE_FILE, build_events, filter_tenders, load_and_process_data
+from tender_archive import archive_months, as_of, trends
+from tender_arrow import load_shared_snapshot
+from tender_buyers import BUYER_SORT_KEYS, BuyerAggregates, buyer_entries
+from tender_changefeed import get_changefeed
+from tender_cooccurrence import CpvCooccurrence
+from tender_details import decode_details, detail_column, detail_keys
+from tender_export import EXPORT_FORMATS, PARQUET_AVAILABLE, iter_export
+from tender_geo import GridIndex, parse_points, proximity_mask
+from tender_memory import (
+    DerivedCache, FilterPopularity, estimate_size, format_bytes, get_memory_budget_bytes, process_rss_bytes,
+)
+from tender_search import DEFAULT_SEARCH_LIMIT, CpvIndex, live_cpv_counts
+from tender_similar import SimilarityIndex
+from tender_snapshot import SnapshotWatcher
+from tender_store import TenderStore, sync_store
+from tender_watchlist import get_saved_searches, normalise_search
+
 # Set up Streamlit page
 st.set_page_config(page_title="Tender Dashboard", layout="wide")
 
@@ -81,6 +101,14 @@ st.markdown("""
     border-left-color: #28a745;
     background: #f8fff8;
 }
+.similar-tenders {
+    margin-top: 8px;
+    font-size: 0.9rem;
+}
+.similar-tenders summary {
+    cursor: pointer;
+    font-weight: bold;
+}
 </style>
 """, unsafe_allow_html=True)
 
@@ -97,127 +125,119 @@ if 'selected_calendar_date' not in st.session_state:
 if 'show_day_popup' not in st.session_state:
     st.session_state.show_day_popup = False
 
-# Load JSON data
-json_file = "output/tender_opportunities.json"
-
-# Location mapping (latitude and longitude for UK regions)
-uk_location_mapping = {
-    "UKH1 - East Anglia": (52.2000, 0.1313),
-    "UKG21 - Telford and Wrekin": (52.6784, -2.4469),
-    "UK - United Kingdom": (55.3781, -3.4360),
-    "UKC1 - Tees Valley and Durham": (54.5700, -1.3200),
-    "UKC2 - Northumberland and Tyne and Wear": (54.9700, -1.6100),
-    "UKD1 - Cumbria": (54.4600, -2.7400),
-    "UKD3 - Greater Manchester": (53.4808, -2.2426),
-    "UKD6 - Cheshire": (53.2000, -2.5200),
-    "UKE1 - East Yorkshire and Northern Lincolnshire": (53.7600, -0.3300),
-    "UKE4 - West Yorkshire": (53.8000, -1.5500),
-    "UKF1 - Derbyshire and Nottinghamshire": (53.1000, -1.5500),
-    "UKF2 - Leicestershire, Rutland and Northamptonshire": (52.6369, -1.1398),
-    "UKG1 - Herefordshire, Worcestershire and Warwickshire": (52.1900, -2.2200),
-    "UKH2 - Bedfordshire and Hertfordshire": (51.7500, -0.4100),
-    "UKH3 - Essex": (51.7340, 0.4700),
-    "UKI3 - Inner London": (51.5074, -0.1278),
-    "UKJ1 - Berkshire, Buckinghamshire and Oxfordshire": (51.7500, -1.2500),
-    "UKJ2 - Surrey, East and West Sussex": (51.0500, -0.3200),
-    "UKJ3 - Hampshire and Isle of Wight": (50.9000, -1.4000),
-    "UKK1 - Gloucestershire, Wiltshire and Bath/Bristol area": (51.4500, -2.5800),
-    "UKK4 - Devon": (50.7100, -3.5300),
-    "UKL1 - West Wales and The Valleys": (51.7700, -3.7800),
-    "UKL2 - East Wales": (52.3200, -3.8600),
-    "UKM6 - Highlands and Islands": (57.4800, -5.0700),
-    "UKN0 - Northern Ireland": (54.7877, -6.4923),
+# Load JSON data (a single file, a directory of shard files, a glob pattern or an append-only .ndjson tender log)
+json_file = os.environ.get("TENDER_SOURCE", DEFAULT_JSON_FILE)
+
+# Optional SQLite store: set TENDER_STORE to a database path to query tenders from SQLite
+store_path = os.environ.get("TENDER_STORE")
+
+# Optional shared snapshot: set TENDER_ARROW_DIR so replicas on one host memory-map a single Arrow file
+arrow_dir = os.environ.get("TENDER_ARROW_DIR")
+
+# Optional archive of expired tenders: set TENDER_ARCHIVE_DIR to keep history as monthly Parquet partitions
+archive_dir = os.environ.get("TENDER_ARCHIVE_DIR")
+
+# Number of most-requested filter combinations precomputed whenever a new snapshot is published
+WARM_TOP_N = int(os.environ.get("TENDER_WARM_TOP_N", 12))
+
+# Tenders rendered per page of the day popup
+POPUP_PAGE_SIZE = 20
+
+# Day popup sort options: key function over calendar events
+POPUP_SORT_KEYS = {
+    "Urgency": lambda event: event.get('backgroundColor') != '#e74c3c',
+    "Title": lambda event: event.get('extendedProps', {}).get('full_title', event['title']).lower(),
+    "Organisation": lambda event: str(event.get('extendedProps', {}).get('organisation', '')).lower(),
+    "Location": lambda event: str(event.get('extendedProps', {}).get('contract_location', '')).lower(),
 }
 
-@st.cache_data
-def load_and_process_data():
-    """Load and process tender data - cached to prevent reloading"""
-    try:
-        with open(json_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        
-        tenders = data.get("tenders", [])
-        today = datetime.today()
-        
-        # Prepare data
-        deadline_list = []
-        events = []
-        all_cpv_details = set()
-        
-        for tender in tenders:
-            details = tender.get("details", {})
-            deadline_raw = details.get("Submission deadline")
-            contract_location = details.get("Contract location", "Unknown")
-            
-            # Better link extraction
-            tender_link = tender.get("link", "")
-            
-            try:
-                deadline_dt = pd.to_datetime(deadline_raw, dayfirst=True, errors="coerce")
-            except:
-                deadline_dt = None
-            
-            if deadline_dt and deadline_dt >= pd.Timestamp(today):
-                location_coords = uk_location_mapping.get(contract_location)
-                cpv_codes = tender.get("cpv_codes", [])
-                cpv_descriptions = tender.get("cpv_descriptions", [])
-                
-                # Combine CPV codes and descriptions
-                combined_cpv = ", ".join([f"{code} - {desc}" for code, desc in zip(cpv_codes, cpv_descriptions)])
-                
-                # Add individual CPV code-description pairs to the set
-                cpv_pairs = [f"{code} - {desc}" for code, desc in zip(cpv_codes, cpv_descriptions)]
-                all_cpv_details.update(cpv_pairs)
-                
-                tender_data = {
-                    "title": tender.get("title", "Untitled"),
-                    "deadline": deadline_dt,
-                    "organisation": tender.get("organisation", "Unknown"),
-                    "cpv": combined_cpv,
-                    "individual_cpvs": cpv_codes,
-                    "cpv_pairs": cpv_pairs,
-                    "link": tender_link,  # Keep original link
-                    "Contract location": contract_location,
-                    "latitude": location_coords[0] if location_coords else None,
-                    "longitude": location_coords[1] if location_coords else None
-                }
-                
-                deadline_list.append(tender_data)
-                
-                # Create events for calendar
-                events.append({
-                    "title": str(tender.get("title", "Untitled"))[:80] + "..." if len(str(tender.get("title", "Untitled"))) > 80 else str(tender.get("title", "Untitled")),
-                    "start": deadline_dt.strftime('%Y-%m-%d'),
-                    "end": deadline_dt.strftime('%Y-%m-%d'),
-                    "backgroundColor": "#e74c3c" if deadline_dt <= pd.Timestamp(today + timedelta(days=7)) else "#3498db",
-                    "borderColor": "#c0392b" if deadline_dt <= pd.Timestamp(today + timedelta(days=7)) else "#2980b9",
-                    "extendedProps": {
-                        "organisation": str(tender.get("organisation", "Unknown")),
-                        "contract_location": str(contract_location),
-                        "cpv_pairs": [str(pair) for pair in cpv_pairs],
-                        "deadline_str": deadline_dt.strftime('%d %b %Y'),
-                        "tender_link": tender_link,
-                        "tender_id": tender.get("title", "Untitled")[:50],
-                        "full_title": str(tender.get("title", "Untitled")),
-                        "cpv_codes": combined_cpv
-                    }
-                })
-        
-        return pd.DataFrame(deadline_list), events, sorted(all_cpv_details)
-    
-    except Exception as e:
-        st.error(f"❌ Error loading or processing file: {e}")
-        return pd.DataFrame(), [], []
+def pluralise(count, noun, plural=None):
+    """Count with its noun, pluralised unless the count is one ("1 buyer", "3 buyers")"""
+    return f"{count} {noun}" if count == 1 else f"{count} {plural or noun + 's'}"
+
+@st.cache_resource
+def get_derived_cache():
+    """Process-wide LRU cache for derived views, bounded by the memory budget"""
+    return DerivedCache(get_memory_budget_bytes())
+
+@st.cache_resource
+def get_filter_popularity():
+    """Process-wide request counts per normalised filter state, used for cache warming"""
+    return FilterPopularity()
+
+@st.cache_resource
+def get_buyer_aggregates():
+    """Process-wide per-buyer aggregates, updated incrementally whenever a snapshot is published"""
+    return BuyerAggregates()
+
+@st.cache_resource
+def get_cpv_cooccurrence():
+    """Process-wide CPV co-occurrence counts, updated incrementally whenever a snapshot is published"""
+    return CpvCooccurrence()
+
+@st.cache_resource
+def get_tender_store():
+    """Open the optional SQLite tender store"""
+    return TenderStore(store_path) if store_path else None
+
+@st.cache_resource
+def get_snapshot_watcher():
+    """Start the background watcher that rebuilds the snapshot when the scraper output changes"""
+    tender_store = get_tender_store()
+    if tender_store is not None:
+        # Upsert into SQLite instead of holding the full dataset in memory
+        build = lambda source: sync_store(tender_store, source, DEFAULT_QUARANTINE_FILE, archive_dir=archive_dir)
+    elif arrow_dir:
+        build = lambda source: load_shared_snapshot(
+            source, arrow_dir, build=lambda source: load_and_process_data(source, archive_dir=archive_dir)
+        )
+    else:
+        build = lambda source: load_and_process_data(source, archive_dir=archive_dir)
+    watcher = SnapshotWatcher(json_file, build)
+    derived_cache, popularity = get_derived_cache(), get_filter_popularity()
+    watcher.on_publish.append(lambda snapshot: warm_derived_cache(derived_cache, popularity, snapshot))
+    cooccurrence = get_cpv_cooccurrence()
+    watcher.on_publish.append(lambda snapshot: cooccurrence.sync(live_cpv_pairs(tender_store, snapshot)))
+    buyers = get_buyer_aggregates()
+    watcher.on_publish.append(lambda snapshot: buyers.sync(buyer_entries(live_tenders(tender_store, snapshot))))
+    # Match new and changed tenders against saved searches once per published snapshot
+    saved_searches = get_saved_searches()
+    watcher.on_publish.append(
+        lambda snapshot: saved_searches.process_changes(lambda tender_ids: lookup_tenders(tender_store, snapshot, tender_ids))
+    )
+    watcher.start()
+    return watcher
+
+def lookup_tenders(tender_store, snapshot, tender_ids):
+    """Processed rows of the given tenders, from the store or the in-memory snapshot"""
+    if tender_store is not None:
+        return tender_store.tenders_by_ids(tender_ids)
+    df = snapshot.df
+    return df[df["tender_id"].isin(tender_ids)] if not df.empty else df
 
-def apply_filters(df, events, selected_cpv, selected_date):
+def live_tenders(tender_store, snapshot):
+    """Processed rows of every live tender, from the store or the in-memory snapshot"""
+    return tender_store.query_tenders("All", datetime.today()) if tender_store is not None else snapshot.df
+
+def live_cpv_pairs(tender_store, snapshot):
+    """CPV pairs of each live tender, from the store or the in-memory snapshot"""
+    if tender_store is not None:
+        return tender_store.cpv_pairs_by_tender()
+    df = snapshot.df
+    return dict(zip(df["tender_id"], df["cpv_pairs"])) if not df.empty else {}
+
+def apply_filters(df, events, selected_cpv, selected_date, within=None):
     """Apply filters to both dataframe and events"""
     # Filter dataframe
-    filtered_df = df.copy()
+    filtered_df = filter_tenders(df, selected_cpv, date_from=selected_date, within=within)
     
-    if selected_cpv != "All":
-        filtered_df = filtered_df[filtered_df["cpv_pairs"].apply(lambda x: selected_cpv in x)]
+    # Shared Arrow snapshots carry no event list; derive events from the filtered rows
+    if events is None:
+        return filtered_df, build_events(filtered_df)
     
-    filtered_df = filtered_df[filtered_df["deadline"] >= pd.Timestamp(selected_date)]
+    # Snapshot events are aligned with the DataFrame rows, so a row mask applies to both
+    if within is not None:
+        events = [event for event, keep in zip(events, within) if keep]
     
     # Filter events with consistent logic
     filtered_events = []
@@ -234,8 +254,83 @@ def apply_filters(df, events, selected_cpv, selected_date):
     
     return filtered_df, filtered_events
 
+def normalise_filters(selected_cpv, selected_date, proximity=None):
+    """Canonical filter state shared by every session; past dates select the same live tenders as today"""
+    today = datetime.today().date()
+    return str(selected_cpv).strip(), max(selected_date, today).isoformat(), proximity
+
+def compute_filtered_view(derived_cache, snapshot, filter_state):
+    """Filtered tenders (with per-location counts), their calendar events and the summary metrics"""
+    selected_cpv, selected_date, proximity = filter_state[0], pd.Timestamp(filter_state[1]), filter_state[2]
+    if tender_store is not None and proximity is None:
+        # Indexed SQL queries; only the filtered rows are materialised
+        filtered_df = tender_store.query_tenders(selected_cpv, selected_date)
+        filtered_events = build_events(filtered_df)
+        location_counts = tender_store.location_counts(selected_cpv, selected_date)
+        summary = tender_store.summary(selected_cpv, selected_date)
+    else:
+        if tender_store is not None:
+            # Proximity is applied to the (already CPV/date filtered) query result
+            filtered_df = tender_store.query_tenders(selected_cpv, selected_date)
+            filtered_df = filter_tenders(filtered_df, within=proximity_mask(GridIndex.from_frame(filtered_df), proximity))
+            filtered_events = build_events(filtered_df)
+        else:
+            geo_index = shared_view(derived_cache, "geo_index", snapshot, (), lambda: GridIndex.from_frame(snapshot.df))
+            filtered_df, filtered_events = apply_filters(
+                snapshot.df, snapshot.events, selected_cpv, selected_date, proximity_mask(geo_index, proximity)
+            )
+
+        # Aggregate tenders per location
+        location_counts = None
+        if not filtered_df.empty:
+            location_counts = filtered_df.groupby("Contract location").size().reset_index(name="Tender Count")
+
+        summary = {"count": len(filtered_df), "nearest_deadline": None, "urgent": 0}
+        if not filtered_df.empty:
+            urgent_deadline = datetime.now() + timedelta(days=7)
+            summary["nearest_deadline"] = filtered_df["deadline"].min()
+            summary["urgent"] = len(filtered_df[filtered_df["deadline"] <= pd.Timestamp(urgent_deadline)])
+
+    if not filtered_df.empty:
+        filtered_df = filtered_df.merge(location_counts, on="Contract location", how="left")
+    return filtered_df, filtered_events, summary
+
+def shared_view(derived_cache, kind, snapshot, filter_state, compute):
+    """Derived view reused by every session with the same data version and filters"""
+    return derived_cache.get_or_compute(("shared", kind, snapshot.version) + filter_state, compute)
+
+def build_cpv_index(snapshot):
+    """CPV typeahead index for a snapshot, ranked by live tender count"""
+    counts = tender_store.cpv_counts() if tender_store is not None else live_cpv_counts(snapshot.df)
+    return CpvIndex({label: counts.get(label, 0) for label in snapshot.cpv_details})
+
+def build_similarity_index(snapshot):
+    """Similar-tender TF-IDF index over the live tenders of a snapshot"""
+    return SimilarityIndex.from_frame(live_tenders(tender_store, snapshot))
+
+def warm_derived_cache(derived_cache, popularity, snapshot):
+    """Precompute the most requested filter states for a freshly published snapshot (runs off the request path)"""
+    if not snapshot.stats.get("tenders"):
+        return
+    # Built once per snapshot so the day popup only pays for the neighbour lookups
+    shared_view(derived_cache, "similar", snapshot, (), lambda: build_similarity_index(snapshot))
+    for filter_state, _ in popularity.most_common(WARM_TOP_N):
+        filtered_df, _, _ = shared_view(
+            derived_cache, "filtered", snapshot, filter_state,
+            lambda: compute_filtered_view(derived_cache, snapshot, filter_state),
+        )
+        if filtered_df.empty:
+            continue
+        shared_view(derived_cache, "timeline", snapshot, filter_state, lambda: create_timeline_chart(filtered_df))
+        shared_view(derived_cache, "map", snapshot, filter_state, lambda: create_map_visualization(filtered_df))
+        shared_view(derived_cache, "table", snapshot, filter_state, lambda: create_styled_table(filtered_df))
+
 def get_tenders_for_date(events, target_date):
     """Get all tenders for a specific date"""
+    if tender_store is not None:
+        # Indexed deadline lookup; the selected CPV still applies
+        return build_events(tender_store.tenders_for_date(target_date, st.session_state.selected_cpv))
+
     target_date_str = target_date.strftime('%Y-%m-%d')
     day_tenders = []
     
@@ -322,6 +417,63 @@ def create_map_visualization(df):
     
     return fig
 
+def render_title_link(title, link):
+    """Escaped title, linked when the tender has a link"""
+    if not link:
+        return escape(title)
+    return f'<a href="{escape(link)}" target="_blank" rel="noopener noreferrer">{escape(title)}</a>'
+
+def render_similar_tenders_html(similar):
+    """Collapsed list of similar live tenders for one popup entry"""
+    if not similar:
+        return ""
+    links = "".join(
+        # Tenders without a link are listed by title only
+        f'<li>{render_title_link(tender["title"], tender["link"])}'
+        f' · {escape(tender["organisation"])} · {escape(tender["deadline_str"])}</li>'
+        for tender in similar
+    )
+    return f'<details class="similar-tenders"><summary>🔗 Similar tenders ({len(similar)})</summary><ul>{links}</ul></details>'
+
+def render_day_tenders_html(day_tenders, start=0, similarity_index=None):
+    """Render one page of day popup tenders as a single HTML block"""
+    items = []
+    for i, tender in enumerate(day_tenders, start=start + 1):
+        props = tender.get('extendedProps', {})
+        tender_link = props.get('tender_link', '')
+        is_urgent = tender.get('backgroundColor') == '#e74c3c'
+        tender_class = "urgent-tender" if is_urgent else "normal-tender"
+        priority_icon = "🔴" if is_urgent else "🟢"
+
+        if tender_link and tender_link.startswith('http'):
+            link_html = (
+                f'<div style="text-align: center; margin: 10px 0;"><a href="{escape(tender_link)}" target="_blank" '
+                f'rel="noopener noreferrer" class="calendar-link-button">🚀 Open Tender {i} in New Tab</a></div>'
+            )
+        else:
+            link_html = f'<p>⚠️ No link available for tender {i}</p>'  # FIXED: Singular "tender"
+
+        # Same opportunity published on other portals (collapsed at ingest)
+        other_sources = [link for link in props.get('sources', []) if link != tender_link]
+        if other_sources:
+            link_html += "<p><strong>Also published at:</strong> " + " · ".join(
+                f'<a href="{escape(link)}" target="_blank" rel="noopener noreferrer">source {n}</a>'
+                for n, link in enumerate(other_sources, start=2)
+            ) + "</p>"
+
+        similar = similarity_index.similar_to(props.get("tender_id")) if similarity_index else []
+        items.append(
+            f'<div class="tender-item {tender_class}">'
+            f'<h4>{priority_icon} {escape(str(props.get("full_title", tender["title"])))}</h4>'
+            f'<p><strong>Organisation:</strong> {escape(str(props.get("organisation", "Unknown")))}</p>'
+            f'<p><strong>Location:</strong> {escape(str(props.get("contract_location", "Unknown")))}</p>'
+            f'<p><strong>CPV Codes:</strong> {escape(str(props.get("cpv_codes", "N/A")))}</p>'
+            f'<p><strong>Deadline:</strong> {escape(str(props.get("deadline_str", "Unknown")))}</p>'
+            f'{link_html}'
+            f'{render_similar_tenders_html(similar)}</div>'
+        )
+    return "\n".join(items)
+
 def create_styled_table(df):
     """Create a beautifully styled table with priority indicators and clean links"""
     if df.empty:
@@ -380,30 +532,101 @@ def create_styled_table(df):
     
     return final_df
 
-# Load data (cached)
-df_deadlines, events, sorted_cpv_details = load_and_process_data()
+# Load data from the latest snapshot built off the request path
+tender_store = get_tender_store()
+watcher = get_snapshot_watcher()
+snapshot = watcher.current()
+if watcher.last_error is not None:
+    st.error(f"❌ Error loading or processing file: {watcher.last_error}")
+df_deadlines, events, sorted_cpv_details = snapshot.df, snapshot.events, snapshot.cpv_details
+
+# Let open sessions know when a newer snapshot has been swapped in
+if st.session_state.get("data_version") not in (None, snapshot.version):
+    st.toast("🔄 Tender data refreshed")
+st.session_state.data_version = snapshot.version
 
-if df_deadlines.empty:
+# "New since last refresh" badge, counted from the changefeed rather than by diffing frames
+if 'changes_seen_at' not in st.session_state:
+    st.session_state.changes_seen_at = datetime.now().isoformat(timespec="seconds")
+new_since_refresh = get_changefeed().count_since(st.session_state.changes_seen_at)
+if new_since_refresh:
+    badge_col, seen_col = st.columns([6, 1])
+    with badge_col:
+        st.info(f"🆕 {pluralise(new_since_refresh, 'new tender')} since last refresh")
+    with seen_col:
+        if st.button("Mark as seen", key="mark_changes_seen"):
+            st.session_state.changes_seen_at = datetime.now().isoformat(timespec="seconds")
+            st.rerun()
+
+# Saved search matches recorded since the analyst last marked them as seen
+saved_searches = get_saved_searches()
+analyst = st.session_state.get("analyst", "").strip()
+new_matches = saved_searches.unseen_count(analyst) if analyst else 0
+if new_matches:
+    badge_col, seen_col = st.columns([6, 1])
+    with badge_col:
+        with st.expander(f"🔔 {pluralise(new_matches, 'new match', 'new matches')} for your saved searches"):
+            for match in saved_searches.recent_matches(analyst, min(new_matches, 20)):
+                st.markdown(
+                    f"- **{match['search']}**: [{match['title']}]({match['link']}) "
+                    f"(deadline {match['deadline'][:10]})"
+                )
+    with seen_col:
+        if st.button("Mark as seen", key="mark_matches_seen"):
+            saved_searches.mark_seen(analyst)
+            st.rerun()
+
+if not snapshot.stats.get("tenders"):
     st.warning("No tender data available.")  # FIXED: Singular "tender"
     st.stop()
 
 # Sidebar Filters
 st.sidebar.header("🔍 Filters")
 
-# CPV Filter
-cpv_options = ["All"] + sorted_cpv_details
+# Memory accounting for cached data and this session's derived views
+derived_cache = get_derived_cache()
+for name, size in snapshot.sizes.items():
+    derived_cache.pin(name, size)
+
+# CPV Filter: typeahead over a server-side index, only the top matches are sent to the browser
+cpv_index = shared_view(derived_cache, "cpv_index", snapshot, (), lambda: build_cpv_index(snapshot))
+cpv_query = st.sidebar.text_input("Search CPV(s)", key="cpv_query", placeholder="Code or description")
+cpv_options = ["All"] + cpv_index.search(cpv_query, DEFAULT_SEARCH_LIMIT)
+if st.session_state.selected_cpv not in cpv_options:
+    # Keep the active filter selectable even when it does not match the current query
+    cpv_options.insert(1, st.session_state.selected_cpv)
 
 def on_cpv_change():
     st.session_state.selected_cpv = st.session_state.cpv_selectbox
 
+def format_cpv_option(option):
+    return option if option == "All" else f"{option} ({cpv_index.count(option)})"
+
 selected_cpv = st.sidebar.selectbox(
-    "Select or Search CPV(s)", 
+    "Select CPV", 
     options=cpv_options, 
-    index=cpv_options.index(st.session_state.selected_cpv) if st.session_state.selected_cpv in cpv_options else 0,
+    index=cpv_options.index(st.session_state.selected_cpv),
     key="cpv_selectbox",
+    format_func=format_cpv_option,
     on_change=on_cpv_change
 )
 
+# "Often tagged together with" suggestions for the selected CPV, ranked by lift
+def select_cpv(cpv):
+    st.session_state.selected_cpv = cpv
+    st.session_state.cpv_selectbox = cpv
+
+if selected_cpv != "All":
+    related_cpvs = get_cpv_cooccurrence().related(selected_cpv)
+    if related_cpvs:
+        st.sidebar.caption("Often tagged together with:")
+        for related_cpv, together, lift in related_cpvs:
+            st.sidebar.button(
+                f"{related_cpv} ({together})", key=f"related_cpv_{related_cpv}",
+                help=f"Tagged together on {pluralise(together, 'tender')}, {lift:.1f}× more often than by chance",
+                on_click=select_cpv, args=(related_cpv,),
+            )
+
 # Date Filter
 def on_date_change():
     st.session_state.selected_date = st.session_state.date_input
@@ -440,6 +663,33 @@ with col2:
         st.session_state.date_input = new_date
         st.rerun()
 
+# Proximity filter: within a radius of office locations, or inside a bounding box
+proximity = None
+with st.sidebar.expander("📍 Proximity"):
+    proximity_mode = st.radio("Limit to", ["Anywhere", "Radius", "Bounding box"], key="proximity_mode")
+    if proximity_mode == "Radius":
+        points_text = st.text_area(
+            "Office locations (latitude, longitude per line)", value="51.5074, -0.1278", key="proximity_points"
+        )
+        radius_km = st.number_input("Radius (km)", min_value=1.0, max_value=1000.0, value=50.0, step=5.0,
+                                    key="proximity_radius")
+        try:
+            points = parse_points(points_text)
+        except ValueError as e:
+            st.error(f"❌ {e}")
+            points = []
+        if points:
+            proximity = ("radius", tuple(points), float(radius_km))
+    elif proximity_mode == "Bounding box":
+        north = st.number_input("North latitude", -90.0, 90.0, 52.0, key="bbox_north")
+        south = st.number_input("South latitude", -90.0, 90.0, 51.0, key="bbox_south")
+        west = st.number_input("West longitude", -180.0, 180.0, -1.0, key="bbox_west")
+        east = st.number_input("East longitude", -180.0, 180.0, 1.0, key="bbox_east")
+        if south < north and west < east:
+            proximity = ("bbox", (float(south), float(west), float(north), float(east)))
+        else:
+            st.error("❌ South must be below north and west must be left of east")
+
 # Reset Buttons
 st.sidebar.divider()
 col1, col2, col3 = st.sidebar.columns(3)
@@ -465,46 +715,82 @@ with col3:
         st.session_state.date_input = today
         st.rerun()
 
-# Apply filters
-filtered_df, filtered_events = apply_filters(df_deadlines, events, selected_cpv, selected_date)
+# Saved searches: per-analyst filter sets, matched against new tenders on every data refresh
+def apply_saved_search(search):
+    """Load a saved search into the filter widgets"""
+    st.session_state.selected_cpv = search.get("cpv", "All")
+    st.session_state.cpv_selectbox = st.session_state.selected_cpv
+    saved_proximity = search.get("proximity")
+    if not saved_proximity:
+        st.session_state.proximity_mode = "Anywhere"
+    elif saved_proximity[0] == "radius":
+        st.session_state.proximity_mode = "Radius"
+        st.session_state.proximity_points = "\n".join(f"{lat}, {lon}" for lat, lon in saved_proximity[1])
+        st.session_state.proximity_radius = float(saved_proximity[2])
+    else:
+        st.session_state.proximity_mode = "Bounding box"
+        (st.session_state.bbox_south, st.session_state.bbox_west,
+         st.session_state.bbox_north, st.session_state.bbox_east) = map(float, saved_proximity[1])
 
-# Aggregate tenders per location
-if not filtered_df.empty:
-    location_counts = filtered_df.groupby("Contract location").size().reset_index(name="Tender Count")
-    filtered_df = filtered_df.merge(location_counts, on="Contract location", how="left")
+def describe_search(search):
+    parts = [search.get("cpv", "All CPVs")]
+    if "text" in search:
+        parts.append(f'"{search["text"]}"')
+    if "proximity" in search:
+        parts.append("within radius" if search["proximity"][0] == "radius" else "within box")
+    return " · ".join(parts)
 
-# Layout: Callout Cards
-col1, col2, col3, col4 = st.columns(4)
-with col1:
-    st.metric("📌 Filtered Tender", len(filtered_df))  # FIXED: Singular "Tender"
-with col2:
-    nearest_deadline = "N/A"
-    if not filtered_df.empty:
-        nearest_deadline = filtered_df["deadline"].min().strftime('%d %b %Y')
-    st.metric("📆 Nearest Deadline", nearest_deadline)
-with col3:
-    urgent_count = 0
-    if not filtered_df.empty:
-        urgent_deadline = datetime.now() + timedelta(days=7)
-        urgent_count = len(filtered_df[filtered_df["deadline"] <= pd.Timestamp(urgent_deadline)])
-    st.metric("⚠️ Urgent (7 days)", urgent_count)
-with col4:
-    st.metric("🏆 Total CPV Codes", len(sorted_cpv_details))
+st.sidebar.divider()
+st.sidebar.subheader("⭐ Saved Searches")
+analyst = st.sidebar.text_input("Your name", key="analyst", placeholder="Needed to save searches").strip()
+if analyst:
+    for name, search in saved_searches.searches(analyst).items():
+        name_col, apply_col, delete_col = st.sidebar.columns([4, 1, 1])
+        name_col.markdown(f"**{name}**  \n{describe_search(search)}")
+        apply_col.button("▶", key=f"apply_search_{name}", help="Apply filters",
+                         on_click=apply_saved_search, args=(search,))
+        delete_col.button("🗑", key=f"delete_search_{name}", help="Delete",
+                          on_click=saved_searches.delete, args=(analyst, name))
+    with st.sidebar.form("save_search", clear_on_submit=True):
+        search_name = st.text_input("Name")
+        keywords = st.text_input("Keywords (optional)", help="Only tenders mentioning every word are reported")
+        if st.form_submit_button("Save current filters"):
+            if search_name.strip():
+                saved_searches.save(
+                    analyst, search_name.strip(), normalise_search(selected_cpv, text=keywords, proximity=proximity)
+                )
+                st.rerun()
+            else:
+                st.error("❌ Give the search a name")
 
-st.divider()
+filter_state = normalise_filters(selected_cpv, selected_date, proximity)
+get_filter_popularity().record(filter_state)
 
-# Timeline Chart
-if not filtered_df.empty:
-    timeline_fig = create_timeline_chart(filtered_df)
-    if timeline_fig:
-        st.plotly_chart(timeline_fig, use_container_width=True)
+# Apply filters (shared across sessions until evicted or the snapshot changes)
+def filtered_view():
+    """Filtered rows, events and summary for the current filters"""
+    return shared_view(
+        derived_cache, "filtered", snapshot, filter_state,
+        lambda: compute_filtered_view(derived_cache, snapshot, filter_state),
+    )
 
-st.divider()
+def close_day_popup():
+    st.session_state.show_day_popup = False
+    # Forget the last click and remount the calendar (its component value would
+    # otherwise replay that click), so clicking the same event reopens the popup
+    st.session_state.last_calendar_click = None
+    st.session_state.calendar_generation = st.session_state.get("calendar_generation", 0) + 1
 
-# Layout: Calendar and Map side by side
-left, right = st.columns([1, 1], gap="medium")
+def change_popup_page(step):
+    st.session_state.popup_page = st.session_state.get("popup_page", 0) + step
 
-with left:
+def reset_popup_page():
+    st.session_state.popup_page = 0
+
+# Calendar and day popup rerun on their own when the calendar is clicked or the popup is closed
+@st.fragment
+def calendar_section(filtered_events, selected_date, selected_cpv):
+    """Calendar view with the day popup for the clicked date"""
     st.subheader("📅 Calendar View")
     
     if filtered_events:
@@ -551,7 +837,10 @@ with left:
                 }
                 clean_events.append(clean_event)
             
-            calendar_key = f"calendar_{selected_date}_{len(filtered_events)}_{hash(str(selected_cpv))}"
+            calendar_key = (
+                f"calendar_{selected_date}_{len(filtered_events)}_{hash(str(selected_cpv))}"
+                f"_{st.session_state.get('calendar_generation', 0)}"
+            )
             
             calendar_result = calendar(
                 events=clean_events, 
@@ -573,16 +862,16 @@ with left:
                 """
             )
             
-            # Handle calendar event clicks with day popup
+            # Handle calendar event clicks with day popup; the component keeps returning
+            # the last click, so only a new click reopens a closed popup
             if calendar_result and "eventClick" in calendar_result:
-                clicked_event = calendar_result["eventClick"]["event"]
-                clicked_date = pd.to_datetime(clicked_event["start"]).date()
-                
-                # Get all tenders for this date
-                day_tenders = get_tenders_for_date(filtered_events, clicked_date)
-                
-                st.session_state.selected_calendar_date = clicked_date
-                st.session_state.show_day_popup = True
+                click = calendar_result["eventClick"]
+                if click != st.session_state.get("last_calendar_click"):
+                    st.session_state.last_calendar_click = click
+                    clicked_date = pd.to_datetime(click["event"]["start"]).date()
+                    st.session_state.selected_calendar_date = clicked_date
+                    st.session_state.show_day_popup = True
+                    st.session_state.popup_page = 0
             
         except ImportError:
             st.warning("📅 streamlit-calendar not installed. Install with: pip install streamlit-calendar")
@@ -593,17 +882,104 @@ with left:
     else:
         st.info("No events match the current filters.")
 
-with right:
-    st.subheader("🗺️ Tender Locations")
+    # Day Popup Window
+    if st.session_state.get('show_day_popup', False) and st.session_state.get('selected_calendar_date'):
+        selected_date_obj = st.session_state.selected_calendar_date
+        day_tenders = get_tenders_for_date(filtered_events, selected_date_obj)
+    
+        st.markdown(f"""
+        <div class="day-popup">
+            <h2>📅 Tender for {selected_date_obj.strftime('%A, %d %B %Y')}</h2>
+            <p><strong>Total tender:</strong> {len(day_tenders)}</p>
+        </div>
+        """, unsafe_allow_html=True)  # FIXED: Singular "Tender"
     
+        if day_tenders:
+    
+            col1, col2 = st.columns([6, 1])
+            with col2:
+                # Closing only reruns this fragment; the callback runs before it redraws
+                st.button("❌ Close", key="close_popup", on_click=close_day_popup)
+        
+     
+            # One HTML block per page keeps the render cost bounded on busy deadline days
+            sort_by = st.selectbox(
+                "Sort by", list(POPUP_SORT_KEYS), key="popup_sort", on_change=reset_popup_page
+            )
+            day_tenders = sorted(day_tenders, key=POPUP_SORT_KEYS[sort_by])
+            page_count = (len(day_tenders) - 1) // POPUP_PAGE_SIZE + 1
+            page = min(max(st.session_state.get("popup_page", 0), 0), page_count - 1)
+            start = page * POPUP_PAGE_SIZE
+            similarity_index = shared_view(
+                derived_cache, "similar", snapshot, (), lambda: build_similarity_index(snapshot)
+            )
+
+            st.markdown(
+                render_day_tenders_html(day_tenders[start:start + POPUP_PAGE_SIZE], start, similarity_index),
+                unsafe_allow_html=True,
+            )
+            # Neighbour lookups grow the index's memo; keep its share of the memory budget current
+            derived_cache.refresh(("shared", "similar", snapshot.version))
+
+            if page_count > 1:
+                prev_col, page_col, next_col = st.columns([1, 2, 1])
+                with prev_col:
+                    st.button("◀ Previous", key="popup_prev", disabled=page == 0,
+                              on_click=change_popup_page, args=(-1,))
+                with page_col:
+                    st.caption(f"Page {page + 1} of {page_count} "
+                               f"(tenders {start + 1}-{min(start + POPUP_PAGE_SIZE, len(day_tenders))} of {len(day_tenders)})")
+                with next_col:
+                    st.button("Next ▶", key="popup_next", disabled=page == page_count - 1,
+                              on_click=change_popup_page, args=(1,))
+        else:
+            st.info("No tender found for this date.")  # FIXED: Singular "tender"
+
+# Pages: each rerun only executes the page being viewed; all pages share the snapshot, filters and derived cache
+def overview_page():
+    """Callout cards and the deadline timeline"""
+    filtered_df, _, summary = filtered_view()
+
+    # Layout: Callout Cards
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("📌 Filtered Tender", summary["count"])  # FIXED: Singular "Tender"
+    with col2:
+        nearest_deadline = "N/A"
+        if summary["nearest_deadline"] is not None:
+            nearest_deadline = summary["nearest_deadline"].strftime('%d %b %Y')
+        st.metric("📆 Nearest Deadline", nearest_deadline)
+    with col3:
+        st.metric("⚠️ Urgent (7 days)", summary["urgent"])
+    with col4:
+        st.metric("🏆 Total CPV Codes", len(sorted_cpv_details))
+
+    st.divider()
+
+    # Timeline Chart
+    if not filtered_df.empty:
+        timeline_fig = shared_view(derived_cache, "timeline", snapshot, filter_state, lambda: create_timeline_chart(filtered_df))
+        if timeline_fig:
+            st.plotly_chart(timeline_fig, use_container_width=True)
+
+def calendar_page():
+    """Deadline calendar with the day popup"""
+    _, filtered_events, _ = filtered_view()
+    calendar_section(filtered_events, selected_date, selected_cpv)
+
+def map_page():
+    """Tender locations map"""
+    filtered_df, _, _ = filtered_view()
+    st.subheader("🗺️ Tender Locations")
+
     if not filtered_df.empty:
         try:
-            map_fig = create_map_visualization(filtered_df)
+            map_fig = shared_view(derived_cache, "map", snapshot, filter_state, lambda: create_map_visualization(filtered_df))
             if map_fig:
                 st.plotly_chart(map_fig, use_container_width=True)
             else:
                 st.warning("No geographic data available for filtered tender.")  # FIXED: Singular "tender"
-                
+
                 st.subheader("📍 Locations Summary")
                 if "Contract location" in filtered_df.columns:
                     location_summary = filtered_df.groupby("Contract location").size().sort_values(ascending=False)
@@ -619,132 +995,344 @@ with right:
     else:
         st.info("No location data available for current filters.")
 
-# Day Popup Window
-if st.session_state.get('show_day_popup', False) and st.session_state.get('selected_calendar_date'):
-    selected_date_obj = st.session_state.selected_calendar_date
-    day_tenders = get_tenders_for_date(filtered_events, selected_date_obj)
-    
-    st.markdown(f"""
-    <div class="day-popup">
-        <h2>📅 Tender for {selected_date_obj.strftime('%A, %d %B %Y')}</h2>
-        <p><strong>Total tender:</strong> {len(day_tenders)}</p>
-    </div>
-    """, unsafe_allow_html=True)  # FIXED: Singular "Tender"
-    
-    if day_tenders:
-    
-        col1, col2 = st.columns([6, 1])
-        with col2:
-            if st.button("❌ Close", key="close_popup"):
-                st.session_state.show_day_popup = False
-                st.rerun()
-        
-     
-        for i, tender in enumerate(day_tenders):
-            props = tender.get('extendedProps', {})
-            tender_link = props.get('tender_link', '')
-            is_urgent = tender.get('backgroundColor') == '#e74c3c'
-            
-            tender_class = "urgent-tender" if is_urgent else "normal-tender"
-            priority_icon = "🔴" if is_urgent else "🟢"
-            
-            st.markdown(f"""
-            <div class="tender-item {tender_class}">
-                <h4>{priority_icon} {props.get('full_title', tender['title'])}</h4>
-                <p><strong>Organisation:</strong> {props.get('organisation', 'Unknown')}</p>
-                <p><strong>Location:</strong> {props.get('contract_location', 'Unknown')}</p>
-                <p><strong>CPV Codes:</strong> {props.get('cpv_codes', 'N/A')}</p>
-                <p><strong>Deadline:</strong> {props.get('deadline_str', 'Unknown')}</p>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            # Add link button if available
-            if tender_link and tender_link.startswith('http'):
-                st.markdown(f"""
-                <div style="text-align: center; margin: 10px 0;">
-                    <a href="{tender_link}" target="_blank" rel="noopener noreferrer" class="calendar-link-button">
-                        🚀 Open Tender {i+1} in New Tab
-                    </a>
-                </div>
-                """, unsafe_allow_html=True)
-            else:
-                st.warning(f"⚠️ No link available for tender {i+1}")  # FIXED: Singular "tender"
-            
-            if i < len(day_tenders) - 1:
-                st.markdown("---")
+def get_detail_source(filtered_df):
+    """Rows whose details back the extra table columns, their cache state and decoded details (once per snapshot)"""
+    if tender_store is not None:
+        # Store queries only materialise the filtered rows
+        source, state = filtered_df, filter_state
     else:
-        st.info("No tender found for this date.")  # FIXED: Singular "tender"
+        source, state = snapshot.df, ()
+    if "details" not in source.columns:
+        return source, state, []
+    decoded = shared_view(derived_cache, "details_decoded", snapshot, state, lambda: decode_details(source["details"]))
+    return source, state, decoded
+
+def get_detail_keys(filtered_df):
+    """Scraped details fields offered as extra table columns, discovered once per snapshot"""
+    _, state, decoded = get_detail_source(filtered_df)
+    return shared_view(derived_cache, "detail_keys", snapshot, state, lambda: detail_keys(decoded))
 
-st.divider()
+def get_detail_column(filtered_df, key):
+    """One typed details field aligned with the filtered rows; parsed on first use and shared per snapshot"""
+    source, state, decoded = get_detail_source(filtered_df)
+    column = shared_view(
+        derived_cache, "detail_column", snapshot, state + (key,),
+        lambda: detail_column(source["tender_id"], decoded, key),
+    )
+    return column.reindex(filtered_df["tender_id"]).to_numpy()
+
+def apply_detail_columns(table, filtered_df, detail_fields):
+    """Add the chosen details fields to the styled table, filter by value range and sort"""
+    with st.expander("➕ More columns"):
+        extra = st.multiselect(
+            "Scraped fields", list(detail_fields), key="detail_columns",
+            help="Parsed only when first shown, so unused fields cost nothing at ingest",
+        )
+        sort_col, order_col = st.columns([3, 1])
+        with sort_col:
+            sort_by = st.selectbox("Sort by", ["Deadline"] + extra, key="detail_sort")
+        with order_col:
+            descending = st.checkbox("Descending", key="detail_descending")
 
+        columns = {key: get_detail_column(filtered_df, key) for key in extra}
+        mask = pd.Series(True, index=table.index)
+        for key, values in columns.items():
+            known = values[~pd.isna(values)]
+            if detail_fields[key] != "money" or len(known) == 0 or known.min() == known.max():
+                continue
+            low, high = float(known.min()), float(known.max())
+            selected = st.slider(f"{key} range (£)", low, high, (low, high), key=f"detail_range_{key}")
+            if selected != (low, high):
+                # Tenders without a value are hidden once the range is narrowed
+                mask &= (values >= selected[0]) & (values <= selected[1])
 
-st.subheader("📋 Tender Details")
+    if not extra and sort_by == "Deadline" and not descending:
+        return table, {}
+    table = table.assign(**columns)
+    sort_values = pd.Series(
+        filtered_df["deadline"].to_numpy() if sort_by == "Deadline" else columns[sort_by], index=table.index
+    )
+    order = sort_values[mask].sort_values(ascending=not descending, na_position="last", kind="stable").index
+    column_config = {
+        key: st.column_config.NumberColumn(key, format="£%.0f") if detail_fields[key] == "money"
+        else st.column_config.DatetimeColumn(key, format="D MMM YYYY") if detail_fields[key] == "date"
+        else st.column_config.TextColumn(key)
+        for key in extra
+    }
+    return table.loc[order], column_config
 
-if not filtered_df.empty:
+def table_page():
+    """Tender details table with summary counts and exports"""
+    filtered_df, _, _ = filtered_view()
+    st.subheader("📋 Tender Details")
 
-    st.markdown("""
-    <div class="priority-legend">
-        <h4>📊 Priority Legend</h4>
-        <div style="display: flex; flex-wrap: wrap; gap: 15px; margin-top: 10px;">
-            <span>🔴 <strong>Critical:</strong> ≤3 days</span>
-            <span>🟠 <strong>Urgent:</strong> 4-7 days</span>
-            <span>🟡 <strong>Soon:</strong> 8-14 days</span>
-            <span>🟢 <strong>Normal:</strong> 15-30 days</span>
-            <span>🔵 <strong>Future:</strong> >30 days</span>
+    if not filtered_df.empty:
+
+        st.markdown("""
+        <div class="priority-legend">
+            <h4>📊 Priority Legend</h4>
+            <div style="display: flex; flex-wrap: wrap; gap: 15px; margin-top: 10px;">
+                <span>🔴 <strong>Critical:</strong> ≤3 days</span>
+                <span>🟠 <strong>Urgent:</strong> 4-7 days</span>
+                <span>🟡 <strong>Soon:</strong> 8-14 days</span>
+                <span>🟢 <strong>Normal:</strong> 15-30 days</span>
+                <span>🔵 <strong>Future:</strong> >30 days</span>
+            </div>
         </div>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    try:
-        styled_table = create_styled_table(filtered_df)
-        if styled_table is not None:
-            st.dataframe(
-                styled_table,
-                use_container_width=True,
-                height=400,
-                column_config={
-                    "Priority": st.column_config.TextColumn("Priority", width="small"),
-                    "Tender Title": st.column_config.TextColumn("Tender Title", width="large"),
-                    "Deadline": st.column_config.TextColumn("Deadline", width="small"),
-                    "Days Left": st.column_config.NumberColumn("Days Left", width="small", format="%d days"),
-                    "Organisation": st.column_config.TextColumn("Organisation", width="medium"),
-                    "Location": st.column_config.TextColumn("Location", width="medium"),
-                    "Tender Link": st.column_config.LinkColumn(
-                        "Tender Link", 
-                        width="medium",
-                        display_text="Open Tender"
+        """, unsafe_allow_html=True)
+
+        try:
+            styled_table = shared_view(derived_cache, "table", snapshot, filter_state, lambda: create_styled_table(filtered_df))
+            if styled_table is not None:
+                styled_table, detail_config = apply_detail_columns(
+                    styled_table, filtered_df, dict(get_detail_keys(filtered_df))
+                )
+                st.dataframe(
+                    styled_table,
+                    use_container_width=True,
+                    height=400,
+                    column_config={
+                        "Priority": st.column_config.TextColumn("Priority", width="small"),
+                        "Tender Title": st.column_config.TextColumn("Tender Title", width="large"),
+                        "Deadline": st.column_config.TextColumn("Deadline", width="small"),
+                        "Days Left": st.column_config.NumberColumn("Days Left", width="small", format="%d days"),
+                        "Organisation": st.column_config.TextColumn("Organisation", width="medium"),
+                        "Location": st.column_config.TextColumn("Location", width="medium"),
+                        "Tender Link": st.column_config.LinkColumn(
+                            "Tender Link", 
+                            width="medium",
+                            display_text="Open Tender"
+                        ),
+                        "CPV Codes": st.column_config.TextColumn("CPV Codes", width="large"),
+                        **detail_config,
+                    }
+                )
+
+                # Summary statistics
+                col1, col2, col3, col4, col5 = st.columns(5)
+
+                days_left = (filtered_df['deadline'] - pd.Timestamp.now()).dt.days
+
+                with col1:
+                    critical = len(days_left[days_left <= 3])
+                    st.metric("🔴 Critical", critical)
+                with col2:
+                    urgent = len(days_left[(days_left > 3) & (days_left <= 7)])
+                    st.metric("🟠 Urgent", urgent)
+                with col3:
+                    soon = len(days_left[(days_left > 7) & (days_left <= 14)])
+                    st.metric("🟡 Soon", soon)
+                with col4:
+                    normal = len(days_left[(days_left > 14) & (days_left <= 30)])
+                    st.metric("🟢 Normal", normal)
+                with col5:
+                    future = len(days_left[days_left > 30])
+                    st.metric("🔵 Future", future)
+
+        except Exception as e:
+            st.error(f"Table display error: {e}")
+            simple_df = filtered_df[["title", "organisation", "Contract location", "link"]].copy()
+            simple_df["Tender Link"] = simple_df["link"].apply(
+                lambda x: x if x and x.startswith('http') else ""
+            )
+            st.dataframe(simple_df.drop('link', axis=1), use_container_width=True)
+
+        # Exports are generated only when a button is clicked and cached per data version and filters
+        st.write("**⬇️ Export filtered tenders**")
+        export_formats = [fmt for fmt in EXPORT_FORMATS if fmt != "parquet" or PARQUET_AVAILABLE]
+        for column, export_format in zip(st.columns(len(export_formats)), export_formats):
+            extension, mime = EXPORT_FORMATS[export_format]
+            with column:
+                st.download_button(
+                    f"{extension.upper()}",
+                    # Runs on a separate thread after the click, so it binds this run's data
+                    data=lambda export_format=export_format, df=filtered_df, snap=snapshot, state=filter_state: shared_view(
+                        derived_cache, f"export_{export_format}", snap, state,
+                        lambda: b"".join(iter_export(df, export_format)),
                     ),
-                    "CPV Codes": st.column_config.TextColumn("CPV Codes", width="large")
-                }
+                    file_name=f"tenders_{filter_state[1]}.{extension}",
+                    mime=mime,
+                    key=f"export_{export_format}",
+                    on_click="ignore",
+                )
+    else:
+        st.info("No tender match the current filters.")  # FIXED: Singular "tender"
+
+
+# Buyer analytics: ranking and drill-down read the incrementally maintained aggregates
+@st.fragment
+def buyer_section():
+    """Ranked buyers with a drill-down into one organisation's live tenders"""
+    st.subheader("🏛️ Buyer Analytics")
+    buyers = get_buyer_aggregates()
+    if not len(buyers):
+        if watcher.indexed_version < watcher.version:
+            st.info("Buyer analytics are still being built for the latest data; reload the page in a moment.")
+        else:
+            st.info("No buyer data available.")
+        return
+
+    query_col, sort_col = st.columns([2, 1])
+    with query_col:
+        query = st.text_input("Find buyer", key="buyer_query", placeholder="Organisation name")
+    with sort_col:
+        sort_by = st.selectbox("Rank by", list(BUYER_SORT_KEYS), key="buyer_sort")
+    ranking = buyers.ranking_frame(sort_by, query)
+    st.caption(f"{pluralise(len(buyers), 'buyer')} with live tenders (name variants merged)")
+    if ranking.empty:
+        st.info("No buyers match the search.")
+        return
+
+    ranking["Next deadline"] = ranking["Next deadline"].dt.strftime("%d %b %Y")
+    st.dataframe(ranking.drop(columns="key"), use_container_width=True, hide_index=True, height=300)
+
+    names = dict(zip(ranking["key"], ranking["Buyer"]))
+    selected = st.selectbox("Drill down", list(names), format_func=names.get, key="buyer_drilldown")
+    details = buyers.buyer(selected)
+    if details is None:
+        return
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("📌 Live Tenders", details["count"])
+    col2.metric("📆 Next Deadline", details["upcoming"][0]["deadline"].strftime("%d %b %Y"))
+    col3.metric("🏷️ CPV Codes", len(details["cpvs"]))
+    if len(details["names"]) > 1:
+        st.caption("Also published as: " + ", ".join(name for name in details["names"] if name != details["name"]))
+
+    mix_col, cadence_col = st.columns(2)
+    with mix_col:
+        cpv_mix = pd.DataFrame(details["cpvs"][:10], columns=["CPV", "Tender Count"])
+        st.plotly_chart(
+            px.bar(cpv_mix, x="Tender Count", y="CPV", orientation="h", title="CPV Mix", height=350)
+            .update_layout(yaxis={"categoryorder": "total ascending"}),
+            use_container_width=True,
+        )
+    with cadence_col:
+        if details["months"]:
+            cadence = pd.DataFrame(details["months"], columns=["Month", "Tender Count"])
+            st.plotly_chart(
+                px.bar(cadence, x="Month", y="Tender Count", title="Publication Cadence", height=350),
+                use_container_width=True,
             )
-            
-            # Summary statistics
-            col1, col2, col3, col4, col5 = st.columns(5)
-            
-            days_left = (filtered_df['deadline'] - pd.Timestamp.now()).dt.days
-            
-            with col1:
-                critical = len(days_left[days_left <= 3])
-                st.metric("🔴 Critical", critical)
-            with col2:
-                urgent = len(days_left[(days_left > 3) & (days_left <= 7)])
-                st.metric("🟠 Urgent", urgent)
-            with col3:
-                soon = len(days_left[(days_left > 7) & (days_left <= 14)])
-                st.metric("🟡 Soon", soon)
-            with col4:
-                normal = len(days_left[(days_left > 14) & (days_left <= 30)])
-                st.metric("🟢 Normal", normal)
-            with col5:
-                future = len(days_left[days_left > 30])
-                st.metric("🔵 Future", future)
-            
-    except Exception as e:
-        st.error(f"Table display error: {e}")
-        simple_df = filtered_df[["title", "organisation", "Contract location", "link"]].copy()
-        simple_df["Tender Link"] = simple_df["link"].apply(
-            lambda x: x if x and x.startswith('http') else ""
+        else:
+            st.info("No publication dates recorded for this buyer.")
+
+    upcoming = pd.DataFrame(details["upcoming"][:20])
+    upcoming["deadline"] = upcoming["deadline"].dt.strftime("%d %b %Y")
+    st.write("**Upcoming deadlines**")
+    st.dataframe(
+        upcoming.rename(columns={"title": "Tender Title", "link": "Tender Link", "deadline": "Deadline"}),
+        use_container_width=True,
+        hide_index=True,
+        column_config={"Tender Link": st.column_config.LinkColumn("Tender Link", display_text="Open Tender")},
+    )
+    st.write("**Locations**")
+    st.write(", ".join(f"{location} ({count})" for location, count in details["locations"]))
+
+def analytics_page():
+    """Buyer analytics"""
+    buyer_section()
+
+def history_page():
+    """Trends and "as of" queries over the archive of expired tenders"""
+    st.subheader("📜 Tender History")
+    if not archive_dir:
+        st.info("Set TENDER_ARCHIVE_DIR to archive expired tenders for historical analysis.")
+        return
+    months = archive_months(archive_dir)
+    if not months:
+        st.info("No expired tenders archived yet.")
+        return
+
+    first_day = pd.Timestamp(f"{months[0]}-01").date()
+    last_day = (pd.Timestamp(f"{months[-1]}-01") + pd.offsets.MonthEnd(0)).date()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        start = st.date_input("Deadline from", value=max(first_day, last_day - timedelta(days=365)),
+                              min_value=first_day, max_value=last_day, key="history_from")
+    with col2:
+        end = st.date_input("Deadline to", value=last_day, min_value=first_day, max_value=last_day, key="history_to")
+    with col3:
+        trend_by = st.radio("Trend by", ["CPV", "Buyer"], horizontal=True, key="history_by")
+
+    # The archive only grows on ingest, so results are shared per data version like other derived views
+    trend = shared_view(
+        derived_cache, "history_trend", snapshot, (start.isoformat(), end.isoformat(), trend_by),
+        lambda: trends(archive_dir, start, end, by=trend_by.lower()),
+    )
+    if trend.empty:
+        st.info("No archived tenders in this range.")
+    else:
+        st.plotly_chart(
+            px.line(trend, x="Month", y="Tender Count", color=trend_by, markers=True,
+                    title=f"Expired Tenders per Month by {trend_by}", height=450),
+            use_container_width=True,
+        )
+
+    st.write("**As of a past date**")
+    when = st.date_input("Open on", value=max(first_day, last_day - timedelta(days=30)),
+                         min_value=first_day, max_value=last_day, key="history_as_of")
+    open_then, undated = shared_view(
+        derived_cache, "history_as_of", snapshot, (when.isoformat(), selected_cpv),
+        lambda: as_of(archive_dir, when, selected_cpv),
+    )
+    st.metric(f"📌 Archived Tenders Open on {when.strftime('%d %b %Y')}", len(open_then))
+    if undated:
+        st.caption(
+            f"Only tenders with a published date are counted. {pluralise(undated, 'archived tender')} without one "
+            "had a later deadline and may also have been open."
+        )
+    if not open_then.empty:
+        st.dataframe(
+            open_then[["title", "organisation", "deadline", "location", "link"]].rename(columns={
+                "title": "Tender Title", "organisation": "Organisation", "deadline": "Deadline",
+                "location": "Location", "link": "Tender Link",
+            }),
+            use_container_width=True,
+            hide_index=True,
+            height=400,
+            column_config={"Tender Link": st.column_config.LinkColumn("Tender Link", display_text="Open Tender")},
+        )
+
+current_page = st.navigation([
+    st.Page(overview_page, title="Overview", icon="📊", url_path="overview", default=True),
+    st.Page(calendar_page, title="Calendar", icon="📅", url_path="calendar"),
+    st.Page(map_page, title="Map", icon="🗺️", url_path="map"),
+    st.Page(table_page, title="Tender Details", icon="📋", url_path="table"),
+    st.Page(analytics_page, title="Buyer Analytics", icon="🏛️", url_path="analytics"),
+    st.Page(history_page, title="History", icon="📜", url_path="history"),
+])
+current_page.run()
+
+
+# Debug panel: memory usage of cached structures and derived views
+with st.sidebar.expander("🛠️ Debug"):
+    usage = derived_cache.usage()
+    st.write("**Cached data**")
+    for name, size in usage["pinned"].items():
+        st.write(f"{name}: {format_bytes(size)}")
+    st.write("**This session**")
+    st.write(f"Filter state: {filter_state[0]} from {filter_state[1]}")
+    st.write(f"Session state: {format_bytes(estimate_size(dict(st.session_state)))}")
+    st.write("**Process**")
+    st.write(f"Snapshot version: {snapshot.version} (built in {snapshot.build_seconds:.2f}s)")
+    st.write(f"Quarantined records: {snapshot.stats.get('quarantined', 0)}")
+    st.write(f"Cross-portal duplicates collapsed: {snapshot.stats.get('duplicates', 0)}")
+    st.write(
+        f"Last ingest: {snapshot.stats.get('new', 0)} new, {snapshot.stats.get('changed', 0)} changed, "
+        f"{snapshot.stats.get('removed', 0)} removed"
+    )
+    if "log_lines" in snapshot.stats:
+        st.write(
+            f"Tender log: {snapshot.stats['log_lines']} new lines read, "
+            f"{snapshot.stats.get('compacted', 0)} superseded lines compacted"
         )
-        st.dataframe(simple_df.drop('link', axis=1), use_container_width=True)
-else:
-    st.info("No tender match the current filters.")  # FIXED: Singular "tender"
+    if archive_dir:
+        st.write(f"Expired tenders archived on last ingest: {snapshot.stats.get('archived', 0)}")
+    st.write(f"Derived views (all sessions): {format_bytes(usage['derived_bytes'])} in {usage['derived_entries']} entries")
+    st.write(f"Budget used: {format_bytes(usage['pinned_bytes'] + usage['derived_bytes'])} / {format_bytes(usage['budget_bytes'])}")
+    st.write(f"LRU evictions: {usage['evictions']}")
+    for kind in ("filtered", "timeline", "map", "table"):
+        hits, misses = usage["hits"].get(kind, 0), usage["misses"].get(kind, 0)
+        st.write(f"Cache {kind}: {hits} hits / {misses} misses")
+    st.write(f"Resident memory: {format_bytes(process_rss_bytes())}")
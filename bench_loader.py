@@ -0,0 +1,71 @@
+"""Benchmark reading tender files: plain json.load versus streaming (optionally compressed) input.
+
+Usage: python bench_loader.py [path/to/tender_opportunities.json]
+
+Compressed copies of the file are written next to it. Only I/O, decompression
+and JSON parsing are measured, so the numbers are not skewed by tender processing.
+"""
+import gzip
+import json
+import lzma
+import os
+import sys
+import time
+import tracemalloc
+
+from tender_data import DEFAULT_JSON_FILE, iter_tenders, open_tender_file
+
+
+def write_compressed_copies(path):
+    """Write .gz/.xz/.zst copies of a plain JSON file and return their paths"""
+    with open(path, "rb") as f:
+        raw = f.read()
+
+    copies = []
+    with gzip.open(path + ".gz", "wb") as f:
+        f.write(raw)
+    copies.append(path + ".gz")
+    with lzma.open(path + ".xz", "wb") as f:
+        f.write(raw)
+    copies.append(path + ".xz")
+    try:
+        import zstandard
+        with open(path + ".zst", "wb") as f:
+            f.write(zstandard.ZstdCompressor().compress(raw))
+        copies.append(path + ".zst")
+    except ImportError:
+        print("zstandard not installed - skipping .json.zst")
+    return copies
+
+
+def measure(label, path, read):
+    """Run one read, reporting wall time and peak traced memory"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    count = read(path)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    size_mb = os.path.getsize(path) / 1024 / 1024
+    print(f"{label:<22} {size_mb:>9.1f} MB {elapsed:>9.3f} s {peak / 1024 / 1024:>10.1f} MB  ({count} tenders)")
+
+
+def read_json_load(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return len(json.load(f).get("tenders", []))
+
+
+def read_streaming(path):
+    with open_tender_file(path) as f:
+        return sum(1 for _ in iter_tenders(f))
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_JSON_FILE
+    copies = write_compressed_copies(path)
+
+    print(f"{'mode':<22} {'file size':>12} {'time':>11} {'peak memory':>13}")
+    measure("json.load (plain)", path, read_json_load)
+    measure("streaming (plain)", path, read_streaming)
+    for copy in copies:
+        measure(f"streaming ({copy.rsplit('.', 1)[-1]})", copy, read_streaming)
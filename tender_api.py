@@ -0,0 +1,346 @@
+"""Local read-only HTTP JSON API over the processed tender snapshot.
+
+Usage: python tender_api.py [--source PATH] [--host 127.0.0.1] [--port 8502]
+
+Endpoints (all GET):
+  /tenders     filtered tenders: cpv, from, to, location, q, offset, limit,
+               near=lat,lon[;lat,lon] with radius_km, bbox=south,west,north,east
+  /day/<date>  tenders whose deadline falls on one day (same filters apply)
+  /aggregates  counts per location, CPV and deadline month for the filters
+  /cpvs        CPV typeahead: q, limit
+  /status      snapshot version, build time and ingest stats
+  /export.csv, /export.parquet, /export.ics
+               streamed export of the filtered tenders (same filters, no paging)
+
+Responses carry a weak ETag derived from the data version and the request
+(the gzip and identity bodies are equivalent, not byte-identical), so clients
+polling with If-None-Match get a 304 until the snapshot changes.
+Bodies are gzip-compressed when the client accepts it.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import math
+import os
+import zlib
+from collections import namedtuple
+from datetime import date, datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from tender_data import DEFAULT_JSON_FILE, filter_tenders, load_and_process_data
+from tender_export import EXPORT_FORMATS, iter_export
+from tender_geo import GridIndex, parse_points, proximity_mask
+from tender_memory import DerivedCache
+from tender_search import CpvIndex, live_cpv_counts
+from tender_snapshot import SnapshotWatcher
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8502
+# Page size defaults and cap for list endpoints
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# Bodies smaller than this are sent uncompressed
+GZIP_MIN_BYTES = 1024
+# Rendered exports are kept for repeat polls (e.g. calendar clients) while no larger than this
+EXPORT_CACHE_MAX_BYTES = 8 * 1024 * 1024
+EXPORT_CACHE_BUDGET_BYTES = 64 * 1024 * 1024
+
+# Streamed response body: chunks of bytes plus content type and download name
+ExportResponse = namedtuple("ExportResponse", ["chunks", "content_type", "file_name"])
+
+
+class BadRequest(ValueError):
+    """Invalid query parameter, reported to the client as 400"""
+
+
+def _etag_matches(if_none_match, etag):
+    """Whether an If-None-Match header matches an ETag (weak comparison, as RFC 9110 requires)"""
+    etag = etag.removeprefix("W/")
+    # Each entry is "*", "opaque" or W/"opaque"; our tags never contain commas
+    for tag in (if_none_match or "").split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _param(query, name, default=None):
+    values = query.get(name)
+    return values[0].strip() if values and values[0].strip() else default
+
+
+def _date_param(query, name):
+    value = _param(query, name)
+    if value is None:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise BadRequest(f"{name} must be an ISO date (YYYY-MM-DD)")
+
+
+def _int_param(query, name, default, maximum=None):
+    value = _param(query, name)
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise BadRequest(f"{name} must be an integer")
+    if number < 0:
+        raise BadRequest(f"{name} must not be negative")
+    return min(number, maximum) if maximum is not None else number
+
+
+def _json_value(value):
+    if isinstance(value, (pd.Timestamp, datetime, date)):
+        return value.isoformat()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, (list, tuple)) or hasattr(value, "tolist"):
+        return list(value.tolist() if hasattr(value, "tolist") else value)
+    return value
+
+
+def tender_rows(df):
+    """JSON-ready tender dicts for a (page of a) processed tender frame"""
+    columns = ["title", "deadline", "organisation", "cpv_pairs", "link", "Contract location", "latitude", "longitude"]
+    if "sources" in df.columns:
+        columns.append("sources")
+    names = {"Contract location": "location", "cpv_pairs": "cpvs"}
+    return [
+        {names.get(column, column): _json_value(value) for column, value in zip(columns, row)}
+        for row in zip(*(df[column] for column in columns))
+    ]
+
+
+class TenderAPI:
+    """Query layer used by the HTTP handler; each call reads the watcher's current snapshot"""
+
+    def __init__(self, watcher):
+        self.watcher = watcher
+        self._cpv_index = (None, None)
+        self._geo_index = (None, None)
+        self.export_cache = DerivedCache(EXPORT_CACHE_BUDGET_BYTES)
+
+    def snapshot(self):
+        return self.watcher.current()
+
+    def _proximity(self, snapshot, query):
+        near, bbox = _param(query, "near"), _param(query, "bbox")
+        if near is None and bbox is None:
+            return None
+        version, index = self._geo_index
+        if version != snapshot.version:
+            index = GridIndex.from_frame(snapshot.df)
+            self._geo_index = (snapshot.version, index)
+        try:
+            if near is not None:
+                radius_km = float(_param(query, "radius_km", "50"))
+                return proximity_mask(index, ("radius", parse_points(near), radius_km))
+            south, west, north, east = (float(value) for value in bbox.split(","))
+        except ValueError as e:
+            raise BadRequest(f"invalid proximity filter: {e}")
+        return proximity_mask(index, ("bbox", (south, west, north, east)))
+
+    def _filtered(self, snapshot, query):
+        return filter_tenders(
+            snapshot.df,
+            _param(query, "cpv", "All"),
+            date_from=_date_param(query, "from") or date.today(),
+            date_to=_date_param(query, "to"),
+            location=_param(query, "location"),
+            text=_param(query, "q"),
+            within=self._proximity(snapshot, query),
+        )
+
+    def _page(self, df, query):
+        offset = _int_param(query, "offset", 0)
+        limit = _int_param(query, "limit", DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+        return {"total": len(df), "offset": offset, "limit": limit, "tenders": tender_rows(df.iloc[offset:offset + limit])}
+
+    def tenders(self, snapshot, query):
+        return self._page(self._filtered(snapshot, query), query)
+
+    def day(self, snapshot, query, day):
+        try:
+            target = date.fromisoformat(day)
+        except ValueError:
+            raise BadRequest("day must be an ISO date (YYYY-MM-DD)")
+        df = self._filtered(snapshot, dict(query, **{"from": [day], "to": [day]}))
+        return dict(self._page(df, query), date=target.isoformat())
+
+    def aggregates(self, snapshot, query):
+        df = self._filtered(snapshot, query)
+        if df.empty:
+            return {"total": 0, "locations": {}, "cpvs": {}, "months": {}}
+        months = df["deadline"].dt.to_period("M").astype(str).value_counts().sort_index()
+        return {
+            "total": len(df),
+            "locations": df["Contract location"].value_counts().to_dict(),
+            "cpvs": live_cpv_counts(df),
+            "months": months.to_dict(),
+        }
+
+    def cpvs(self, snapshot, query):
+        version, index = self._cpv_index
+        if version != snapshot.version:
+            counts = live_cpv_counts(snapshot.df)
+            index = CpvIndex({label: counts.get(label, 0) for label in snapshot.cpv_details})
+            self._cpv_index = (snapshot.version, index)
+        limit = _int_param(query, "limit", DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+        return [{"cpv": label, "count": index.count(label)} for label in index.search(_param(query, "q", ""), limit)]
+
+    def export(self, snapshot, query, export_format):
+        extension, content_type = EXPORT_FORMATS[export_format]
+        file_name = f"tenders.{extension}"
+        # Open-ended date filters start today, so the day is part of the key
+        key = ("api", export_format, snapshot.version, date.today().isoformat(), repr(sorted(query.items())))
+        cached = self.export_cache.get(key)
+        if cached is not None:
+            return ExportResponse([cached], content_type, file_name)
+        df = self._filtered(snapshot, query)
+        return ExportResponse(self._caching(iter_export(df, export_format), key), content_type, file_name)
+
+    def _caching(self, chunks, key):
+        # Keep the rendered export while it stays small; larger ones are streamed without being held
+        parts, size = [], 0
+        for chunk in chunks:
+            if parts is not None:
+                parts.append(chunk)
+                size += len(chunk)
+                if size > EXPORT_CACHE_MAX_BYTES:
+                    parts = None
+            yield chunk
+        if parts is not None:
+            self.export_cache.put(key, b"".join(parts))
+
+    def status(self, snapshot, query):
+        return {
+            "version": snapshot.version,
+            "built_at": datetime.fromtimestamp(snapshot.built_at).isoformat(timespec="seconds"),
+            "build_seconds": snapshot.build_seconds,
+            "stats": snapshot.stats,
+            "error": str(self.watcher.last_error) if self.watcher.last_error else None,
+        }
+
+    def route(self, path):
+        """Resolve a request path to ``(handler, extra args)`` or None"""
+        parts = [part for part in path.split("/") if part]
+        if len(parts) == 1 and parts[0] in ("tenders", "aggregates", "cpvs", "status"):
+            return getattr(self, parts[0]), ()
+        if len(parts) == 2 and parts[0] == "day":
+            return self.day, (parts[1],)
+        if len(parts) == 1 and parts[0].startswith("export."):
+            export_format = parts[0].split(".", 1)[1]
+            if export_format in EXPORT_FORMATS:
+                return self.export, (export_format,)
+        return None
+
+
+class TenderRequestHandler(BaseHTTPRequestHandler):
+    """GET-only JSON handler with ETag revalidation and gzip"""
+
+    api = None
+    server_version = "TenderAPI/1.0"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        route = self.api.route(url.path)
+        if route is None:
+            return self._send_json(HTTPStatus.NOT_FOUND, {"error": "not found"})
+
+        # The ETag only depends on the data version, the day (open-ended queries start today) and the
+        # request, so a revalidation is answered before any filtering or serialisation happens
+        snapshot = self.api.snapshot()
+        request_key = f"{date.today().isoformat()} {self.path}"
+        etag = 'W/"{}-{}"'.format(snapshot.version, hashlib.sha1(request_key.encode("utf-8")).hexdigest()[:16])
+        if _etag_matches(self.headers.get("If-None-Match"), etag):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        handler, args = route
+        try:
+            payload = handler(snapshot, parse_qs(url.query), *args)
+        except BadRequest as e:
+            return self._send_json(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+        if isinstance(payload, ExportResponse):
+            return self._send_stream(payload, etag)
+        self._send_json(HTTPStatus.OK, payload, etag)
+
+    def _send_stream(self, response, etag):
+        # No Content-Length: the body is streamed chunk by chunk and the HTTP/1.0 connection closes at the end
+        compress = response.content_type.startswith("text/") and "gzip" in (self.headers.get("Accept-Encoding") or "")
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", response.content_type)
+        self.send_header("Content-Disposition", f'attachment; filename="{response.file_name}"')
+        self.send_header("Vary", "Accept-Encoding")
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        if compress:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+
+        compressor = zlib.compressobj(5, zlib.DEFLATED, 31) if compress else None
+        for chunk in response.chunks:
+            self.wfile.write(compressor.compress(chunk) if compressor else chunk)
+        if compressor:
+            self.wfile.write(compressor.flush())
+
+    def _send_json(self, status, payload, etag=None):
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        compress = len(body) >= GZIP_MIN_BYTES and "gzip" in (self.headers.get("Accept-Encoding") or "")
+        if compress:
+            body = gzip.compress(body, compresslevel=5)
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Vary", "Accept-Encoding")
+        if compress:
+            self.send_header("Content-Encoding", "gzip")
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Keep polling clients from flooding stderr
+        pass
+
+
+def create_server(source=DEFAULT_JSON_FILE, host=DEFAULT_HOST, port=DEFAULT_PORT, build=load_and_process_data):
+    """Start the snapshot watcher and return an HTTP server bound to host:port (port 0 picks a free one)"""
+    watcher = SnapshotWatcher(source, build)
+    watcher.start()
+    handler = type("BoundTenderRequestHandler", (TenderRequestHandler,), {"api": TenderAPI(watcher)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.watcher = watcher
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve tender data as a local read-only JSON API")
+    parser.add_argument("--source", default=os.environ.get("TENDER_SOURCE", DEFAULT_JSON_FILE))
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    server = create_server(args.source, args.host, args.port)
+    print(f"Serving tender API on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.watcher.stop()
+        server.server_close()
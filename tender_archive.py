@@ -0,0 +1,302 @@
+import argparse
+import glob
+import json
+import os
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from tender_buyers import buyer_key_variants, normalise_buyer, resolve_buyer_keys
+
+try:
+    import fcntl
+except ImportError:  # Windows: only writers within one process are serialised
+    fcntl = None
+
+# Default location of the optional archive of expired tenders
+DEFAULT_ARCHIVE_DIR = "output/archive"
+
+# Longest time a tender is assumed to stay open; bounds the partitions an "as of" query reads
+DEFAULT_MAX_OPEN_DAYS = 366
+
+ARCHIVE_COLUMNS = [
+    "tender_id", "title", "organisation", "deadline", "published", "location", "cpv_codes", "cpv_pairs", "link",
+    "archived_at",
+]
+
+# Part files a month partition may hold; the next append compacts them into one
+MAX_PARTITION_PARTS = 16
+# Per-partition list of archived tender ids and the part files they were collected from
+MANIFEST_FILE = "manifest.json"
+
+# Serialises appends from the watcher thread and CLI backfills in one process
+_write_lock = threading.Lock()
+
+
+@contextmanager
+def _partition_lock(directory, shared=False):
+    """Cross-process lock on one partition.
+
+    Writers hold it exclusively, so concurrent ingests cannot both archive a
+    tender; readers hold it shared, so a compaction never removes a part file
+    they are reading.
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(directory, ".lock"), "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("The tender archive requires pyarrow. Install with: pip install pyarrow")
+    return pa, pq
+
+
+def archive_schema():
+    """Explicit Parquet schema, so partitions written from sparse batches stay compatible"""
+    pa, _ = _pyarrow()
+    return pa.schema([
+        ("tender_id", pa.string()), ("title", pa.string()), ("organisation", pa.string()),
+        ("deadline", pa.timestamp("us")), ("published", pa.timestamp("us")), ("location", pa.string()),
+        ("cpv_codes", pa.list_(pa.string())), ("cpv_pairs", pa.list_(pa.string())), ("link", pa.string()),
+        ("archived_at", pa.timestamp("us")),
+    ])
+
+
+def partition_dir(archive_dir, month):
+    """Directory of one deadline month ("YYYY-MM") partition"""
+    return os.path.join(archive_dir, f"month={month}")
+
+
+def _part_paths(directory):
+    return sorted(glob.glob(os.path.join(directory, "part-*.parquet")))
+
+
+def _archived_ids(directory, paths):
+    # The manifest is trusted only when it lists exactly the current part files
+    names = [os.path.basename(path) for path in paths]
+    try:
+        with open(os.path.join(directory, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest["parts"] == names:
+            return set(manifest["ids"])
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    _, pq = _pyarrow()
+    ids = set()
+    for path in paths:
+        ids.update(pq.read_table(path, columns=["tender_id"]).column("tender_id").to_pylist())
+    return ids
+
+
+def _write_manifest(directory, ids):
+    path = os.path.join(directory, MANIFEST_FILE)
+    manifest = {"parts": [os.path.basename(part) for part in _part_paths(directory)], "ids": sorted(ids)}
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(path + ".tmp", path)
+
+
+def archive_rows(rows, archive_dir=DEFAULT_ARCHIVE_DIR):
+    """Append expired tender rows (TENDER_COLUMNS order) to their deadline-month partitions.
+
+    Tenders already archived in their month are skipped, so the same expired
+    tenders can be offered on every ingest; the known ids come from the
+    partition's manifest rather than its Parquet files. Each call adds at most
+    one zstd-compressed Parquet file per touched month, and a month holding
+    ``MAX_PARTITION_PARTS`` files is compacted into one instead. Returns the
+    number archived.
+    """
+    if not rows:
+        return 0
+    pa, pq = _pyarrow()
+    by_month = defaultdict(dict)
+    for title, deadline, organisation, _, cpv_codes, cpv_pairs, link, location, _, _, tender_id, published, _ in rows:
+        by_month[pd.Timestamp(deadline).strftime("%Y-%m")][tender_id] = {
+            "tender_id": tender_id, "title": title, "organisation": organisation,
+            "deadline": pd.Timestamp(deadline).to_pydatetime(),
+            "published": None if published is None or pd.isna(published) else pd.Timestamp(published).to_pydatetime(),
+            "location": location, "cpv_codes": list(cpv_codes), "cpv_pairs": list(cpv_pairs), "link": link,
+        }
+
+    archived_at = datetime.now()
+    written = 0
+    with _write_lock:
+        for month, records in sorted(by_month.items()):
+            directory = partition_dir(archive_dir, month)
+            os.makedirs(directory, exist_ok=True)
+            # Held from the id check to the rename, e.g. while the dashboard and the API ingest together
+            with _partition_lock(directory):
+                parts = _part_paths(directory)
+                known = _archived_ids(directory, parts)
+                new = [
+                    dict(record, archived_at=archived_at) for tender_id, record in records.items() if tender_id not in known
+                ]
+                if not new:
+                    continue
+                table = pa.Table.from_pylist(new, schema=archive_schema())
+                compact = len(parts) >= MAX_PARTITION_PARTS
+                if compact:
+                    table = pa.concat_tables([pq.read_table(part, schema=archive_schema()) for part in parts] + [table])
+                path = os.path.join(directory, f"part-{archived_at:%Y%m%dT%H%M%S%f}-{os.getpid()}.parquet")
+                # Written aside and renamed, so readers never see a partial file
+                pq.write_table(table, path + ".tmp", compression="zstd")
+                os.replace(path + ".tmp", path)
+                if compact:
+                    for part in parts:
+                        os.remove(part)
+                _write_manifest(directory, known.union(record["tender_id"] for record in new))
+                written += len(new)
+    return written
+
+
+def archive_months(archive_dir=DEFAULT_ARCHIVE_DIR):
+    """Deadline months present in the archive, oldest first"""
+    if not os.path.isdir(archive_dir):
+        return []
+    return sorted(name[len("month="):] for name in os.listdir(archive_dir) if name.startswith("month="))
+
+
+def iter_archive(archive_dir=DEFAULT_ARCHIVE_DIR, start=None, end=None, columns=None):
+    """Archived tenders with a deadline in [start, end], one DataFrame per month partition.
+
+    Partitions outside the range are never opened and only ``columns`` are
+    read, so memory use is bounded by one month of the requested columns.
+    """
+    _, pq = _pyarrow()
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+    first_month = start.strftime("%Y-%m") if start is not None else ""
+    last_month = end.strftime("%Y-%m") if end is not None else "9999-12"
+    if end is not None:
+        # Inclusive of the whole end day
+        end += timedelta(days=1)
+    if columns is not None and "deadline" not in columns:
+        columns = list(columns) + ["deadline"]
+
+    for month in archive_months(archive_dir):
+        # Partition pruning: months outside the range are skipped without opening any file
+        if not first_month <= month <= last_month:
+            continue
+        directory = partition_dir(archive_dir, month)
+        with _partition_lock(directory, shared=True):
+            paths = _part_paths(directory)
+            if not paths:
+                continue
+            df = pd.concat([pq.read_table(path, columns=columns).to_pandas() for path in paths], ignore_index=True)
+        mask = pd.Series(True, index=df.index)
+        if start is not None:
+            mask &= df["deadline"] >= start
+        if end is not None:
+            mask &= df["deadline"] < end
+        if mask.any():
+            yield df[mask]
+
+
+def as_of(archive_dir, when, selected_cpv="All", organisation=None, max_open_days=DEFAULT_MAX_OPEN_DAYS):
+    """Archived tenders known to be open on a past date: published by then and not yet past their deadline.
+
+    Tenders without a published date cannot be placed and are left out; returns
+    ``(open_then, undated)`` where ``undated`` counts those with a deadline
+    within ``max_open_days`` after ``when``, which may also have been open.
+    """
+    when = pd.Timestamp(when)
+    buyers = buyer_key_variants(normalise_buyer(organisation)) if organisation else None
+    frames = []
+    undated = 0
+    for df in iter_archive(archive_dir, when, when + timedelta(days=max_open_days)):
+        mask = df["deadline"] >= when
+        if selected_cpv != "All":
+            mask &= df["cpv_pairs"].apply(lambda pairs: selected_cpv in list(pairs))
+        if buyers:
+            mask &= df["organisation"].map(normalise_buyer).isin(buyers)
+        undated += int((mask & df["published"].isna()).sum())
+        frames.append(df[mask & (df["published"] <= when)])
+    if not frames:
+        return pd.DataFrame(columns=ARCHIVE_COLUMNS), undated
+    return pd.concat(frames, ignore_index=True).sort_values("deadline", ignore_index=True), undated
+
+
+def trends(archive_dir, start=None, end=None, by="cpv", top=10):
+    """Monthly archived tender counts for the ``top`` CPV pairs or buyers in a deadline range.
+
+    Counts are aggregated partition by partition. Returns a long frame with
+    Month, label ("CPV" or "Buyer") and "Tender Count" columns.
+    """
+    label = "CPV" if by == "cpv" else "Buyer"
+    counts = Counter()
+    names = defaultdict(Counter)
+    columns = ["cpv_pairs"] if by == "cpv" else ["organisation"]
+    for df in iter_archive(archive_dir, start, end, columns=columns):
+        months = df["deadline"].dt.strftime("%Y-%m")
+        if by == "cpv":
+            labels = pd.DataFrame({"month": months, "label": df["cpv_pairs"].map(list)}).explode("label").dropna()
+        else:
+            keys = df["organisation"].map(normalise_buyer)
+            for key, name in zip(keys, df["organisation"]):
+                names[key][" ".join(str(name).split())] += 1
+            labels = pd.DataFrame({"month": months, "label": keys})
+        counts.update(labels.groupby(["month", "label"]).size().to_dict())
+
+    if by != "cpv":
+        # Ambiguous abbreviations ("Leeds CC") join the one spelled-out variant seen in the range
+        aliases = resolve_buyer_keys(names)
+        if aliases:
+            merged = Counter()
+            for (month, key), count in counts.items():
+                merged[month, aliases.get(key, key)] += count
+            counts = merged
+            for key, alias in aliases.items():
+                names[alias].update(names.pop(key))
+
+    totals = Counter()
+    for (_, key), count in counts.items():
+        totals[key] += count
+    keep = {key for key, _ in totals.most_common(top)}
+    rows = [
+        (month, names[key].most_common(1)[0][0] if names[key] else key, count)
+        for (month, key), count in sorted(counts.items())
+        if key in keep
+    ]
+    return pd.DataFrame(rows, columns=["Month", label, "Tender Count"])
+
+
+# Expired tenders buffered per archive write during a backfill or store sync
+BACKFILL_BATCH_ROWS = 50000
+
+
+def backfill(source, archive_dir=DEFAULT_ARCHIVE_DIR):
+    """Archive the expired tenders of a tender file, directory or glob (e.g. old scraper output)"""
+    from tender_data import iter_records
+
+    today = datetime.today()
+    archived = 0
+    batch = []
+    for record in iter_records(source):
+        if record.deadline < today:
+            batch.append(record.to_row())
+        if len(batch) >= BACKFILL_BATCH_ROWS:
+            archived += archive_rows(batch, archive_dir)
+            batch = []
+    return archived + archive_rows(batch, archive_dir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive expired tenders from old scraper output")
+    parser.add_argument("source", help="Tender file, directory of shards or glob pattern")
+    parser.add_argument("--archive-dir", default=os.environ.get("TENDER_ARCHIVE_DIR", DEFAULT_ARCHIVE_DIR))
+    args = parser.parse_args()
+
+    print(f"Archived {backfill(args.source, args.archive_dir)} expired tender into {args.archive_dir}")
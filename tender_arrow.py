@@ -0,0 +1,91 @@
+import glob
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+from datetime import date
+
+import pandas as pd
+
+from tender_data import load_and_process_data, source_signature
+
+try:
+    import fcntl
+except ImportError:  # Windows: replicas fall back to building independently
+    fcntl = None
+
+# Default directory for shared Arrow snapshots
+DEFAULT_SNAPSHOT_DIR = "output/snapshots"
+
+
+@contextmanager
+def _build_lock(snapshot_dir):
+    """Exclusive cross-process lock so only one replica builds each snapshot"""
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(snapshot_dir, ".build.lock"), "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def snapshot_path(snapshot_dir, source):
+    """Arrow file name for the current source contents (processed data also depends on the day)"""
+    key = repr((source_signature(source), date.today().isoformat()))
+    return os.path.join(snapshot_dir, f"snapshot-{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}.arrow")
+
+
+def write_arrow_snapshot(df, cpv_details, stats, path):
+    """Write the processed snapshot as an Arrow IPC file, published atomically"""
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[b"cpv_details"] = json.dumps(cpv_details).encode("utf-8")
+    metadata[b"stats"] = json.dumps(stats).encode("utf-8")
+    table = table.replace_schema_metadata(metadata)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def _arrow_types(arrow_type):
+    import pyarrow as pa
+
+    # Timestamps and floats are small and need numpy semantics (.dt, dropna, plotting)
+    if pa.types.is_timestamp(arrow_type) or pa.types.is_floating(arrow_type):
+        return None
+    return pd.ArrowDtype(arrow_type)
+
+
+def read_arrow_snapshot(path):
+    """Memory-map a snapshot read-only; string and list columns stay backed by the shared page cache"""
+    import pyarrow as pa
+
+    table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+    metadata = table.schema.metadata or {}
+    cpv_details = json.loads(metadata.get(b"cpv_details", b"[]"))
+    stats = json.loads(metadata.get(b"stats", b"{}"))
+    df = table.to_pandas(types_mapper=_arrow_types) if table.num_columns else pd.DataFrame()
+    # Calendar events are derived from the filtered rows instead of being copied per replica
+    return df, None, cpv_details, stats
+
+
+def load_shared_snapshot(source, snapshot_dir=DEFAULT_SNAPSHOT_DIR, build=load_and_process_data):
+    """Build the snapshot once per host and memory-map it in every replica"""
+    os.makedirs(snapshot_dir, exist_ok=True)
+    with _build_lock(snapshot_dir):
+        path = snapshot_path(snapshot_dir, source)
+        if not os.path.exists(path):
+            df, _, cpv_details, stats = build(source)
+            write_arrow_snapshot(df, cpv_details, stats, path)
+            # Replicas still mapping an older file keep it alive until they swap
+            for old_path in glob.glob(os.path.join(snapshot_dir, "snapshot-*.arrow")):
+                if old_path != path:
+                    os.remove(old_path)
+    return read_arrow_snapshot(path)
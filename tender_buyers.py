@@ -0,0 +1,249 @@
+import re
+import threading
+from bisect import insort
+from collections import Counter
+
+import pandas as pd
+
+# Abbreviations expanded before comparing buyer names
+BUYER_ABBREVIATIONS = {
+    "bc": "borough council",
+    "dc": "district council",
+    "mbc": "metropolitan borough council",
+    "univ": "university",
+    "dept": "department",
+    "govt": "government",
+}
+# Abbreviations with several expansions ("Leeds CC" is a city council, "Kent CC" a county council); they
+# are kept in the key and only merged with a spelled-out variant of the same name seen alongside them
+AMBIGUOUS_ABBREVIATIONS = {
+    "cc": ("city council", "county council"),
+}
+# Legal suffixes that do not distinguish buyers
+BUYER_SUFFIXES = ("limited", "ltd", "plc", "llp")
+
+_punctuation = re.compile(r"[^\w\s]")
+
+# Buyer ranking orders: key function over BuyerStats
+BUYER_SORT_KEYS = {
+    "Live tenders": lambda stats: (-stats.count, stats.key),
+    "Next deadline": lambda stats: (stats.next_deadline(), stats.key),
+    "Name": lambda stats: (stats.key,),
+}
+
+
+def normalise_buyer(name):
+    """Comparison key for an organisation name, so variants of one buyer merge.
+
+    "The Leeds B.C.", "LEEDS BOROUGH COUNCIL" and "Leeds Borough Council Ltd" all
+    map to "leeds borough council". Ambiguous abbreviations stay as they are
+    ("leeds cc"); see resolve_buyer_keys.
+    """
+    text = _punctuation.sub(" ", str(name).lower().replace("&", " and ").replace(".", ""))
+    words = [BUYER_ABBREVIATIONS.get(word, word) for word in text.split()]
+    if words and words[0] == "the":
+        words = words[1:]
+    while words and words[-1] in BUYER_SUFFIXES:
+        words = words[:-1]
+    return " ".join(words) or "unknown"
+
+
+def _expansions(key):
+    # Spelled-out forms of the first ambiguous abbreviation in a key
+    words = key.split()
+    for i, word in enumerate(words):
+        if word in AMBIGUOUS_ABBREVIATIONS:
+            return [" ".join(words[:i] + [expansion] + words[i + 1:]) for expansion in AMBIGUOUS_ABBREVIATIONS[word]]
+    return []
+
+
+def resolve_buyer_keys(keys):
+    """Aliases for keys with an ambiguous abbreviation: {"leeds cc": "leeds city council", ...}.
+
+    A key joins a spelled-out variant only when exactly one of its expansions
+    is among ``keys``; with none or several it keeps its own key.
+    """
+    keys = set(keys)
+    aliases = {}
+    for key in keys:
+        matches = [expansion for expansion in _expansions(key) if expansion in keys]
+        if len(matches) == 1:
+            aliases[key] = matches[0]
+    return aliases
+
+
+def buyer_key_variants(key):
+    """Keys that may name the same buyer as ``key``, including its ambiguous abbreviations"""
+    variants = {key, *_expansions(key)}
+    for abbreviation, expansions in AMBIGUOUS_ABBREVIATIONS.items():
+        for expansion in expansions:
+            if f" {expansion} " in f" {key} ":
+                variants.add(f" {key} ".replace(f" {expansion} ", f" {abbreviation} ", 1).strip())
+    return variants
+
+
+def buyer_entries(df):
+    """Per-tender buyer facts of a processed tender frame: {tender_id: (organisation, title, link, ...)}"""
+    if df.empty:
+        return {}
+    published = df["published"] if "published" in df.columns else pd.Series(pd.NaT, index=df.index)
+    return {
+        tender_id: (
+            str(organisation), str(title), str(link), pd.Timestamp(deadline), str(location),
+            tuple(sorted(set(cpv_pairs))), None if pd.isna(published_at) else pd.Timestamp(published_at),
+        )
+        for tender_id, organisation, title, link, deadline, location, cpv_pairs, published_at in zip(
+            df["tender_id"], df["organisation"], df["title"], df["link"], df["deadline"],
+            df["Contract location"], df["cpv_pairs"], published,
+        )
+    }
+
+
+class BuyerStats:
+    """Running aggregates of one buyer's live tenders"""
+
+    __slots__ = ("key", "names", "cpvs", "locations", "months", "deadlines")
+
+    def __init__(self, key):
+        self.key = key
+        self.names = Counter()
+        self.cpvs = Counter()
+        self.locations = Counter()
+        # Publication month ("YYYY-MM") -> tender count
+        self.months = Counter()
+        # Sorted (deadline, tender_id) pairs
+        self.deadlines = []
+
+    @property
+    def count(self):
+        return len(self.deadlines)
+
+    @property
+    def name(self):
+        """Most common spelling among the merged variants"""
+        return self.names.most_common(1)[0][0] if self.names else self.key
+
+    def next_deadline(self):
+        return self.deadlines[0][0] if self.deadlines else pd.Timestamp.max
+
+
+class BuyerAggregates:
+    """Per-buyer aggregates of live tenders, updated incrementally on every snapshot.
+
+    ``sync`` diffs the current tenders against those already counted and only
+    adds or subtracts the new, changed and removed ones. The ranking is sorted
+    once per change, so page views only slice it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # tender_id -> buyer entry it was counted with, and the buyer key it was counted under
+        self._tenders = {}
+        self._keys = {}
+        self._buyers = {}
+        self._rankings = {}
+
+    def __len__(self):
+        return len(self._buyers)
+
+    def _apply(self, tender_id, entry, key, sign):
+        organisation, _, _, deadline, location, cpv_pairs, published = entry
+        stats = self._buyers.get(key)
+        if stats is None:
+            stats = self._buyers[key] = BuyerStats(key)
+
+        changes = [(stats.names, " ".join(organisation.split())), (stats.locations, location)]
+        changes += [(stats.cpvs, pair) for pair in cpv_pairs]
+        if published is not None:
+            changes.append((stats.months, published.strftime("%Y-%m")))
+        for counter, value in changes:
+            counter[value] += sign
+            if counter[value] <= 0:
+                del counter[value]
+
+        if sign > 0:
+            insort(stats.deadlines, (deadline, tender_id))
+        else:
+            stats.deadlines.remove((deadline, tender_id))
+            if not stats.deadlines:
+                del self._buyers[key]
+
+    def sync(self, current):
+        """Bring the aggregates in line with ``current`` (from buyer_entries); returns (added, removed) tenders"""
+        added = removed = 0
+        normalised = {}
+        for entry in current.values():
+            if entry[0] not in normalised:
+                normalised[entry[0]] = normalise_buyer(entry[0])
+        # "Leeds CC" is counted under "leeds city council" while that is the only expansion among the live buyers
+        aliases = resolve_buyer_keys(normalised.values())
+        with self._lock:
+            for tender_id in self._tenders.keys() - current.keys():
+                self._apply(tender_id, self._tenders.pop(tender_id), self._keys.pop(tender_id), -1)
+                removed += 1
+            for tender_id, entry in current.items():
+                key = normalised[entry[0]]
+                key = aliases.get(key, key)
+                previous = self._tenders.get(tender_id)
+                if previous == entry and self._keys[tender_id] == key:
+                    continue
+                if previous is not None:
+                    self._apply(tender_id, previous, self._keys[tender_id], -1)
+                    removed += 1
+                self._apply(tender_id, entry, key, 1)
+                self._tenders[tender_id] = entry
+                self._keys[tender_id] = key
+                added += 1
+            if added or removed:
+                self._rankings = {}
+        return added, removed
+
+    def ranking(self, sort_by="Live tenders"):
+        """Buyers in ``BUYER_SORT_KEYS`` order; sorted once per data change"""
+        with self._lock:
+            ranking = self._rankings.get(sort_by)
+            if ranking is None:
+                ranking = self._rankings[sort_by] = sorted(self._buyers.values(), key=BUYER_SORT_KEYS[sort_by])
+        return ranking
+
+    def ranking_frame(self, sort_by="Live tenders", query="", limit=50):
+        """Ranked buyer summary rows, optionally filtered by a name substring"""
+        needle = normalise_buyer(query) if query.strip() else ""
+        rows = []
+        for stats in self.ranking(sort_by):
+            if needle and needle not in stats.key:
+                continue
+            rows.append({
+                "key": stats.key,
+                "Buyer": stats.name,
+                "Live tenders": stats.count,
+                "Next deadline": stats.next_deadline(),
+                "Top CPV": stats.cpvs.most_common(1)[0][0] if stats.cpvs else "N/A",
+                "Locations": len(stats.locations),
+                "Name variants": len(stats.names),
+            })
+            if len(rows) >= limit:
+                break
+        return pd.DataFrame(rows, columns=[
+            "key", "Buyer", "Live tenders", "Next deadline", "Top CPV", "Locations", "Name variants",
+        ])
+
+    def buyer(self, key):
+        """Drill-down for one buyer: summary stats plus its upcoming tenders, or None"""
+        with self._lock:
+            stats = self._buyers.get(key)
+            if stats is None:
+                return None
+            upcoming = [
+                {"title": self._tenders[tender_id][1], "link": self._tenders[tender_id][2], "deadline": deadline}
+                for deadline, tender_id in stats.deadlines
+            ]
+            return {
+                "name": stats.name,
+                "count": stats.count,
+                "names": dict(stats.names),
+                "cpvs": stats.cpvs.most_common(),
+                "locations": stats.locations.most_common(),
+                "months": sorted(stats.months.items()),
+                "upcoming": upcoming,
+            }
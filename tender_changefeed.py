@@ -0,0 +1,145 @@
+import json
+import os
+import threading
+from bisect import bisect_right
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: processes sharing a feed are not coordinated
+    fcntl = None
+
+# Append-only log of tender changes between successive scraper outputs
+DEFAULT_CHANGEFEED_FILE = "output/changefeed.jsonl"
+
+CHANGE_KINDS = ("new", "changed", "removed")
+
+# Content hash schemes: raw scraper records (in-memory loader) and decoded records (SQLite store)
+RAW_HASH_SCHEME = "raw"
+STORE_HASH_SCHEME = "store"
+
+
+class ChangeFeed:
+    """Persisted changefeed (new, changed, removed) keyed by per-tender content hashes.
+
+    The last seen ``{tender_id: [hash, title]}`` map is kept in a state file next
+    to the feed so restarts diff against the previous snapshot rather than
+    reporting every tender as new. Several processes (dashboard replicas, the
+    API) may share one feed: each ``apply`` re-reads the state under a file
+    lock, so a change is reported once. Each hash scheme has its own state
+    file, since content hashes from different schemes never compare equal.
+    """
+
+    def __init__(self, path=DEFAULT_CHANGEFEED_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        # Entry timestamps per change kind, tail-read from the feed file
+        self._times = {kind: [] for kind in CHANGE_KINDS}
+        self._offset = 0
+
+    def state_path(self, scheme=RAW_HASH_SCHEME):
+        """State file for one hash scheme; the raw scheme keeps the original file name"""
+        suffix = "_state.json" if scheme == RAW_HASH_SCHEME else f"_{scheme}_state.json"
+        return os.path.splitext(self.path)[0] + suffix
+
+    @contextmanager
+    def _file_lock(self):
+        # Serialises read-diff-append-save across processes sharing the feed
+        if fcntl is None:
+            yield
+            return
+        with open(f"{self.path}.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load_state(self, scheme):
+        try:
+            with open(self.state_path(scheme), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_state(self, state, scheme):
+        state_path = self.state_path(scheme)
+        tmp_path = f"{state_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, state_path)
+
+    @staticmethod
+    def diff(current, previous):
+        """Split ``{tender_id: (hash, title)}`` against the previous state into change lists"""
+        changes = {kind: [] for kind in CHANGE_KINDS}
+        for tender_id, (content_hash, title) in current.items():
+            previous_entry = previous.get(tender_id)
+            if previous_entry is None:
+                changes["new"].append((tender_id, title))
+            elif previous_entry[0] != content_hash:
+                changes["changed"].append((tender_id, title))
+        for tender_id in previous.keys() - current.keys():
+            changes["removed"].append((tender_id, previous[tender_id][1]))
+        return changes
+
+    def apply(self, current, scheme=RAW_HASH_SCHEME):
+        """Record the changes since the previous snapshot and return them.
+
+        ``scheme`` names how the hashes in ``current`` were computed. The first
+        snapshot ever seen for a scheme only establishes the baseline.
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._lock, self._file_lock():
+            # Always re-read: another process may have applied a snapshot since our last call
+            previous = self._load_state(scheme)
+            changes = {kind: [] for kind in CHANGE_KINDS} if previous is None else self.diff(current, previous)
+            timestamp = datetime.now().isoformat(timespec="seconds")
+
+            with open(self.path, "a", encoding="utf-8") as f:
+                for kind in CHANGE_KINDS:
+                    for tender_id, title in changes[kind]:
+                        f.write(json.dumps({"ts": timestamp, "change": kind, "tender_id": tender_id, "title": title}) + "\n")
+
+            self._save_state(
+                {tender_id: [content_hash, title] for tender_id, (content_hash, title) in current.items()}, scheme
+            )
+            return changes
+
+    def _refresh(self):
+        # Consume only complete lines appended since the last read
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                data = f.read()
+        except OSError:
+            return
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            self._times.setdefault(entry.get("change"), []).append(entry.get("ts", ""))
+        self._offset += end
+
+    def count_since(self, since, change="new"):
+        """Number of changefeed entries of one kind recorded after an ISO timestamp"""
+        with self._lock:
+            self._refresh()
+            times = self._times.get(change, [])
+            return len(times) - bisect_right(times, since)
+
+
+_changefeeds = {}
+
+
+def get_changefeed(path=DEFAULT_CHANGEFEED_FILE):
+    """Shared ChangeFeed instance per feed file within this process"""
+    if path not in _changefeeds:
+        _changefeeds[path] = ChangeFeed(path)
+    return _changefeeds[path]
@@ -0,0 +1,84 @@
+import threading
+from collections import Counter, defaultdict
+from itertools import combinations
+
+# Related CPV codes suggested for the selected one
+DEFAULT_RELATED_LIMIT = 5
+# Codes tagged together fewer times than this are too noisy to suggest
+MIN_COOCCURRENCE = 2
+
+
+class CpvCooccurrence:
+    """Sparse CPV co-occurrence counts over live tenders, updated incrementally.
+
+    Only co-occurring pairs are stored (one count per unordered pair plus an
+    adjacency set per code). ``sync`` applies the difference between the
+    tenders already counted and the current ones, so a refresh only touches
+    new, changed and removed tenders.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # tender_id -> CPV pairs it was counted with
+        self._tenders = {}
+        self.code_counts = Counter()
+        self.pair_counts = Counter()
+        self._related = defaultdict(set)
+
+    def __len__(self):
+        return len(self._tenders)
+
+    def _apply(self, pairs, sign):
+        for code in pairs:
+            self.code_counts[code] += sign
+            if not self.code_counts[code]:
+                del self.code_counts[code]
+        for first, second in combinations(pairs, 2):
+            key = (first, second)
+            self.pair_counts[key] += sign
+            if self.pair_counts[key]:
+                self._related[first].add(second)
+                self._related[second].add(first)
+            else:
+                del self.pair_counts[key]
+                self._related[first].discard(second)
+                self._related[second].discard(first)
+
+    def sync(self, current):
+        """Bring the counts in line with ``current`` ({tender_id: CPV pairs}); returns (added, removed) tenders"""
+        added = removed = 0
+        with self._lock:
+            for tender_id in self._tenders.keys() - current.keys():
+                self._apply(self._tenders.pop(tender_id), -1)
+                removed += 1
+            for tender_id, pairs in current.items():
+                # Sorted, de-duplicated pairs keep each unordered pair under one key
+                pairs = tuple(sorted(set(pairs)))
+                previous = self._tenders.get(tender_id)
+                if previous == pairs:
+                    continue
+                if previous is not None:
+                    self._apply(previous, -1)
+                    removed += 1
+                self._apply(pairs, 1)
+                self._tenders[tender_id] = pairs
+                added += 1
+        return added, removed
+
+    def related(self, code, limit=DEFAULT_RELATED_LIMIT, min_count=MIN_COOCCURRENCE):
+        """CPV pairs tagged together with ``code`` more often than chance, ranked by lift.
+
+        Returns ``[(pair, together, lift), ...]``; lift above 1 means a positive association.
+        """
+        with self._lock:
+            total = len(self._tenders)
+            code_count = self.code_counts.get(code, 0)
+            results = []
+            for other in self._related.get(code, ()):
+                together = self.pair_counts[(code, other) if code < other else (other, code)]
+                if together >= min_count:
+                    lift = together * total / (code_count * self.code_counts[other])
+                    if lift > 1:
+                        results.append((other, together, lift))
+        results.sort(key=lambda result: (-result[2], -result[1], result[0]))
+        return results[:limit]
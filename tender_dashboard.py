@@ -1,10 +1,12 @@
 import streamlit as st
 import pandas as pd
-import json
 from datetime import datetime, timedelta
 import plotly.express as px
 import plotly.graph_objects as go
 
+from tender_data import DEFAULT_JSON_FILE, load_and_process_data
+from tender_snapshot import SnapshotWatcher
+
 # Set up Streamlit page
 st.set_page_config(page_title="Tender Dashboard", layout="wide")
 st.title("📅 Tender Submission Dashboard")
@@ -16,109 +18,7 @@ if 'selected_date' not in st.session_state:
     st.session_state.selected_date = datetime.today().date()
 
 # Load JSON data
-json_file = "output/tender_opportunities.json"
-
-# Location mapping (latitude and longitude for UK regions)
-uk_location_mapping = {
-    "UKH1 - East Anglia": (52.2000, 0.1313),
-    "UKG21 - Telford and Wrekin": (52.6784, -2.4469),
-    "UK - United Kingdom": (55.3781, -3.4360),
-    "UKC1 - Tees Valley and Durham": (54.5700, -1.3200),
-    "UKC2 - Northumberland and Tyne and Wear": (54.9700, -1.6100),
-    "UKD1 - Cumbria": (54.4600, -2.7400),
-    "UKD3 - Greater Manchester": (53.4808, -2.2426),
-    "UKD6 - Cheshire": (53.2000, -2.5200),
-    "UKE1 - East Yorkshire and Northern Lincolnshire": (53.7600, -0.3300),
-    "UKE4 - West Yorkshire": (53.8000, -1.5500),
-    "UKF1 - Derbyshire and Nottinghamshire": (53.1000, -1.5500),
-    "UKF2 - Leicestershire, Rutland and Northamptonshire": (52.6369, -1.1398),
-    "UKG1 - Herefordshire, Worcestershire and Warwickshire": (52.1900, -2.2200),
-    "UKH2 - Bedfordshire and Hertfordshire": (51.7500, -0.4100),
-    "UKH3 - Essex": (51.7340, 0.4700),
-    "UKI3 - Inner London": (51.5074, -0.1278),
-    "UKJ1 - Berkshire, Buckinghamshire and Oxfordshire": (51.7500, -1.2500),
-    "UKJ2 - Surrey, East and West Sussex": (51.0500, -0.3200),
-    "UKJ3 - Hampshire and Isle of Wight": (50.9000, -1.4000),
-    "UKK1 - Gloucestershire, Wiltshire and Bath/Bristol area": (51.4500, -2.5800),
-    "UKK4 - Devon": (50.7100, -3.5300),
-    "UKL1 - West Wales and The Valleys": (51.7700, -3.7800),
-    "UKL2 - East Wales": (52.3200, -3.8600),
-    "UKM6 - Highlands and Islands": (57.4800, -5.0700),
-    "UKN0 - Northern Ireland": (54.7877, -6.4923),
-}
-
-def load_and_process_data():
-    """Load and process tender data"""
-    try:
-        with open(json_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        
-        tenders = data.get("tenders", [])
-        today = datetime.today()
-        
-        # Prepare data
-        deadline_list = []
-        events = []
-        all_cpv_details = set()
-        
-        for tender in tenders:
-            details = tender.get("details", {})
-            deadline_raw = details.get("Submission deadline")
-            contract_location = details.get("Contract location", "Unknown")
-            
-            try:
-                deadline_dt = pd.to_datetime(deadline_raw, dayfirst=True, errors="coerce")
-            except:
-                deadline_dt = None
-            
-            if deadline_dt and deadline_dt >= pd.Timestamp(today):
-                location_coords = uk_location_mapping.get(contract_location)
-                cpv_codes = tender.get("cpv_codes", [])
-                cpv_descriptions = tender.get("cpv_descriptions", [])
-                
-                # Combine CPV codes and descriptions
-                combined_cpv = ", ".join([f"{code} - {desc}" for code, desc in zip(cpv_codes, cpv_descriptions)])
-                
-                # Add individual CPV code-description pairs to the set
-                cpv_pairs = [f"{code} - {desc}" for code, desc in zip(cpv_codes, cpv_descriptions)]
-                all_cpv_details.update(cpv_pairs)
-                
-                tender_data = {
-                    "title": tender.get("title", "Untitled"),
-                    "deadline": deadline_dt,
-                    "organisation": tender.get("organisation", "Unknown"),
-                    "cpv": combined_cpv,
-                    "individual_cpvs": cpv_codes,
-                    "cpv_pairs": cpv_pairs,
-                    "link": tender.get("link", "#"),
-                    "Contract location": contract_location,
-                    "latitude": location_coords[0] if location_coords else None,
-                    "longitude": location_coords[1] if location_coords else None
-                }
-                
-                deadline_list.append(tender_data)
-                
-                # Create events for calendar - ENSURE ALL VALUES ARE JSON SERIALIZABLE
-                events.append({
-                    "title": str(tender.get("title", "Untitled")),
-                    "start": deadline_dt.strftime('%Y-%m-%d'),
-                    "end": deadline_dt.strftime('%Y-%m-%d'),
-                    "url": str(tender.get("link", "#")),
-                    "backgroundColor": "#e74c3c" if deadline_dt <= pd.Timestamp(today + timedelta(days=7)) else "#3498db",
-                    "borderColor": "#c0392b" if deadline_dt <= pd.Timestamp(today + timedelta(days=7)) else "#2980b9",
-                    "extendedProps": {
-                        "organisation": str(tender.get("organisation", "Unknown")),
-                        "contract_location": str(contract_location),
-                        "cpv_pairs": [str(pair) for pair in cpv_pairs],
-                        "deadline_str": deadline_dt.strftime('%d %b %Y')
-                    }
-                })
-        
-        return pd.DataFrame(deadline_list), events, sorted(all_cpv_details)
-    
-    except Exception as e:
-        st.error(f"❌ Error loading or processing file: {e}")
-        return pd.DataFrame(), [], []
+json_file = DEFAULT_JSON_FILE
 
 def apply_filters(df, events, selected_cpv, selected_date):
     """Apply filters to both dataframe and events"""
@@ -270,8 +170,22 @@ def create_styled_table(df):
     
     return final_df
 
+@st.cache_resource
+def get_snapshot_watcher():
+    """Rebuild the processed data in the background instead of on every rerun.
+
+    Uses the shared loader in tender_data, so quarantine, dedup and the changefeed match Dashboard.py.
+    """
+    watcher = SnapshotWatcher(json_file, load_and_process_data)
+    watcher.start()
+    return watcher
+
 # Load data
-df_deadlines, events, sorted_cpv_details = load_and_process_data()
+watcher = get_snapshot_watcher()
+snapshot = watcher.current()
+if watcher.last_error is not None:
+    st.error(f"❌ Error loading or processing file: {watcher.last_error}")
+df_deadlines, events, sorted_cpv_details = snapshot.df, snapshot.events, snapshot.cpv_details
 
 if df_deadlines.empty:
     st.warning("No tender data available.")
@@ -433,7 +347,7 @@ with left:
                     "title": str(event["title"]),
                     "start": str(event["start"]),
                     "end": str(event["end"]),
-                    "url": str(event["url"]),
+                    "url": str(event["extendedProps"].get("tender_link") or "#"),
                     "backgroundColor": str(event.get("backgroundColor", "#3498db")),
                     "borderColor": str(event.get("borderColor", "#2980b9"))
                 }
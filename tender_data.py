@@ -0,0 +1,748 @@
+import glob
+import gzip
+import hashlib
+import io
+import json
+import lzma
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from itertools import chain
+
+import pandas as pd
+
+from tender_archive import archive_rows
+from tender_changefeed import DEFAULT_CHANGEFEED_FILE, get_changefeed
+from tender_dedup import deduplicate
+from tender_geo import resolve_locations
+from tender_log import (
+    COMPACT_RATIO, MIN_COMPACT_LINES, NDJSON_SUFFIX, LogReader, compact_log, is_tender_log, log_checkpoint_valid,
+)
+
+# Default scraper output: a single file, a directory of shards or a glob pattern
+DEFAULT_JSON_FILE = "output/tender_opportunities.json"
+
+# Upper bound on ingest worker processes (0 = one per CPU core)
+MAX_INGEST_WORKERS = int(os.environ.get("TENDER_INGEST_WORKERS", "0"))
+
+# Supported tender file suffixes; compressed files are decompressed while parsing
+# and NDJSON tender logs are followed from a byte-offset checkpoint
+TENDER_FILE_SUFFIXES = (".json", ".json.gz", ".json.zst", ".json.xz", NDJSON_SUFFIX)
+
+# Characters read from the input per streaming parser refill
+STREAM_CHUNK_SIZE = 1 << 16
+
+# Malformed records are written here instead of being dropped silently
+DEFAULT_QUARANTINE_FILE = "output/quarantined_tenders.jsonl"
+
+# Known "Submission deadline" formats, tried in order before falling back to pandas
+DEADLINE_FORMATS = [
+    "%d %B %Y, %I:%M%p",
+    "%d %B %Y, %I%p",
+    "%d %B %Y",
+    "%d/%m/%Y %H:%M",
+    "%d/%m/%Y",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%d",
+]
+_deadline_format = DEADLINE_FORMATS[0]
+
+# Collapse the same opportunity published on several portals (TENDER_DEDUPE=0 to disable)
+DEDUPE_TENDERS = os.environ.get("TENDER_DEDUPE", "1") != "0"
+
+# Marks tenders whose content hash is unchanged; their previous processed row is reused
+UNCHANGED = "unchanged"
+
+# Columns of the processed tender DataFrame
+TENDER_COLUMNS = [
+    "title",
+    "deadline",
+    "organisation",
+    "cpv",
+    "individual_cpvs",
+    "cpv_pairs",
+    "link",
+    "Contract location",
+    "latitude",
+    "longitude",
+    "tender_id",
+    "published",
+    "details",
+]
+
+# "details" fields decoded at ingest; the rest are kept as raw JSON text and typed on demand (tender_details)
+EXTRACTED_DETAILS = ("Submission deadline", "Contract location")
+
+# Processed form of each shard keyed by path: (fingerprint, result)
+_shard_cache = {}
+
+def file_signature(path):
+    """Cheap change signature (mtime, size) for one file, or None if missing"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def resolve_shards(source):
+    """Expand a file, directory or glob pattern into a sorted list of shard files"""
+    if os.path.isdir(source):
+        return sorted(
+            path
+            for suffix in TENDER_FILE_SUFFIXES
+            for path in glob.glob(os.path.join(source, "*" + suffix))
+        )
+    if glob.has_magic(source):
+        return sorted(path for path in glob.glob(source) if os.path.isfile(path))
+    return [source]
+
+
+def source_signature(source):
+    """Combined signature over every shard of a source, or None if nothing exists yet"""
+    signatures = tuple((path, file_signature(path)) for path in resolve_shards(source))
+    if not signatures or all(signature is None for _, signature in signatures):
+        return None
+    return signatures
+
+
+def open_tender_file(path):
+    """Open a plain or compressed tender file as a streaming text reader"""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    if path.endswith(".xz"):
+        return lzma.open(path, "rt", encoding="utf-8")
+    if path.endswith(".zst"):
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError(f"Reading '{path}' requires zstandard. Install with: pip install zstandard")
+        raw = open(path, "rb")
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(raw, closefd=True), encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+class JsonStreamReader:
+    """Minimal incremental JSON tokenizer over a text stream.
+
+    Only the structural characters of the enclosing document are handled here;
+    each complete value is decoded by ``json.JSONDecoder.raw_decode`` from a
+    buffer that holds roughly one chunk plus the value being decoded.
+    """
+
+    _whitespace = re.compile(r"\s*")
+    # What may still follow a decoded number or literal if the chunk cut it short ("1." or "1e")
+    _scalar_tail = re.compile(r"[\s0-9.eE+\-]*")
+    _decoder = json.JSONDecoder()
+
+    def __init__(self, stream, chunk_size=STREAM_CHUNK_SIZE):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        if self.eof:
+            return False
+        # Grow reads with the pending value so a large value is not re-scanned quadratically
+        chunk = self.stream.read(max(self.chunk_size, len(self.buffer) - self.pos))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _skip_whitespace(self):
+        while True:
+            self.pos = self._whitespace.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer) or not self._fill():
+                return
+
+    def peek(self):
+        self._skip_whitespace()
+        if self.pos >= len(self.buffer):
+            raise ValueError("Unexpected end of JSON input")
+        return self.buffer[self.pos]
+
+    def next_char(self):
+        char = self.peek()
+        self.pos += 1
+        return char
+
+    def expect(self, expected):
+        char = self.next_char()
+        if char != expected:
+            raise ValueError(f"Expected '{expected}' in JSON input but found '{char}'")
+
+    def decode_value(self):
+        self._skip_whitespace()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A scalar followed only by the buffer tail may continue in the next chunk; strings
+            # and containers fail to decode until they are complete
+            scalar = self.buffer[self.pos] not in '"[{'
+            if scalar and self._scalar_tail.match(self.buffer, end).end() == len(self.buffer) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def next_separator(self, closing):
+        """Consume the "," or closing bracket after a value; True when the container ends"""
+        char = self.next_char()
+        if char == closing:
+            return True
+        if char != ",":
+            raise ValueError(f"Expected ',' or '{closing}' in JSON input but found '{char}'")
+        return False
+
+
+def iter_tenders(stream, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield raw tenders from the top-level "tenders" array one at a time"""
+    reader = JsonStreamReader(stream, chunk_size)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+
+    while True:
+        key = reader.decode_value()
+        reader.expect(":")
+        if key == "tenders":
+            reader.expect("[")
+            if reader.peek() == "]":
+                reader.next_char()
+            else:
+                while True:
+                    yield reader.decode_value()
+                    if reader.next_separator("]"):
+                        break
+        else:
+            # Scrape metadata is small; decode and discard it
+            reader.decode_value()
+
+        if reader.next_separator("}"):
+            return
+
+
+class MalformedTender(ValueError):
+    """Raised when a raw tender does not match the declared record schema"""
+
+
+class MissingDeadline(MalformedTender):
+    """Raised for a tender without a submission deadline; skipped rather than quarantined, as before"""
+
+
+class TenderRecord:
+    """Compact decoded tender with a declared schema"""
+
+    __slots__ = (
+        "title", "link", "organisation", "deadline", "location", "cpv_codes", "cpv_pairs", "combined_cpv", "tender_id",
+        "published", "details",
+    )
+
+    def __init__(
+        self, title, link, organisation, deadline, location, cpv_codes, cpv_pairs, tender_id=None, published=None,
+        details="{}",
+    ):
+        self.tender_id = tender_id
+        self.published = published
+        self.details = details
+        self.title = title
+        self.link = link
+        self.organisation = organisation
+        self.deadline = deadline
+        self.location = location
+        self.cpv_codes = cpv_codes
+        self.cpv_pairs = cpv_pairs
+        self.combined_cpv = ", ".join(cpv_pairs)
+
+    def to_row(self):
+        """Column values in TENDER_COLUMNS order; coordinates are resolved in bulk by merge_shards"""
+        return (
+            self.title,
+            self.deadline,
+            self.organisation,
+            self.combined_cpv,
+            self.cpv_codes,
+            self.cpv_pairs,
+            self.link,  # Keep original link
+            self.location,
+            None,
+            None,
+            self.tender_id,
+            self.published,
+            self.details,
+        )
+
+    def to_event(self, urgent_before):
+        """Calendar event for this tender"""
+        deadline_day = self.deadline.strftime('%Y-%m-%d')
+        is_urgent = self.deadline <= urgent_before
+        return {
+            "title": self.title[:80] + "..." if len(self.title) > 80 else self.title,
+            "start": deadline_day,
+            "end": deadline_day,
+            "backgroundColor": "#e74c3c" if is_urgent else "#3498db",
+            "borderColor": "#c0392b" if is_urgent else "#2980b9",
+            "extendedProps": {
+                "organisation": self.organisation,
+                "contract_location": self.location,
+                "cpv_pairs": self.cpv_pairs,
+                "deadline_str": self.deadline.strftime('%d %b %Y'),
+                "tender_link": self.link,
+                "tender_id": self.tender_id,
+                "full_title": self.title,
+                "cpv_codes": self.combined_cpv
+            }
+        }
+
+
+def raw_tender_id(raw):
+    """Stable tender id: the link when present, otherwise a hash of the identifying fields"""
+    link = raw.get("link")
+    if isinstance(link, str) and link:
+        return link
+    details = raw.get("details")
+    deadline_raw = details.get("Submission deadline") if isinstance(details, dict) else None
+    identity = json.dumps([raw.get("title"), raw.get("organisation"), deadline_raw], default=str)
+    return "sha1:" + hashlib.sha1(identity.encode("utf-8")).hexdigest()
+
+
+def raw_tender_hash(raw):
+    """Content hash of a raw tender, used to skip unchanged records between scraper runs"""
+    content = json.dumps(raw, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+def parse_deadline(value):
+    """Parse a day-first deadline string, trying known scraper formats before pandas"""
+    global _deadline_format
+    try:
+        return pd.Timestamp(datetime.strptime(value, _deadline_format))
+    except ValueError:
+        pass
+
+    for fmt in DEADLINE_FORMATS:
+        try:
+            parsed = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        # Most files use a single format, so remember the last one that worked
+        _deadline_format = fmt
+        return pd.Timestamp(parsed)
+
+    parsed = pd.to_datetime(value, dayfirst=True, errors="coerce")
+    if pd.isna(parsed):
+        return None
+    return parsed.tz_convert(None) if parsed.tzinfo is not None else parsed
+
+
+def parse_published(value):
+    """Parse an optional "Published date"; unknown formats give None rather than quarantining the tender"""
+    if not value or not isinstance(value, str):
+        return None
+    for fmt in DEADLINE_FORMATS:
+        try:
+            return pd.Timestamp(datetime.strptime(value, fmt))
+        except ValueError:
+            continue
+    return None
+
+
+def _text_field(raw, key, default):
+    value = raw.get(key)
+    if value is None:
+        return default
+    if not isinstance(value, str):
+        raise MalformedTender(f"'{key}' is {type(value).__name__}, expected text")
+    return value
+
+
+def decode_tender(raw):
+    """Decode one raw tender into a TenderRecord, raising MalformedTender on schema violations"""
+    if not isinstance(raw, dict):
+        raise MalformedTender(f"tender is {type(raw).__name__}, expected an object")
+
+    details = raw.get("details")
+    if details is None:
+        details = {}
+    elif not isinstance(details, dict):
+        raise MalformedTender(f"'details' is {type(details).__name__}, expected an object")
+
+    deadline_raw = details.get("Submission deadline")
+    if not deadline_raw:
+        raise MissingDeadline("missing submission deadline")
+    if not isinstance(deadline_raw, str):
+        raise MalformedTender(f"'Submission deadline' is {type(deadline_raw).__name__}, expected text")
+    deadline = parse_deadline(deadline_raw)
+    if deadline is None:
+        raise MalformedTender(f"unparseable submission deadline {deadline_raw!r}")
+
+    cpv_codes = raw.get("cpv_codes") or []
+    cpv_descriptions = raw.get("cpv_descriptions") or []
+    if not isinstance(cpv_codes, list) or not isinstance(cpv_descriptions, list):
+        raise MalformedTender("'cpv_codes' and 'cpv_descriptions' must be lists")
+
+    location = details.get("Contract location") or "Unknown"
+    if not isinstance(location, str):
+        raise MalformedTender(f"'Contract location' is {type(location).__name__}, expected text")
+
+    return TenderRecord(
+        title=_text_field(raw, "title", "Untitled"),
+        link=_text_field(raw, "link", ""),
+        organisation=_text_field(raw, "organisation", "Unknown"),
+        deadline=deadline,
+        location=location,
+        cpv_codes=[str(code) for code in cpv_codes],
+        cpv_pairs=[f"{code} - {desc}" for code, desc in zip(cpv_codes, cpv_descriptions)],
+        tender_id=raw_tender_id(raw),
+        published=parse_published(details.get("Published date")),
+        # Not parsed here, so ingest cost does not grow with the number of scraped fields
+        details=json.dumps(
+            {key: value for key, value in details.items() if key not in EXTRACTED_DETAILS}, ensure_ascii=False, default=str
+        ),
+    )
+
+
+def process_tenders(tenders, today, known_hashes=None):
+    """Decode new or amended raw tenders into rows keyed by tender id.
+
+    Returns ``{"tenders": {tender_id: (hash, title, row)}, "quarantined": [...], "expired": [...]}``
+    where ``row`` is ``(column values, calendar event)`` for live tenders, None for
+    expired ones, or UNCHANGED when the hash matches ``known_hashes`` and the
+    caller should reuse its previous row. ``expired`` holds the column values of
+    the expired tenders decoded in this pass. Records that do not match the schema
+    are quarantined with the reason instead of aborting the load; tenders without
+    a submission deadline are skipped, as the dashboard always did.
+    """
+    known_hashes = known_hashes or {}
+    entries = {}
+    quarantined = []
+    # Rows of decoded tenders whose deadline has passed, for the optional archive
+    expired = []
+    processed = 0
+    today = pd.Timestamp(today)
+    urgent_before = today + timedelta(days=7)
+
+    for raw in tenders:
+        if isinstance(raw, dict):
+            tender_id = raw_tender_id(raw)
+            content_hash = raw_tender_hash(raw)
+            if known_hashes.get(tender_id) == content_hash:
+                entries[tender_id] = (content_hash, None, UNCHANGED)
+                continue
+
+        try:
+            record = decode_tender(raw)
+        except MissingDeadline:
+            continue
+        except MalformedTender as e:
+            quarantined.append({"reason": str(e), "tender": raw})
+            continue
+        processed += 1
+
+        row = None
+        if record.deadline >= today:
+            # Create events for calendar
+            row = (record.to_row(), record.to_event(urgent_before))
+        else:
+            expired.append(record.to_row())
+        entries[record.tender_id] = (content_hash, record.title, row)
+
+    return {"tenders": entries, "quarantined": quarantined, "processed": processed, "expired": expired}
+
+
+def latest_log_versions(path):
+    """Raw tenders of a log with superseded versions dropped"""
+    latest = {}
+    for line, raw in enumerate(LogReader(path)):
+        latest[raw_tender_id(raw) if isinstance(raw, dict) else line] = raw
+    return latest.values()
+
+
+def iter_raw_tenders(path):
+    """Raw tenders of one shard; a tender log yields only the latest version of each tender"""
+    if is_tender_log(path):
+        yield from latest_log_versions(path)
+        return
+    with open_tender_file(path) as f:
+        yield from iter_tenders(f)
+
+
+def iter_records(source, quarantined=None):
+    """Stream decoded TenderRecords from every shard of a source, including expired ones"""
+    for path in resolve_shards(source):
+        for raw in iter_raw_tenders(path):
+            try:
+                yield decode_tender(raw)
+            except MissingDeadline:
+                continue
+            except MalformedTender as e:
+                if quarantined is not None:
+                    quarantined.append({"reason": str(e), "tender": raw})
+
+
+def build_events(df, today=None):
+    """Build calendar events from processed tender rows (e.g. query results)"""
+    if df.empty:
+        return []
+
+    urgent_before = pd.Timestamp(today or datetime.today()) + timedelta(days=7)
+    rows = zip(
+        df["title"], df["link"], df["organisation"], df["deadline"],
+        df["Contract location"], df["individual_cpvs"], df["cpv_pairs"], df["tender_id"],
+    )
+    events = [TenderRecord(*row).to_event(urgent_before) for row in rows]
+    if "sources" in df.columns:
+        # Deduplicated rows link every portal copy, as deduplicate does for snapshot events
+        for event, sources in zip(events, df["sources"]):
+            if sources is not None and len(sources) > 1:
+                event["extendedProps"]["sources"] = list(sources)
+    return events
+
+
+def filter_tenders(df, selected_cpv="All", date_from=None, date_to=None, location=None, text=None, within=None):
+    """Filter processed tender rows by CPV pair, deadline range, location and free text.
+
+    ``within`` is an optional boolean row mask, e.g. from a proximity query on the frame's GridIndex.
+    """
+    if df.empty:
+        return df
+    mask = pd.Series(True, index=df.index)
+    if within is not None:
+        mask &= within
+    if selected_cpv != "All":
+        mask &= df["cpv_pairs"].apply(lambda x: selected_cpv in x)
+    if date_from is not None:
+        mask &= df["deadline"] >= pd.Timestamp(date_from)
+    if date_to is not None:
+        # Inclusive of the whole end day
+        mask &= df["deadline"] < pd.Timestamp(date_to) + timedelta(days=1)
+    if location:
+        mask &= df["Contract location"].astype(str).str.lower() == location.lower()
+    if text:
+        pattern = text.lower()
+        mask &= (
+            df["title"].astype(str).str.lower().str.contains(pattern, regex=False)
+            | df["organisation"].astype(str).str.lower().str.contains(pattern, regex=False)
+        )
+    return df[mask]
+
+
+def write_quarantine(quarantined, path):
+    """Persist quarantined records as JSON lines for inspection, replacing the previous run"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for entry in quarantined:
+            f.write(json.dumps(entry, default=str) + "\n")
+
+
+def process_shard(path, today, known_hashes=None):
+    """Parse and normalise one shard file (runs in a worker process)"""
+    with open_tender_file(path) as f:
+        return process_tenders(iter_tenders(f), today, known_hashes)
+
+
+def process_shards(paths, today, known_hashes):
+    """Process shards in parallel, falling back to inline work for a single shard"""
+    if len(paths) <= 1:
+        return [process_shard(path, today, known) for path, known in zip(paths, known_hashes)]
+
+    workers = min(len(paths), MAX_INGEST_WORKERS or os.cpu_count() or 1)
+    # Spawned workers are safe to start from the watcher thread of a multithreaded server
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return list(pool.map(process_shard, paths, [today] * len(paths), known_hashes))
+
+
+def reuse_unchanged(result, previous):
+    """Fill UNCHANGED entries of a delta result from the shard's previous result"""
+    previous_entries = previous["tenders"] if previous else {}
+    entries = result["tenders"]
+    for tender_id, (content_hash, title, row) in entries.items():
+        if row == UNCHANGED:
+            entries[tender_id] = previous_entries[tender_id]
+    return result
+
+
+def process_log(path, today, previous=None):
+    """Process a tender log, parsing only the lines appended since ``previous`` was read.
+
+    ``previous`` is the log's result from an earlier call on the same day. Its
+    ``"log"`` checkpoint is resumed when the file is the same one (compaction
+    replaces it) and has not shrunk; otherwise the whole log is read. New lines
+    supersede earlier versions of the same tender.
+    """
+    checkpoint = previous["log"] if previous else None
+    if checkpoint is None or not log_checkpoint_valid(path, checkpoint["inode"], checkpoint["offset"]):
+        previous, checkpoint = None, {"offset": 0, "lines": 0}
+
+    reader = LogReader(path, checkpoint["offset"])
+    known_hashes = {tender_id: entry[0] for tender_id, entry in previous["tenders"].items()} if previous else None
+    result = reuse_unchanged(process_tenders(reader, today, known_hashes), previous)
+    if previous:
+        # Extended in place, so a refresh only touches the appended tenders
+        previous["tenders"].update(result["tenders"])
+        previous["quarantined"].extend(result["quarantined"])
+        result["tenders"], result["quarantined"] = previous["tenders"], previous["quarantined"]
+    result["log"] = {"inode": reader.inode, "offset": reader.offset, "lines": checkpoint["lines"] + reader.lines}
+    result["log_lines"] = reader.lines
+    return result
+
+
+def maybe_compact_log(path, result):
+    """Compact a log whose superseded versions outnumber its tenders by COMPACT_RATIO; returns lines dropped.
+
+    Only runs when TENDER_LOG_COMPACT_RATIO is set and every writer appends through append_tenders.
+    """
+    checkpoint = result["log"]
+    if not COMPACT_RATIO or checkpoint is None:
+        return 0
+    if checkpoint["lines"] < max(MIN_COMPACT_LINES, COMPACT_RATIO * len(result["tenders"])):
+        return 0
+    compacted = compact_log(path)
+    if compacted["read_offset"] == checkpoint["offset"]:
+        # Same content as already processed; keep following the rewritten file from its end
+        result["log"] = {"inode": compacted["inode"], "offset": compacted["offset"], "lines": compacted["kept"]}
+    else:
+        # Lines appended in between were compacted in; re-read the rewritten log next time
+        result["log"] = None
+    return compacted["lines"] - compacted["kept"]
+
+
+def removed_expired_rows(previous, current, today):
+    """Rows of tenders live in ``previous`` that are missing from ``current`` and whose deadline has passed.
+
+    Scrapers often drop a tender once it expires, so it is never seen with a past
+    deadline; these rows let it reach the archive anyway.
+    """
+    rows = []
+    for tender_id in previous.keys() - current.keys():
+        row = previous[tender_id][2]
+        if row is not None and row != UNCHANGED and row[0][1] < today:
+            rows.append(row[0])
+    return rows
+
+
+def merge_shards(results):
+    """Merge per-shard results into the DataFrame, events and sorted CPV list"""
+    rows = [
+        row
+        for result in results
+        for _, _, row in result["tenders"].values()
+        if row is not None
+    ]
+    events = [event for _, event in rows]
+    columns = dict(zip(TENDER_COLUMNS, map(list, zip(*(values for values, _ in rows))))) if rows else {}
+    all_cpv_details = set(chain.from_iterable(columns.get("cpv_pairs", [])))
+    quarantined = list(chain.from_iterable(result["quarantined"] for result in results))
+
+    df = pd.DataFrame(columns) if rows else pd.DataFrame()
+    if rows:
+        df["latitude"], df["longitude"] = resolve_locations(df["Contract location"])
+        df["published"] = pd.to_datetime(df["published"])
+    return df, events, sorted(all_cpv_details), quarantined
+
+
+def load_and_process_data(
+    source=DEFAULT_JSON_FILE, quarantine_file=DEFAULT_QUARANTINE_FILE, changefeed_file=DEFAULT_CHANGEFEED_FILE,
+    archive_dir=None,
+):
+    """Load and process tender data from a file, directory or glob of shard files.
+
+    Shards whose signature has not changed since the last call (on the same day)
+    are served from their cached processed form; the rest are processed in parallel,
+    decoding only tenders whose content hash changed. NDJSON tender logs are read
+    from their last byte-offset checkpoint. New, changed and removed
+    tenders are appended to the changefeed, and expired tenders (including live
+    ones the source dropped after their deadline) to the archive when
+    ``archive_dir`` is set.
+    Returns the DataFrame, calendar events, sorted CPV list and ingest stats.
+    """
+    today = datetime.today()
+    paths = resolve_shards(source)
+    if not paths:
+        raise FileNotFoundError(f"No tender files match '{source}'")
+
+    results = {}
+    changed = []
+    logs = []
+    # Tenders of the previous load (any day), to archive those the scraper dropped after they expired
+    last_tenders = {path: cached[1]["tenders"] for path, cached in _shard_cache.items()} if archive_dir else {}
+    for path in paths:
+        fingerprint = (file_signature(path), today.date())
+        cached = _shard_cache.get(path)
+        if cached is not None and cached[0] == fingerprint:
+            results[path] = cached[1]
+        else:
+            # Rows processed earlier today can be reused for tenders whose hash is unchanged
+            previous = cached[1] if cached is not None and cached[0][1] == today.date() else None
+            (logs if is_tender_log(path) else changed).append((path, fingerprint, previous))
+
+    known_hashes = [
+        {tender_id: entry[0] for tender_id, entry in previous["tenders"].items()} if previous else None
+        for _, _, previous in changed
+    ]
+    processed = 0
+    expired = []
+    for (path, fingerprint, previous), result in zip(
+        changed, process_shards([path for path, _, _ in changed], today, known_hashes)
+    ):
+        result = reuse_unchanged(result, previous)
+        processed += result["processed"]
+        # Not kept in the shard cache; archived rows are deduplicated by tender id
+        expired += result.pop("expired", [])
+        _shard_cache[path] = (fingerprint, result)
+        results[path] = result
+
+    # Tender logs are followed inline from their checkpoint, so refresh cost scales with appended lines
+    log_lines = compacted = 0
+    for path, fingerprint, previous in logs:
+        result = process_log(path, today, previous)
+        processed += result["processed"]
+        log_lines += result.pop("log_lines")
+        expired += result.pop("expired", [])
+        compacted += maybe_compact_log(path, result)
+        _shard_cache[path] = (fingerprint, result)
+        results[path] = result
+
+    for path, previous_tenders in last_tenders.items():
+        current_tenders = results[path]["tenders"] if path in results else {}
+        if current_tenders is not previous_tenders:
+            expired += removed_expired_rows(previous_tenders, current_tenders, today)
+
+    # Forget shards that have disappeared from the source
+    for path in set(_shard_cache) - set(paths):
+        del _shard_cache[path]
+
+    df, events, cpv_details, quarantined = merge_shards([results[path] for path in paths])
+    if quarantine_file:
+        write_quarantine(quarantined, quarantine_file)
+
+    duplicates = 0
+    if DEDUPE_TENDERS:
+        df, events, duplicates = deduplicate(df, events)
+
+    stats = {"tenders": len(df), "quarantined": len(quarantined), "processed": processed, "duplicates": duplicates}
+    if logs:
+        stats.update(log_lines=log_lines, compacted=compacted)
+    if archive_dir:
+        stats["archived"] = archive_rows(expired, archive_dir)
+    if changefeed_file:
+        current = {
+            tender_id: (content_hash, title)
+            for path in paths
+            for tender_id, (content_hash, title, _) in results[path]["tenders"].items()
+        }
+        changes = get_changefeed(changefeed_file).apply(current)
+        stats.update({kind: len(entries) for kind, entries in changes.items()})
+    return df, events, cpv_details, stats
@@ -0,0 +1,216 @@
+import re
+from collections import defaultdict
+from urllib.parse import urlsplit
+from zlib import crc32
+
+import numpy as np
+import pandas as pd
+
+# MinHash signature length, split into LSH bands of BAND_ROWS rows each
+NUM_PERMUTATIONS = 64
+BAND_ROWS = 4
+# Estimated Jaccard similarity above which two tenders are treated as the same opportunity
+SIMILARITY_THRESHOLD = 0.7
+# Buckets larger than this are only compared against their first member
+MAX_PAIRWISE_BUCKET = 50
+# Tenders hashed per vectorised MinHash batch (bounds temporary memory)
+BATCH_SIZE = 2000
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+_non_word = re.compile(r"[^a-z0-9]+")
+_digit = re.compile(r"\d")
+
+
+def normalise_text(text):
+    """Lowercase and strip punctuation so portal formatting differences disappear"""
+    return _non_word.sub(" ", str(text).lower()).strip()
+
+
+def source_host(link):
+    """Portal host of a tender link ("" when there is no usable link)"""
+    host = urlsplit(str(link or "")).hostname or ""
+    return host.removeprefix("www.")
+
+
+def distinguishing_tokens(title):
+    """Title tokens that tell sibling notices apart: numbers and the name after "lot".
+
+    "Lot 1 - Grounds maintenance" and "Lot 2 - Grounds maintenance" are
+    separate tenders however similar the rest of the title is.
+    """
+    words = normalise_text(title).split()
+    tokens = {word for word in words if _digit.search(word)}
+    tokens.update(following for word, following in zip(words, words[1:]) if word == "lot")
+    return frozenset(tokens)
+
+
+def shingle_hashes(titles, organisations):
+    """Hashed shingles for every tender, flattened: (hash values, shingles per tender).
+
+    Shingles are title words and word bigrams plus organisation word tokens.
+    """
+    values = []
+    lengths = []
+    organisation_tokens = {}
+    for title, organisation in zip(titles, organisations):
+        words = normalise_text(title).split()
+        grams = set(words)
+        grams.update(map(" ".join, zip(words, words[1:])))
+        if organisation not in organisation_tokens:
+            organisation_tokens[organisation] = ["org:" + token for token in normalise_text(organisation).split()]
+        grams.update(organisation_tokens[organisation])
+        if not grams:
+            grams.add("")
+        # CRC32 keeps signatures identical across processes and replicas
+        values.extend(crc32(gram.encode("utf-8")) for gram in grams)
+        lengths.append(len(grams))
+    return np.array(values, dtype=np.uint64), np.array(lengths, dtype=np.int64)
+
+
+def minhash_signatures(values, lengths, num_permutations=NUM_PERMUTATIONS, seed=1):
+    """MinHash signatures (n x num_permutations) computed in vectorised batches.
+
+    Hash values are bounded to 32 bits and so are the coefficients a and b, so
+    a*x + b <= (2**32 - 1)**2 + 2**32 - 1 < 2**64 never wraps in uint64 and the
+    result is exactly (a*x + b) mod p.
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 1 << 32, size=num_permutations, dtype=np.uint64)
+    b = rng.integers(0, 1 << 32, size=num_permutations, dtype=np.uint64)
+    values = np.asarray(values, dtype=np.uint64) & _MAX_HASH
+    signatures = np.empty((len(lengths), num_permutations), dtype=np.uint64)
+    ends = np.cumsum(lengths)
+
+    for start in range(0, len(lengths), BATCH_SIZE):
+        stop = min(start + BATCH_SIZE, len(lengths))
+        first = ends[start - 1] if start else 0
+        batch = values[first:ends[stop - 1]]
+        # Universal hashing (a*x + b) mod p, then the per-tender minimum via reduceat
+        hashed = ((np.outer(a, batch) + b[:, None]) % _MERSENNE_PRIME) & _MAX_HASH
+        offsets = np.concatenate(([0], ends[start:stop - 1] - first))
+        signatures[start:stop] = np.minimum.reduceat(hashed, offsets, axis=1).T
+    return signatures
+
+
+def candidate_pairs(signatures, band_rows=BAND_ROWS):
+    """Candidate duplicate pairs from LSH banding, in near-linear time"""
+    num_bands = signatures.shape[1] // band_rows
+    multipliers = np.random.default_rng(7).integers(1, 1 << 62, size=band_rows, dtype=np.uint64)
+    pairs = set()
+
+    for band in range(num_bands):
+        rows = signatures[:, band * band_rows:(band + 1) * band_rows]
+        keys = (rows * multipliers).sum(axis=1)
+        # Only buckets holding two or more tenders produce candidates
+        _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        shared = np.flatnonzero(counts[inverse] > 1)
+        if not len(shared):
+            continue
+        order = shared[np.argsort(inverse[shared], kind="stable")]
+        boundaries = np.flatnonzero(np.diff(inverse[order])) + 1
+        for bucket in np.split(order, boundaries):
+            if len(bucket) <= MAX_PAIRWISE_BUCKET:
+                pairs.update((int(i), int(j)) for k, i in enumerate(bucket) for j in bucket[k + 1:])
+            else:
+                pairs.update((int(bucket[0]), int(j)) for j in bucket[1:])
+    return pairs
+
+
+def find_duplicate_groups(titles, organisations, deadlines=None, links=None, threshold=SIMILARITY_THRESHOLD):
+    """Group indices of near-duplicate tenders; only groups of two or more are returned.
+
+    Similar titles alone do not make a duplicate: the copies must agree on
+    their number and lot tokens, and when ``links`` are given every member of
+    a group must come from a different portal host, so one portal's separate
+    lots or notices are never merged.
+    """
+    n = len(titles)
+    if n < 2:
+        return []
+
+    signatures = minhash_signatures(*shingle_hashes(titles, organisations))
+    parent = list(range(n))
+    if links is not None:
+        hosts = [source_host(link) for link in links]
+        # Portal hosts already in each group, so a chain of merges cannot join two notices from one portal
+        group_hosts = [{host} for host in hosts]
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    pairs = np.array(sorted(candidate_pairs(signatures)), dtype=np.int64).reshape(-1, 2)
+    left, right = pairs[:, 0], pairs[:, 1]
+    similar = (signatures[left] == signatures[right]).mean(axis=1) >= threshold
+    if deadlines is not None:
+        # Republished copies share a deadline day; recurring tenders with the same title do not
+        deadlines = np.asarray(deadlines)
+        similar &= deadlines[left] == deadlines[right]
+
+    tokens = {}
+    for i, j in pairs[similar]:
+        for k in (i, j):
+            if k not in tokens:
+                tokens[k] = distinguishing_tokens(titles[k])
+        if tokens[i] != tokens[j]:
+            continue
+        root_i, root_j = find(i), find(j)
+        if root_i == root_j:
+            continue
+        if links is not None:
+            # Unknown hosts (no link) cannot be shown to come from another portal
+            if "" in group_hosts[root_i] | group_hosts[root_j] or group_hosts[root_i] & group_hosts[root_j]:
+                continue
+            group_hosts[root_i] |= group_hosts[root_j]
+        parent[root_j] = root_i
+
+    groups = defaultdict(list)
+    for i in range(n):
+        groups[find(i)].append(i)
+    return [sorted(members) for members in groups.values() if len(members) > 1]
+
+
+def publication_order(df):
+    """Per-row sort key: the published date, with undated rows after every dated one"""
+    if "published" not in df.columns:
+        return [pd.Timestamp.max] * len(df)
+    return pd.to_datetime(df["published"]).fillna(pd.Timestamp.max).tolist()
+
+
+def deduplicate(df, events):
+    """Collapse copies of one tender published on different portals into one canonical row.
+
+    The canonical tender is the earliest published copy (input order breaks ties
+    and places copies without a published date last); its ``sources`` column
+    (and the event's ``sources`` prop) lists the links of all copies.
+    Returns the deduplicated frame, events and the number of rows removed.
+    """
+    if df.empty:
+        return df, events, 0
+    events = list(events)
+
+    groups = find_duplicate_groups(
+        df["title"].tolist(), df["organisation"].tolist(), df["deadline"].to_numpy().astype("datetime64[D]"),
+        df["link"].tolist(),
+    )
+    sources = [[link] if link else [] for link in df["link"].tolist()]
+    keep = np.ones(len(df), dtype=bool)
+    # Canonical copy first within each group
+    published = publication_order(df)
+    groups = [sorted(members, key=lambda i: (published[i], i)) for members in groups]
+    for members in groups:
+        canonical = members[0]
+        sources[canonical] = [link for i in members for link in sources[i] if link]
+        keep[members[1:]] = False
+
+    # Events are shared with cached shard results, so canonical ones are copied rather than mutated
+    for members in groups:
+        event = events[members[0]]
+        events[members[0]] = dict(event, extendedProps=dict(event["extendedProps"], sources=sources[members[0]]))
+
+    df = df.assign(sources=sources)[keep].reset_index(drop=True)
+    events = [event for event, kept in zip(events, keep) if kept]
+    return df, events, int((~keep).sum())
@@ -0,0 +1,93 @@
+import json
+import re
+from collections import Counter
+
+import pandas as pd
+
+from tender_data import parse_published
+
+# Keys whose values are parsed as money or dates; every other detail is kept as text
+MONEY_KEY_WORDS = ("value", "amount", "budget")
+DATE_KEY_WORDS = ("date", "deadline")
+
+# A money figure such as "£1,250,000", "£1.2m" or "250k"
+_money = re.compile(r"(\d[\d,]*(?:\.\d+)?)\s*(bn|billion|m|million|k|thousand)?\b", re.IGNORECASE)
+_iso_date = re.compile(r"\d{4}-\d{2}-\d{2}")
+_multipliers = {"k": 1e3, "thousand": 1e3, "m": 1e6, "million": 1e6, "bn": 1e9, "billion": 1e9}
+
+
+def detail_kind(key):
+    """How a details field is typed: "money", "date" or "text", judged by its name"""
+    name = key.lower()
+    if any(word in name for word in MONEY_KEY_WORDS):
+        return "money"
+    if any(word in name for word in DATE_KEY_WORDS):
+        return "date"
+    return "text"
+
+
+def parse_money(value):
+    """First money figure in a details value (e.g. the low end of "£10k - £20k"), or None"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    match = _money.search(str(value or ""))
+    if match is None:
+        return None
+    number = float(match.group(1).replace(",", ""))
+    return number * _multipliers.get((match.group(2) or "").lower(), 1)
+
+
+def parse_detail_date(value):
+    """Date of a details value: known scraper formats, then ISO 8601, then day-first text; or None"""
+    parsed = parse_published(value)
+    if parsed is None and isinstance(value, str) and value:
+        # ISO timestamps (possibly with a UTC offset) must not be read day-first
+        iso = _iso_date.match(value.strip()) is not None
+        parsed = pd.to_datetime(value.strip(), format="ISO8601" if iso else None, dayfirst=not iso, errors="coerce")
+        if pd.isna(parsed):
+            return None
+        parsed = parsed.tz_convert(None) if parsed.tzinfo is not None else parsed
+    return parsed
+
+
+def decode_details(details):
+    """Decode a column of raw details JSON once, so every field is read from the same dicts"""
+    return [json.loads(text or "{}") for text in details]
+
+
+def detail_keys(decoded):
+    """Details fields present in decoded details, most common first: [(key, kind), ...]"""
+    counts = Counter(key for fields in decoded for key in fields)
+    return [(key, detail_kind(key)) for key, _ in sorted(counts.items(), key=lambda item: (-item[1], item[0]))]
+
+
+def detail_column(tender_ids, decoded, key):
+    """One details field as a typed Series indexed by tender id.
+
+    ``decoded`` comes from decode_details. Money fields become floats, date
+    fields datetimes and the rest strings; missing or unparseable values are
+    NaN/NaT. Each distinct raw value is parsed once, and a tender id listed
+    twice keeps its first row.
+    """
+    kind = detail_kind(key)
+    values = [fields.get(key) for fields in decoded]
+    index = pd.Index(list(tender_ids), name="tender_id")
+    if kind == "text":
+        column = pd.Series([None if value is None else str(value) for value in values], index=index, dtype=object)
+        return column[~column.index.duplicated()]
+
+    parse = parse_money if kind == "money" else parse_detail_date
+    parsed = {}
+    typed = []
+    for value in values:
+        # Nested values are unhashable; their text is parsed instead
+        if isinstance(value, (dict, list)):
+            value = json.dumps(value)
+        if value not in parsed:
+            parsed[value] = parse(value) if value is not None else None
+        typed.append(parsed[value])
+    if kind == "money":
+        column = pd.Series(typed, index=index, dtype=float)
+    else:
+        column = pd.Series(pd.to_datetime(typed), index=index)
+    return column[~column.index.duplicated()]
@@ -0,0 +1,165 @@
+import csv
+import hashlib
+import importlib.util
+import io
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+# Rows serialised per chunk; memory use is bounded by one chunk regardless of result size
+EXPORT_CHUNK_ROWS = 5000
+
+# Export format -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "csv": ("csv", "text/csv"),
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+    "ics": ("ics", "text/calendar"),
+}
+
+# Parquet export needs the optional pyarrow dependency
+PARQUET_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+EXPORT_COLUMNS = ["title", "deadline", "organisation", "cpvs", "link", "location", "latitude", "longitude"]
+
+
+def export_frame(df):
+    """Flat export columns for a chunk of processed tender rows"""
+    return pd.DataFrame({
+        "title": df["title"].astype(str),
+        "deadline": pd.to_datetime(df["deadline"]),
+        "organisation": df["organisation"].astype(str),
+        "cpvs": [" | ".join(pairs) for pairs in df["cpv_pairs"]],
+        "link": df["link"].astype(str),
+        "location": df["Contract location"].astype(str),
+        "latitude": df["latitude"].astype(float),
+        "longitude": df["longitude"].astype(float),
+    }, columns=EXPORT_COLUMNS)
+
+
+def iter_chunks(df, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Export frames of at most ``chunk_rows`` rows"""
+    for start in range(0, len(df), chunk_rows):
+        yield export_frame(df.iloc[start:start + chunk_rows])
+
+
+def iter_csv(df, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Stream filtered tenders as UTF-8 CSV bytes"""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(EXPORT_COLUMNS)
+    yield buffer.getvalue().encode("utf-8")
+    for chunk in iter_chunks(df, chunk_rows):
+        yield chunk.to_csv(index=False, header=False, date_format="%Y-%m-%dT%H:%M:%S").encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object whose contents are drained after every Parquet row group"""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def iter_parquet(df, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Stream filtered tenders as a Parquet file, one row group per chunk"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export requires pyarrow. Install with: pip install pyarrow")
+
+    schema = pa.schema([
+        ("title", pa.string()), ("deadline", pa.timestamp("us")), ("organisation", pa.string()),
+        ("cpvs", pa.string()), ("link", pa.string()), ("location", pa.string()),
+        ("latitude", pa.float64()), ("longitude", pa.float64()),
+    ])
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+        for chunk in iter_chunks(df, chunk_rows):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def _ics_text(value):
+    # RFC 5545 TEXT escaping
+    return (
+        str(value).replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+        .replace("\r\n", "\\n").replace("\n", "\\n")
+    )
+
+
+def _ics_fold(line):
+    # Lines longer than 75 octets continue on the next line after a single space
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    parts = []
+    while len(encoded) > 75:
+        cut = 75 if not parts else 74
+        # Never split a multi-byte character
+        while cut and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode("utf-8"))
+        encoded = encoded[cut:]
+    parts.append(encoded.decode("utf-8"))
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def iter_ics(df, chunk_rows=EXPORT_CHUNK_ROWS, calendar_name="Tender deadlines"):
+    """Stream filtered tenders as an iCalendar feed with one all-day VEVENT per deadline"""
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    yield "".join(_ics_fold(line) for line in [
+        "BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//Tender Dashboard//Tender deadlines//EN",
+        "CALSCALE:GREGORIAN", f"X-WR-CALNAME:{_ics_text(calendar_name)}",
+    ]).encode("utf-8")
+
+    for chunk in iter_chunks(df, chunk_rows):
+        lines = []
+        for title, deadline, organisation, cpvs, link, location in zip(
+            chunk["title"], chunk["deadline"], chunk["organisation"], chunk["cpvs"], chunk["link"], chunk["location"]
+        ):
+            day = deadline.strftime("%Y%m%d")
+            # Stable UIDs let calendar clients update events in place when the feed refreshes
+            uid = hashlib.sha1((link or title + day).encode("utf-8")).hexdigest()[:20]
+            description = f"Organisation: {organisation}\nLocation: {location}\nCPV: {cpvs}\nDeadline: {deadline:%d %b %Y %H:%M}"
+            lines += [
+                "BEGIN:VEVENT",
+                f"UID:{uid}@tender-dashboard",
+                f"DTSTAMP:{stamp}",
+                f"DTSTART;VALUE=DATE:{day}",
+                f"DTEND;VALUE=DATE:{(deadline + timedelta(days=1)).strftime('%Y%m%d')}",
+                f"SUMMARY:{_ics_text(title)}",
+                f"DESCRIPTION:{_ics_text(description)}",
+                f"LOCATION:{_ics_text(location)}",
+                f"CATEGORIES:{_ics_text(cpvs)}" if cpvs else None,
+                f"URL:{link}" if link.startswith("http") else None,
+                "END:VEVENT",
+            ]
+        yield "".join(_ics_fold(line) for line in lines if line is not None).encode("utf-8")
+
+    yield b"END:VCALENDAR\r\n"
+
+
+EXPORTERS = {"csv": iter_csv, "parquet": iter_parquet, "ics": iter_ics}
+
+
+def iter_export(df, export_format, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Stream filtered tenders in one of EXPORT_FORMATS"""
+    return EXPORTERS[export_format](df, chunk_rows)
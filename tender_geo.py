@@ -0,0 +1,204 @@
+import os
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# NUTS 2016/2021 table for the UK (code, name, centroid latitude and longitude)
+NUTS_TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "nuts_uk.csv")
+
+# NUTS ("UKI41") or ITL ("TLI41") codes, upper case only; ITL codes reuse the NUTS suffixes
+_code_pattern = re.compile(r"\b(?:UK|TL)[A-Z0-9]{0,3}\b")
+# A code written as the label of a region name ("TLC - North East")
+_labelled_code = re.compile(r"(?:UK|TL)[A-Z0-9]{0,3}\s*-\s")
+_name_pattern = re.compile(r"^\s*(?:UK|TL)[A-Z0-9]{0,3}\s*-\s*")
+
+
+@lru_cache(maxsize=None)
+def load_nuts_table(path=NUTS_TABLE_FILE):
+    """NUTS centroids indexed by code"""
+    return pd.read_csv(path, dtype={"code": str, "name": str}, keep_default_na=False).set_index("code")
+
+
+@lru_cache(maxsize=None)
+def _names(path=NUTS_TABLE_FILE):
+    table = load_nuts_table(path)
+    # Most specific code wins for names shared across levels (e.g. "Lincolnshire"): longer codes are written last
+    pairs = sorted(zip(table.index, table["name"]), key=lambda pair: len(pair[0]))
+    return {name.lower(): code for code, name in pairs}
+
+
+def location_code(location, path=NUTS_TABLE_FILE):
+    """Most specific known NUTS code for a contract location string, or None.
+
+    Only upper-case tokens that are entries of the table count as codes, and
+    an ITL code without digits ("TLC") only when it labels a region name
+    ("TLC - North East"), so words such as "UKAS" or "TLC" are not regions. A
+    string listing several regions resolves to their common ancestor, and the
+    bare country code only counts when nothing more specific matched.
+    """
+    table = load_nuts_table(path)
+    text = str(location)
+    codes = []
+    for match in _code_pattern.finditer(text):
+        token = match.group()
+        code = "UK" + token[2:]
+        if code not in table.index:
+            continue
+        if token.startswith("TL") and not any(char.isdigit() for char in token):
+            if not _labelled_code.match(text, match.start()):
+                continue
+        codes.append(code)
+    if not codes:
+        # Name-only locations ("Greater Manchester")
+        return _names(path).get(_name_pattern.sub("", str(location)).strip().lower())
+
+    # A trailing country token ("UKI41 - Hackney, UK") must not widen a regional match
+    specific = [code for code in codes if len(code) > 2]
+    code = os.path.commonprefix(specific or codes)
+    while len(code) >= 2:
+        if code in table.index:
+            return code
+        code = code[:-1]
+    return None
+
+
+def resolve_locations(locations, path=NUTS_TABLE_FILE):
+    """Latitude and longitude arrays for a column of contract locations.
+
+    Each distinct location string is resolved once (as a categorical) and the
+    coordinates are joined back by category code, so the cost scales with the
+    number of distinct locations rather than the number of tenders.
+    """
+    table = load_nuts_table(path)
+    categories = pd.Categorical(locations)
+    codes = [location_code(location, path) for location in categories.categories]
+    matched = table.reindex(codes)
+    # -1 (missing location) picks the appended NaN row
+    latitude = np.append(matched["latitude"].to_numpy(dtype=float), np.nan)[categories.codes]
+    longitude = np.append(matched["longitude"].to_numpy(dtype=float), np.nan)[categories.codes]
+    return latitude, longitude
+
+
+@lru_cache(maxsize=4096)
+def location_coordinates(location, path=NUTS_TABLE_FILE):
+    """(latitude, longitude) for one contract location, or None"""
+    code = location_code(location, path)
+    if code is None:
+        return None
+    row = load_nuts_table(path).loc[code]
+    return float(row["latitude"]), float(row["longitude"])
+
+
+# Grid cell size in degrees for the spatial index (~55 km north-south)
+GRID_CELL_DEGREES = 0.5
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(latitude, longitude, centre_latitude, centre_longitude):
+    """Great-circle distance in km from arrays of points to one centre"""
+    lat1, lon1 = np.radians(latitude), np.radians(longitude)
+    lat2, lon2 = np.radians(centre_latitude), np.radians(centre_longitude)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class GridIndex:
+    """Spatial grid over the distinct coordinates of a tender frame.
+
+    Tenders share a few hundred region centroids, so the grid indexes distinct
+    points and each row keeps the id of its point. Queries only compute
+    distances for points in the cells overlapping the search area and map the
+    selected points back to a row mask.
+    """
+
+    def __init__(self, latitude, longitude, cell_degrees=GRID_CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        coords = np.column_stack([np.asarray(latitude, dtype=float), np.asarray(longitude, dtype=float)])
+        valid = ~np.isnan(coords).any(axis=1)
+        self.points, inverse = np.unique(coords[valid], axis=0, return_inverse=True)
+        # Point id per row; rows without coordinates point at a sentinel that never matches
+        self.row_points = np.full(len(coords), len(self.points), dtype=np.int64)
+        self.row_points[valid] = inverse.reshape(-1)
+
+        cells = {}
+        for point, cell in enumerate(map(tuple, np.floor(self.points / cell_degrees).astype(np.int64))):
+            cells.setdefault(cell, []).append(point)
+        self._cells = {cell: np.array(points, dtype=np.int64) for cell, points in cells.items()}
+
+    @classmethod
+    def from_frame(cls, df, cell_degrees=GRID_CELL_DEGREES):
+        if df.empty:
+            return cls([], [], cell_degrees)
+        return cls(df["latitude"], df["longitude"], cell_degrees)
+
+    def _candidates(self, south, west, north, east):
+        size = self.cell_degrees
+        found = [
+            self._cells[(i, j)]
+            for i in range(int(np.floor(south / size)), int(np.floor(north / size)) + 1)
+            for j in range(int(np.floor(west / size)), int(np.floor(east / size)) + 1)
+            if (i, j) in self._cells
+        ]
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+    def _row_mask(self, selected_points):
+        selected = np.zeros(len(self.points) + 1, dtype=bool)
+        selected[selected_points] = True
+        return selected[self.row_points]
+
+    def within_radius(self, centres, radius_km):
+        """Row mask of tenders within ``radius_km`` of any ``(latitude, longitude)`` centre"""
+        selected = []
+        for centre_latitude, centre_longitude in centres:
+            lat_span = np.degrees(radius_km / EARTH_RADIUS_KM)
+            # Longitude span at the widest latitude of the search band
+            widest = min(abs(centre_latitude) + lat_span, 89.0)
+            lon_span = min(lat_span / np.cos(np.radians(widest)), 180.0)
+            candidates = self._candidates(
+                centre_latitude - lat_span, centre_longitude - lon_span,
+                centre_latitude + lat_span, centre_longitude + lon_span,
+            )
+            if len(candidates):
+                distances = haversine_km(
+                    self.points[candidates, 0], self.points[candidates, 1], centre_latitude, centre_longitude
+                )
+                selected.append(candidates[distances <= radius_km])
+        return self._row_mask(np.concatenate(selected) if selected else [])
+
+    def within_bbox(self, south, west, north, east):
+        """Row mask of tenders inside a latitude/longitude bounding box"""
+        candidates = self._candidates(south, west, north, east)
+        points = self.points[candidates]
+        inside = (
+            (points[:, 0] >= south) & (points[:, 0] <= north) & (points[:, 1] >= west) & (points[:, 1] <= east)
+        )
+        return self._row_mask(candidates[inside])
+
+
+def parse_points(text):
+    """Parse "lat, lon" pairs separated by newlines or semicolons; raises ValueError on bad input"""
+    points = []
+    for part in re.split(r"[;\n]", text or ""):
+        if not part.strip():
+            continue
+        try:
+            latitude, longitude = (float(value) for value in part.split(","))
+        except ValueError:
+            raise ValueError(f"'{part.strip()}' is not a 'latitude, longitude' pair")
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise ValueError(f"'{part.strip()}' is outside valid coordinates")
+        points.append((latitude, longitude))
+    return points
+
+
+def proximity_mask(index, proximity):
+    """Row mask for a proximity filter: ("radius", points, km), ("bbox", (south, west, north, east)) or None"""
+    if proximity is None:
+        return None
+    if proximity[0] == "radius":
+        return index.within_radius(proximity[1], proximity[2])
+    if proximity[0] == "bbox":
+        return index.within_bbox(*proximity[1])
+    raise ValueError(f"Unknown proximity filter {proximity[0]!r}")
@@ -0,0 +1,145 @@
+import argparse
+import json
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends and compaction are not coordinated across processes
+    fcntl = None
+
+# Append-only tender logs: one raw tender per line, later lines supersede earlier versions
+NDJSON_SUFFIX = ".ndjson"
+
+# Loader-side compaction: compact a log once it holds this many lines per live tender version.
+# Off by default (0): rewriting the file loses appends from writers that do not use append_tenders
+# (e.g. a scraper holding its fd open or appending with ">>"), so compaction is left to the writer or the CLI
+COMPACT_RATIO = float(os.environ.get("TENDER_LOG_COMPACT_RATIO", "0"))
+# Logs shorter than this are never compacted
+MIN_COMPACT_LINES = 1000
+
+
+def is_tender_log(path):
+    return path.endswith(NDJSON_SUFFIX)
+
+
+@contextmanager
+def _log_lock(path):
+    """Exclusive lock shared by append_tenders and compact_log, so compaction never loses an append"""
+    if fcntl is None:
+        yield
+        return
+    with open(f"{path}.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class LogReader:
+    """Iterate the raw tenders of a log from a byte offset.
+
+    Only complete lines are read; a line the scraper is still writing is left
+    for the next read. After iteration ``offset`` is the checkpoint to resume
+    from, ``inode`` identifies the file (compaction replaces it) and ``lines``
+    counts the non-blank lines read. Lines that are not valid JSON are yielded
+    as text, so they are quarantined like any other malformed tender.
+    """
+
+    def __init__(self, path, offset=0):
+        self.path = path
+        self.offset = offset
+        self.inode = None
+        self.lines = 0
+
+    def __iter__(self):
+        with open(self.path, "rb") as f:
+            self.inode = os.fstat(f.fileno()).st_ino
+            f.seek(self.offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                self.offset += len(line)
+                text = line.decode("utf-8", errors="replace").strip()
+                if not text:
+                    continue
+                self.lines += 1
+                try:
+                    yield json.loads(text)
+                except ValueError:
+                    yield text
+
+
+def log_checkpoint_valid(path, inode, offset):
+    """Whether a (inode, offset) checkpoint still points into this file's appended history"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+    return stat.st_ino == inode and stat.st_size >= offset
+
+
+def append_tenders(path, tenders):
+    """Append raw tenders to a log (for scrapers); returns the number written"""
+    written = 0
+    with _log_lock(path), open(path, "a", encoding="utf-8") as f:
+        for tender in tenders:
+            f.write(json.dumps(tender, ensure_ascii=False, default=str) + "\n")
+            written += 1
+    return written
+
+
+def compact_log(path):
+    """Rewrite a log keeping only the latest version of each tender, in order of last append.
+
+    Malformed lines are kept so they stay visible in the quarantine file. The
+    rewrite is published with a rename; lines appended without the lock while
+    it runs are copied over before the swap. Returns ``{"lines", "kept",
+    "read_offset", "offset", "inode"}`` where ``offset`` is the end of the
+    compacted versions in the new file, the checkpoint matching a reader that
+    had consumed ``read_offset`` bytes of the old one.
+    """
+    from tender_data import raw_tender_id
+
+    with _log_lock(path):
+        reader = LogReader(path)
+        latest = {}
+        malformed = []
+        for raw in reader:
+            if isinstance(raw, dict):
+                tender_id = raw_tender_id(raw)
+                latest.pop(tender_id, None)
+                latest[tender_id] = raw
+            else:
+                malformed.append(raw if isinstance(raw, str) else json.dumps(raw))
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for raw in latest.values():
+                f.write(json.dumps(raw, ensure_ascii=False, default=str) + "\n")
+            for text in malformed:
+                f.write(text + "\n")
+            f.flush()
+            offset = f.buffer.tell()
+        with open(path, "rb") as source, open(tmp_path, "ab") as target:
+            source.seek(reader.offset)
+            target.write(source.read())
+        os.replace(tmp_path, path)
+
+    return {
+        "lines": reader.lines,
+        "kept": len(latest) + len(malformed),
+        "read_offset": reader.offset,
+        "offset": offset,
+        "inode": os.stat(path).st_ino,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drop superseded tender versions from an NDJSON tender log")
+    parser.add_argument("path", help="Tender log (.ndjson)")
+    args = parser.parse_args()
+
+    stats = compact_log(args.path)
+    print(f"Compacted {args.path}: kept {stats['kept']} of {stats['lines']} lines")
@@ -0,0 +1,190 @@
+import os
+import sys
+import threading
+from collections import Counter, OrderedDict
+
+import pandas as pd
+
+# Memory budget for cached and derived tender data (override with TENDER_MEMORY_BUDGET_MB)
+DEFAULT_MEMORY_BUDGET_MB = 256
+
+# Marks a cache miss, since None is a legitimate derived view (e.g. a map without geodata)
+_MISSING = object()
+
+# Distinct filter states tracked for cache warming; counts are halved when exceeded
+MAX_TRACKED_FILTERS = 1000
+
+
+def get_memory_budget_bytes():
+    """Read the configured memory budget in bytes"""
+    try:
+        budget_mb = float(os.environ.get("TENDER_MEMORY_BUDGET_MB", DEFAULT_MEMORY_BUDGET_MB))
+    except ValueError:
+        budget_mb = DEFAULT_MEMORY_BUDGET_MB
+    return int(budget_mb * 1024 * 1024)
+
+
+def estimate_size(obj, _seen=None):
+    """Estimate the deep memory footprint of an object in bytes"""
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(index=True, deep=True))
+
+    # Plotly figures keep their state in a plain dict/list tree
+    if hasattr(obj, "to_plotly_json"):
+        return sys.getsizeof(obj) + estimate_size(obj.to_plotly_json(), _seen)
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += estimate_size(key, _seen) + estimate_size(value, _seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += estimate_size(item, _seen)
+    return size
+
+
+def format_bytes(num_bytes):
+    """Format a byte count for display"""
+    if num_bytes is None:
+        return "N/A"
+    for unit in ["B", "KB", "MB", "GB"]:
+        if abs(num_bytes) < 1024 or unit == "GB":
+            return f"{num_bytes:.0f} {unit}" if unit == "B" else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+
+
+def process_rss_bytes():
+    """Current resident set size of this process, if the platform exposes it"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class DerivedCache:
+    """Process-wide LRU store for derived views (figures, filtered results) with a memory budget.
+
+    Cached base structures (the tender DataFrame, events, CPV list) are registered
+    with ``pin`` so they count against the budget but are never evicted. Derived
+    entries are keyed by tuples of ``(owner, kind, ...)`` where the owner is
+    "shared" for results reused across sessions. Hits and misses
+    are counted per kind.
+    """
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.evictions = 0
+        self.hits = Counter()
+        self.misses = Counter()
+        self._entries = OrderedDict()
+        self._pinned = {}
+        self._derived_bytes = 0
+        self._lock = threading.Lock()
+
+    def pin(self, name, size_bytes):
+        """Record the size of a cached structure that must stay resident"""
+        with self._lock:
+            self._pinned[name] = size_bytes
+            self._evict()
+
+    def get(self, key, default=None):
+        """Return a derived entry and mark it as most recently used"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses[key[1]] += 1
+                return default
+            self.hits[key[1]] += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def get_or_compute(self, key, compute):
+        """Return a cached entry, computing and storing it on a miss"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = self.put(key, compute())
+        return value
+
+    def put(self, key, value):
+        """Store a derived entry, evicting least recently used entries over budget"""
+        size = estimate_size(value)
+        with self._lock:
+            if key in self._entries:
+                self._derived_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._derived_bytes += size
+            self._evict()
+        return value
+
+    def refresh(self, key):
+        """Re-measure an entry that has grown since it was stored (e.g. a memo inside it)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            size = estimate_size(entry[0])
+            self._derived_bytes += size - entry[1]
+            self._entries[key] = (entry[0], size)
+            self._evict()
+
+    def _evict(self):
+        # Caller holds the lock; the newest entry is kept even if it alone exceeds the budget
+        pinned_bytes = sum(self._pinned.values())
+        while len(self._entries) > 1 and pinned_bytes + self._derived_bytes > self.budget_bytes:
+            _, (_, size) = self._entries.popitem(last=False)
+            self._derived_bytes -= size
+            self.evictions += 1
+
+    def usage(self):
+        """Snapshot of current memory accounting"""
+        with self._lock:
+            pinned = dict(self._pinned)
+            return {
+                "pinned": pinned,
+                "pinned_bytes": sum(pinned.values()),
+                "derived_bytes": self._derived_bytes,
+                "derived_entries": len(self._entries),
+                "budget_bytes": self.budget_bytes,
+                "evictions": self.evictions,
+                "hits": dict(self.hits),
+                "misses": dict(self.misses),
+            }
+
+
+class FilterPopularity:
+    """Thread-safe request counts per filter state, used to pick the views to pre-warm.
+
+    Script threads record requests while the watcher thread ranks them. When
+    more than ``max_tracked`` states are tracked, all counts are halved and
+    states that drop to zero are forgotten, so old one-off filters fade out.
+    """
+
+    def __init__(self, max_tracked=MAX_TRACKED_FILTERS):
+        self.max_tracked = max_tracked
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._counts)
+
+    def record(self, filter_state):
+        with self._lock:
+            self._counts[filter_state] += 1
+            if len(self._counts) > self.max_tracked:
+                self._counts = Counter({state: count // 2 for state, count in self._counts.items() if count > 1})
+
+    def most_common(self, n):
+        """The ``n`` most requested filter states with their counts"""
+        with self._lock:
+            counts = self._counts.copy()
+        return counts.most_common(n)
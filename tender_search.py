@@ -0,0 +1,64 @@
+from collections import defaultdict
+
+# CPV matches returned to the sidebar picker per query
+DEFAULT_SEARCH_LIMIT = 50
+
+
+def live_cpv_counts(df):
+    """Live tender count per "code - description" CPV label in a snapshot DataFrame"""
+    if df.empty:
+        return {}
+    return df["cpv_pairs"].explode().dropna().value_counts().to_dict()
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class CpvIndex:
+    """Substring index over CPV labels (codes and descriptions), ranked by live tender count.
+
+    Labels are stored in rank order, so the posting lists of the trigram index
+    are already sorted by rank and a query only verifies candidates until it
+    has ``limit`` matches.
+    """
+
+    def __init__(self, counts):
+        self.labels = sorted(counts, key=lambda label: (-counts[label], label))
+        self.counts = dict(counts)
+        self._lowered = [label.lower() for label in self.labels]
+        postings = defaultdict(list)
+        for position, label in enumerate(self._lowered):
+            for trigram in _trigrams(label):
+                postings[trigram].append(position)
+        self._postings = dict(postings)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def search(self, query, limit=DEFAULT_SEARCH_LIMIT):
+        """Top ``limit`` labels containing the query (case-insensitive), most live tenders first"""
+        query = query.strip().lower()
+        if len(query) < 3:
+            # Short queries (and the empty query) scan in rank order and stop early
+            candidates = range(len(self.labels))
+        else:
+            lists = sorted((self._postings.get(trigram, []) for trigram in _trigrams(query)), key=len)
+            if not lists[0]:
+                return []
+            candidates = set(lists[0])
+            for positions in lists[1:]:
+                candidates.intersection_update(positions)
+            candidates = sorted(candidates)
+
+        matches = []
+        for position in candidates:
+            if query in self._lowered[position]:
+                matches.append(self.labels[position])
+                if len(matches) >= limit:
+                    break
+        return matches
+
+    def count(self, label):
+        """Live tender count of one label (0 if unknown)"""
+        return self.counts.get(label, 0)
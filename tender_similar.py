@@ -0,0 +1,146 @@
+import re
+import sys
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+# Similar tenders listed per tender
+DEFAULT_SIMILAR_K = 5
+# Processed tender columns kept by the index
+RECORD_COLUMNS = ["tender_id", "title", "link", "organisation", "deadline"]
+
+_token = re.compile(r"[a-z0-9]{2,}")
+# Words too generic to say anything about the kind of work
+STOP_WORDS = frozenset(["the", "and", "for", "of", "to", "in", "on", "with", "by", "at", "from", "lot"])
+
+
+def tender_terms(title, organisation, cpv_pairs):
+    """TF-IDF terms of one tender: title and CPV description words, CPV division/group and buyer"""
+    terms = [word for word in _token.findall(str(title).lower()) if word not in STOP_WORDS]
+    for pair in cpv_pairs:
+        code, _, description = str(pair).partition(" - ")
+        terms += [word for word in _token.findall(description.lower()) if word not in STOP_WORDS]
+        # CPV family: division (2 digits) and group (3 digits)
+        terms += [f"cpv:{code[:2]}", f"cpv:{code[:3]}"]
+    buyer = " ".join(str(organisation).lower().split())
+    if buyer:
+        terms.append(f"org:{buyer}")
+    return terms
+
+
+class SimilarityIndex:
+    """Sparse TF-IDF matrix over tenders with memoised top-k cosine neighbours.
+
+    Rows are L2-normalised and kept both row-major (the query vector) and
+    column-major (postings per term), so one lookup is a sparse dot product
+    that only touches tenders sharing a term with the query. Neighbour lists
+    are memoised per tender until the index is rebuilt for a new snapshot;
+    ``sys.getsizeof`` includes the memo, so a cache can re-measure it cheaply.
+    """
+
+    def __init__(self, documents, records):
+        # documents: term lists, one per row of ``records`` (RECORD_COLUMNS)
+        # Plain column lists keep neighbour lookups free of per-row pandas overhead
+        self._titles = [str(title) for title in records["title"]]
+        self._links = [str(link) for link in records["link"]]
+        self._organisations = [str(organisation) for organisation in records["organisation"]]
+        self._deadlines = pd.to_datetime(records["deadline"]).dt.strftime("%d %b %Y").tolist()
+        # Keyed by tender id, which every tender has even without a link; the first row of a duplicate id wins
+        self._rows = {}
+        for row, tender_id in enumerate(records["tender_id"]):
+            self._rows.setdefault(tender_id, row)
+        self._neighbours = {}
+        self._memo_pairs = 0
+
+        vocabulary = {}
+        rows, terms, counts = [], [], []
+        for row, document in enumerate(documents):
+            for term, count in Counter(document).items():
+                rows.append(row)
+                terms.append(vocabulary.setdefault(term, len(vocabulary)))
+                counts.append(count)
+        rows = np.asarray(rows, dtype=np.int64)
+        terms = np.asarray(terms, dtype=np.int64)
+        counts = np.asarray(counts, dtype=float)
+        size = len(self._titles)
+
+        # Sublinear term frequency and smoothed inverse document frequency
+        document_frequency = np.bincount(terms, minlength=len(vocabulary))
+        idf = np.log((1 + size) / (1 + document_frequency)) + 1
+        weights = (1 + np.log(counts)) * idf[terms] if len(terms) else counts
+        norms = np.sqrt(np.bincount(rows, weights ** 2, minlength=size))
+        weights = weights / np.where(norms > 0, norms, 1)[rows]
+
+        # Row-major (CSR): terms are appended row by row, so they are already grouped
+        self._row_ptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=size))])
+        self._row_terms, self._row_weights = terms, weights
+        # Column-major (CSC) postings
+        order = np.argsort(terms, kind="stable")
+        self._col_ptr = np.concatenate([[0], np.cumsum(document_frequency)])
+        self._col_rows, self._col_weights = rows[order], weights[order]
+
+        arrays = (self._row_ptr, self._row_terms, self._row_weights, self._col_ptr, self._col_rows, self._col_weights)
+        self._base_bytes = (
+            sum(array.nbytes for array in arrays)
+            + sum(map(sys.getsizeof, self._titles + self._links + self._organisations + self._deadlines))
+            + 100 * len(self._rows)
+        )
+
+    @classmethod
+    def from_frame(cls, df):
+        """Index the processed tender rows of a snapshot or store query"""
+        if df.empty:
+            return cls([], pd.DataFrame(columns=RECORD_COLUMNS))
+        documents = [
+            tender_terms(title, organisation, cpv_pairs)
+            for title, organisation, cpv_pairs in zip(df["title"], df["organisation"], df["cpv_pairs"])
+        ]
+        return cls(documents, df[RECORD_COLUMNS])
+
+    def __len__(self):
+        return len(self._titles)
+
+    def __sizeof__(self):
+        # Constant time, so the memo can be re-measured after every lookup
+        return self._base_bytes + 50 * self._memo_pairs
+
+    def _scores(self, row):
+        # Sparse dot product of one row with every row sharing at least one term
+        start, end = self._row_ptr[row], self._row_ptr[row + 1]
+        terms, weights = self._row_terms[start:end], self._row_weights[start:end]
+        starts, lengths = self._col_ptr[terms], self._col_ptr[terms + 1] - self._col_ptr[terms]
+        offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(lengths.sum())
+        return np.bincount(
+            self._col_rows[offsets], self._col_weights[offsets] * np.repeat(weights, lengths), minlength=len(self)
+        )
+
+    def neighbours(self, row, k=DEFAULT_SIMILAR_K):
+        """Top-k (row, cosine similarity) pairs for one row, most similar first"""
+        cached = self._neighbours.get(row)
+        if cached is not None and cached[0] >= k:
+            return cached[1][:k]
+
+        scores = self._scores(row)
+        scores[row] = 0.0
+        if len(scores) > k:
+            top = np.argpartition(-scores, k)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        result = [(int(other), float(scores[other])) for other in top if scores[other] > 0]
+        self._memo_pairs += len(result) - (len(cached[1]) if cached is not None else 0)
+        self._neighbours[row] = (k, result)
+        return result
+
+    def similar_to(self, tender_id, k=DEFAULT_SIMILAR_K):
+        """Records of the tenders most similar to the tender with this id, or [] if it is not indexed"""
+        row = self._rows.get(tender_id)
+        if row is None:
+            return []
+        return [
+            {"title": self._titles[other], "link": self._links[other], "organisation": self._organisations[other],
+             "deadline_str": self._deadlines[other], "score": round(score, 3)}
+            for other, score in self.neighbours(row, k)
+        ]
+
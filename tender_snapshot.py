@@ -0,0 +1,127 @@
+import threading
+import time
+
+import pandas as pd
+
+from tender_data import source_signature
+from tender_memory import estimate_size
+
+# Seconds between checks of the scraper output
+DEFAULT_POLL_INTERVAL = 5.0
+# A changed file must keep the same signature for this long before it is rebuilt
+SETTLE_SECONDS = 1.0
+
+
+class TenderSnapshot:
+    """Immutable processed tender data published by the watcher"""
+
+    __slots__ = ("version", "df", "events", "cpv_details", "stats", "signature", "built_at", "build_seconds", "sizes")
+
+    def __init__(self, version, df, events, cpv_details, stats=None, signature=None, build_seconds=0.0):
+        self.version = version
+        self.df = df
+        self.events = events
+        self.cpv_details = cpv_details
+        self.stats = stats or {}
+        self.signature = signature
+        self.built_at = time.time()
+        self.build_seconds = build_seconds
+        # Measured in the builder thread so sessions never pay for accounting
+        self.sizes = {
+            "Tender DataFrame": estimate_size(df),
+            "Calendar events": estimate_size(events),
+            "CPV list": estimate_size(cpv_details),
+        }
+
+
+EMPTY_SNAPSHOT = TenderSnapshot(0, pd.DataFrame(), [], [])
+
+
+class SnapshotWatcher(threading.Thread):
+    """Background thread that rebuilds the tender snapshot when the scraper output changes.
+
+    ``path`` may be a single file, a directory of shards or a glob pattern.
+    ``build(path)`` must return ``(df, events, cpv_details)``, optionally followed
+    by a dict of ingest stats. The new snapshot is
+    published with a single reference swap, so readers never see a partial build
+    and only have to compare ``version`` to notice new data. ``on_publish``
+    callbacks run after the swap, so derived indexes lag ``indexed_version``
+    behind and never delay the first page.
+    """
+
+    def __init__(self, path, build, poll_interval=DEFAULT_POLL_INTERVAL):
+        super().__init__(name="tender-snapshot-watcher", daemon=True)
+        self.path = path
+        self.build = build
+        self.poll_interval = poll_interval
+        self.last_error = None
+        # Called as callback(snapshot) in the watcher thread after each swap (e.g. cache warm-up)
+        self.on_publish = []
+        # Version whose on_publish callbacks have all run
+        self.indexed_version = 0
+        self._snapshot = EMPTY_SNAPSHOT
+        self._signature = None
+        self._ready = threading.Event()
+        self._stopped = threading.Event()
+
+    @property
+    def version(self):
+        return self._snapshot.version
+
+    def current(self, timeout=None):
+        """Latest published snapshot, waiting for the first build if necessary"""
+        self._ready.wait(timeout)
+        return self._snapshot
+
+    def stop(self):
+        self._stopped.set()
+
+    def run(self):
+        while not self._stopped.is_set():
+            signature = source_signature(self.path)
+            if signature != self._signature and self._is_settled(signature):
+                self._rebuild(signature)
+            self._ready.set()
+            self._stopped.wait(self.poll_interval)
+
+    def _is_settled(self, signature):
+        # Skip files the scraper is still writing; the next poll will pick them up
+        if signature is None or not self._ready.is_set():
+            return True
+        self._stopped.wait(SETTLE_SECONDS)
+        return source_signature(self.path) == signature
+
+    def _rebuild(self, signature):
+        self._signature = signature
+        if signature is None:
+            self.last_error = FileNotFoundError(f"No such file: '{self.path}'")
+            return
+
+        started = time.perf_counter()
+        try:
+            df, events, cpv_details, *extra = self.build(self.path)
+        except Exception as e:
+            # Keep serving the previous snapshot until the file is fixed
+            self.last_error = e
+            return
+
+        self._snapshot = TenderSnapshot(
+            self._snapshot.version + 1,
+            df,
+            events,
+            cpv_details,
+            stats=extra[0] if extra else None,
+            signature=signature,
+            build_seconds=time.perf_counter() - started,
+        )
+        self.last_error = None
+        # Readers can use the new data while the derived indexes catch up
+        self._ready.set()
+
+        snapshot = self._snapshot
+        for callback in self.on_publish:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                self.last_error = e
+        self.indexed_version = snapshot.version
@@ -0,0 +1,336 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from tender_archive import BACKFILL_BATCH_ROWS, archive_rows
+from tender_changefeed import DEFAULT_CHANGEFEED_FILE, STORE_HASH_SCHEME, get_changefeed
+from tender_data import TENDER_COLUMNS, iter_records, write_quarantine
+from tender_geo import location_coordinates
+
+# Default location of the optional SQLite tender store
+DEFAULT_STORE_PATH = "output/tenders.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tenders (
+    tender_id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    link TEXT NOT NULL,
+    organisation TEXT NOT NULL,
+    deadline TEXT NOT NULL,
+    location TEXT NOT NULL,
+    latitude REAL,
+    longitude REAL,
+    cpv TEXT NOT NULL,
+    cpv_codes_json TEXT NOT NULL,
+    cpv_pairs_json TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    published TEXT,
+    details_json TEXT
+);
+CREATE TABLE IF NOT EXISTS tender_cpvs (
+    tender_id TEXT NOT NULL REFERENCES tenders(tender_id) ON DELETE CASCADE,
+    cpv_pair TEXT NOT NULL,
+    cpv_code TEXT NOT NULL,
+    PRIMARY KEY (tender_id, cpv_pair)
+);
+CREATE INDEX IF NOT EXISTS idx_tenders_deadline ON tenders(deadline);
+CREATE INDEX IF NOT EXISTS idx_tenders_organisation ON tenders(organisation);
+CREATE INDEX IF NOT EXISTS idx_tenders_location ON tenders(location);
+CREATE INDEX IF NOT EXISTS idx_tender_cpvs_pair ON tender_cpvs(cpv_pair, tender_id);
+CREATE INDEX IF NOT EXISTS idx_tender_cpvs_code ON tender_cpvs(cpv_code);
+"""
+
+# Columns selected for processed tender rows, in TENDER_COLUMNS order
+ROW_SELECT = """
+SELECT t.title, t.deadline, t.organisation, t.cpv, t.cpv_codes_json, t.cpv_pairs_json,
+       t.link, t.location, t.latitude, t.longitude, t.tender_id, t.published, t.details_json
+FROM tenders t
+"""
+
+
+def record_hash(record):
+    """Content hash used to skip unchanged rows on upsert"""
+    content = json.dumps(
+        [
+            record.title, record.link, record.organisation, record.deadline.isoformat(), record.location,
+            record.cpv_pairs, record.details,
+        ],
+        ensure_ascii=False,
+    )
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+def _timestamp(value):
+    return pd.Timestamp(value).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class TenderStore:
+    """Optional SQLite tender store with incremental upserts and indexed filter queries"""
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self._write_lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            # Stores created before the published date and raw details were tracked
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(tenders)")}
+            if "published" not in columns:
+                conn.execute("ALTER TABLE tenders ADD COLUMN published TEXT")
+            if "details_json" not in columns:
+                conn.execute("ALTER TABLE tenders ADD COLUMN details_json TEXT")
+
+    def _connect(self):
+        # One short-lived connection per call keeps sessions and the watcher thread independent
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    def upsert_records(self, records, removed_expired=None):
+        """Insert new tenders and update changed ones; tenders missing from ``records`` are removed.
+
+        When ``removed_expired`` is a list, the rows (TENDER_COLUMNS order) of removed
+        tenders whose deadline has passed are appended to it before they are deleted.
+        """
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0, "removed": 0}
+        now = _timestamp(datetime.now())
+
+        with self._write_lock, closing(self._connect()) as conn, conn:
+            existing = dict(conn.execute("SELECT tender_id, content_hash FROM tenders"))
+            missing_published = {row[0] for row in conn.execute("SELECT tender_id FROM tenders WHERE published IS NULL")}
+            seen = set()
+
+            for record in records:
+                tender_id = record.tender_id
+                if tender_id in seen:
+                    continue
+                seen.add(tender_id)
+
+                content_hash = record_hash(record)
+                previous_hash = existing.get(tender_id)
+                if previous_hash == content_hash:
+                    counts["unchanged"] += 1
+                    if tender_id in missing_published and record.published is not None:
+                        # Backfill without reporting the tender as changed
+                        conn.execute(
+                            "UPDATE tenders SET published = ? WHERE tender_id = ?",
+                            (_timestamp(record.published), tender_id),
+                        )
+                    continue
+                counts["inserted" if previous_hash is None else "updated"] += 1
+
+                location_coords = location_coordinates(record.location)
+                conn.execute(
+                    """
+                    INSERT INTO tenders (tender_id, title, link, organisation, deadline, location, latitude, longitude,
+                                         cpv, cpv_codes_json, cpv_pairs_json, content_hash, updated_at, published,
+                                         details_json)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(tender_id) DO UPDATE SET
+                        title = excluded.title, link = excluded.link, organisation = excluded.organisation,
+                        deadline = excluded.deadline, location = excluded.location,
+                        latitude = excluded.latitude, longitude = excluded.longitude, cpv = excluded.cpv,
+                        cpv_codes_json = excluded.cpv_codes_json, cpv_pairs_json = excluded.cpv_pairs_json,
+                        content_hash = excluded.content_hash, updated_at = excluded.updated_at,
+                        published = excluded.published, details_json = excluded.details_json
+                    """,
+                    (
+                        tender_id, record.title, record.link, record.organisation, _timestamp(record.deadline),
+                        record.location,
+                        location_coords[0] if location_coords else None,
+                        location_coords[1] if location_coords else None,
+                        record.combined_cpv, json.dumps(record.cpv_codes), json.dumps(record.cpv_pairs),
+                        content_hash, now, _timestamp(record.published) if record.published is not None else None,
+                        record.details,
+                    ),
+                )
+                conn.execute("DELETE FROM tender_cpvs WHERE tender_id = ?", (tender_id,))
+                conn.executemany(
+                    "INSERT OR IGNORE INTO tender_cpvs (tender_id, cpv_pair, cpv_code) VALUES (?, ?, ?)",
+                    [(tender_id, pair, pair.split(" - ", 1)[0]) for pair in record.cpv_pairs],
+                )
+
+            removed = [(tender_id,) for tender_id in existing.keys() - seen]
+            if removed_expired is not None:
+                removed_expired.extend(self._expired_rows(conn, [tender_id for tender_id, in removed]))
+            conn.executemany("DELETE FROM tenders WHERE tender_id = ?", removed)
+            counts["removed"] = len(removed)
+
+            # Geo-tag rows stored before their location could be resolved, once per distinct location
+            unresolved = [row[0] for row in conn.execute("SELECT DISTINCT location FROM tenders WHERE latitude IS NULL")]
+            conn.executemany(
+                "UPDATE tenders SET latitude = ?, longitude = ? WHERE location = ? AND latitude IS NULL",
+                [coords + (location,) for location in unresolved if (coords := location_coordinates(location))],
+            )
+
+        return counts
+
+    @staticmethod
+    def _expired_rows(conn, tender_ids):
+        # Stored rows of the given tenders whose deadline has passed, decoded like TenderRecord.to_row
+        rows = []
+        now = _timestamp(datetime.today())
+        for start in range(0, len(tender_ids), 500):
+            batch = tender_ids[start:start + 500]
+            rows += conn.execute(
+                ROW_SELECT + f" WHERE t.deadline < ? AND t.tender_id IN ({', '.join('?' * len(batch))})",
+                [now] + batch,
+            ).fetchall()
+        return [
+            row[:4] + (json.loads(row[4]), json.loads(row[5])) + row[6:12] + (row[12] or "{}",)
+            for row in rows
+        ]
+
+    def _where(self, selected_cpv, selected_date):
+        # Live tenders only, matching the in-memory snapshot semantics
+        clauses = ["t.deadline >= ?", "t.deadline >= ?"]
+        params = [_timestamp(datetime.today()), _timestamp(selected_date)]
+        if selected_cpv != "All":
+            clauses.append("t.tender_id IN (SELECT tender_id FROM tender_cpvs WHERE cpv_pair = ?)")
+            params.append(selected_cpv)
+        return " WHERE " + " AND ".join(clauses), params
+
+    def _frame(self, sql, params):
+        with closing(self._connect()) as conn:
+            rows = conn.execute(sql, params).fetchall()
+        if not rows:
+            return pd.DataFrame()
+
+        df = pd.DataFrame(rows, columns=TENDER_COLUMNS)
+        df["deadline"] = pd.to_datetime(df["deadline"])
+        df["published"] = pd.to_datetime(df["published"])
+        df["individual_cpvs"] = df["individual_cpvs"].map(json.loads)
+        df["cpv_pairs"] = df["cpv_pairs"].map(json.loads)
+        df["details"] = df["details"].fillna("{}")
+        return df
+
+    def query_tenders(self, selected_cpv, selected_date):
+        """Filtered live tenders, equivalent to apply_filters on the snapshot DataFrame"""
+        where, params = self._where(selected_cpv, selected_date)
+        return self._frame(ROW_SELECT + where + " ORDER BY t.rowid", params)
+
+    def tenders_for_date(self, target_date, selected_cpv="All"):
+        """Live tenders whose deadline falls on one day"""
+        where, params = self._where(selected_cpv, target_date)
+        where += " AND t.deadline < ?"
+        params.append(_timestamp(pd.Timestamp(target_date) + timedelta(days=1)))
+        return self._frame(ROW_SELECT + where + " ORDER BY t.rowid", params)
+
+    def tenders_by_ids(self, tender_ids):
+        """Live tenders with the given ids"""
+        tender_ids = list(tender_ids)
+        frames = []
+        # Stay below SQLite's bound parameter limit
+        for start in range(0, len(tender_ids), 500):
+            batch = tender_ids[start:start + 500]
+            frames.append(self._frame(
+                ROW_SELECT + f" WHERE t.deadline >= ? AND t.tender_id IN ({', '.join('?' * len(batch))})",
+                [_timestamp(datetime.today())] + batch,
+            ))
+        frames = [frame for frame in frames if not frame.empty]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def location_counts(self, selected_cpv, selected_date):
+        """Tender count per contract location for the current filters"""
+        where, params = self._where(selected_cpv, selected_date)
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"SELECT t.location, COUNT(*) FROM tenders t{where} GROUP BY t.location", params
+            ).fetchall()
+        return pd.DataFrame(rows, columns=["Contract location", "Tender Count"])
+
+    def summary(self, selected_cpv, selected_date):
+        """Count, nearest deadline and urgent (7 day) count for the current filters"""
+        where, params = self._where(selected_cpv, selected_date)
+        urgent_before = _timestamp(datetime.now() + timedelta(days=7))
+        with closing(self._connect()) as conn:
+            count, nearest, urgent = conn.execute(
+                f"SELECT COUNT(*), MIN(t.deadline), SUM(t.deadline <= ?) FROM tenders t{where}",
+                [urgent_before] + params,
+            ).fetchone()
+        return {
+            "count": count,
+            "nearest_deadline": pd.Timestamp(nearest) if nearest else None,
+            "urgent": urgent or 0,
+        }
+
+    def cpv_details(self):
+        """Sorted CPV code-description pairs of live tenders"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                """
+                SELECT DISTINCT c.cpv_pair FROM tender_cpvs c
+                JOIN tenders t ON t.tender_id = c.tender_id
+                WHERE t.deadline >= ? ORDER BY c.cpv_pair
+                """,
+                (_timestamp(datetime.today()),),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def cpv_pairs_by_tender(self):
+        """CPV code-description pairs of each live tender: {tender_id: [pair, ...]}"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT tender_id, cpv_pairs_json FROM tenders WHERE deadline >= ?",
+                (_timestamp(datetime.today()),),
+            ).fetchall()
+        return {tender_id: json.loads(pairs) for tender_id, pairs in rows}
+
+    def cpv_counts(self):
+        """Live tender count per CPV code-description pair"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                """
+                SELECT c.cpv_pair, COUNT(*) FROM tender_cpvs c
+                JOIN tenders t ON t.tender_id = c.tender_id
+                WHERE t.deadline >= ? GROUP BY c.cpv_pair
+                """,
+                (_timestamp(datetime.today()),),
+            ).fetchall()
+        return dict(rows)
+
+
+def sync_store(store, source, quarantine_file=None, changefeed_file=DEFAULT_CHANGEFEED_FILE, archive_dir=None):
+    """Stream a scraper source into the store; returns the (empty) snapshot parts and ingest stats"""
+    quarantined = []
+    current = {}
+    expired = []
+    archived = 0
+    today = datetime.today()
+
+    def track(records):
+        nonlocal archived
+        for record in records:
+            current[record.tender_id] = (record_hash(record), record.title)
+            if archive_dir and record.deadline < today:
+                expired.append(record.to_row())
+                # Flushed in batches so memory stays bounded by the batch, not the source
+                if len(expired) >= BACKFILL_BATCH_ROWS:
+                    archived += archive_rows(expired, archive_dir)
+                    expired.clear()
+            yield record
+
+    removed_expired = [] if archive_dir else None
+    counts = store.upsert_records(track(iter_records(source, quarantined)), removed_expired)
+    if quarantine_file:
+        write_quarantine(quarantined, quarantine_file)
+    if changefeed_file:
+        get_changefeed(changefeed_file).apply(current, scheme=STORE_HASH_SCHEME)
+
+    cpv_details = store.cpv_details()
+    stats = dict(counts, tenders=store.summary("All", datetime.today())["count"], quarantined=len(quarantined))
+    if archive_dir:
+        # Tenders the scraper dropped after they expired are archived from their stored rows
+        stats["archived"] = archived + archive_rows(expired + removed_expired, archive_dir)
+    # Tender rows stay in SQLite; the snapshot only carries the CPV list
+    return pd.DataFrame(), [], cpv_details, stats
@@ -0,0 +1,291 @@
+import json
+import os
+import re
+import threading
+from bisect import bisect_right
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+from tender_changefeed import DEFAULT_CHANGEFEED_FILE
+from tender_geo import haversine_km
+
+try:
+    import fcntl
+except ImportError:  # Windows: a single dashboard process is assumed
+    fcntl = None
+
+# Saved searches per user, the changefeed checkpoint and each user's "seen" marker
+DEFAULT_SAVED_SEARCHES_FILE = "output/saved_searches.json"
+# One JSON-lines digest of matches per user
+DEFAULT_DIGEST_DIR = "output/digests"
+
+_word = re.compile(r"[a-z0-9]+")
+_unsafe = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def normalise_search(selected_cpv="All", location=None, text=None, proximity=None):
+    """Saved search predicates in canonical, JSON-serialisable form"""
+    search = {}
+    if selected_cpv and selected_cpv != "All":
+        search["cpv"] = selected_cpv
+    if location and location.strip():
+        search["location"] = location.strip()
+    if text and _word.findall(text.lower()):
+        search["text"] = text.strip()
+    if proximity:
+        search["proximity"] = json.loads(json.dumps(proximity))
+    return search
+
+
+def _tender_words(tender):
+    return set(_word.findall(f"{tender['title']} {tender['organisation']}".lower()))
+
+
+def search_matches(search, tender, words=None):
+    """Whether a processed tender row (as a dict) satisfies every predicate of a saved search.
+
+    Text predicates are keyword searches: every word must appear in the title or organisation.
+    """
+    if "cpv" in search and search["cpv"] not in list(tender["cpv_pairs"]):
+        return False
+    if "location" in search and str(tender["Contract location"]).lower() != search["location"].lower():
+        return False
+    if "text" in search:
+        words = _tender_words(tender) if words is None else words
+        if not set(_word.findall(search["text"].lower())) <= words:
+            return False
+    if "proximity" in search:
+        latitude, longitude = tender["latitude"], tender["longitude"]
+        if latitude is None or latitude != latitude:
+            return False
+        kind, *args = search["proximity"]
+        if kind == "radius":
+            points, radius_km = args
+            return any(haversine_km(latitude, longitude, *point) <= radius_km for point in points)
+        south, west, north, east = args[0]
+        return south <= latitude <= north and west <= longitude <= east
+    return True
+
+
+class SearchIndex:
+    """Inverted index from predicate values to saved searches.
+
+    Each search is filed under one indexed predicate (its CPV pair, else its
+    location, else its longest keyword), so a tender only verifies the searches
+    filed under its own CPVs, location and words. Searches with none of these
+    (e.g. proximity only) are checked against every tender.
+    """
+
+    def __init__(self, searches):
+        self.searches = searches
+        self._by_cpv = defaultdict(list)
+        self._by_location = defaultdict(list)
+        self._by_word = defaultdict(list)
+        self._unindexed = []
+        for key, search in searches.items():
+            if "cpv" in search:
+                self._by_cpv[search["cpv"]].append(key)
+            elif "location" in search:
+                self._by_location[search["location"].lower()].append(key)
+            elif "text" in search:
+                self._by_word[max(_word.findall(search["text"].lower()), key=len)].append(key)
+            else:
+                self._unindexed.append(key)
+
+    def __len__(self):
+        return len(self.searches)
+
+    def match(self, tender):
+        """Keys of the saved searches a tender satisfies"""
+        words = _tender_words(tender)
+        candidates = set(self._unindexed)
+        for pair in tender["cpv_pairs"]:
+            candidates.update(self._by_cpv.get(pair, ()))
+        candidates.update(self._by_location.get(str(tender["Contract location"]).lower(), ()))
+        for word in words & self._by_word.keys():
+            candidates.update(self._by_word[word])
+        return [key for key in candidates if search_matches(self.searches[key], tender, words)]
+
+
+class SavedSearches:
+    """Persistent per-user saved searches, matched incrementally against the changefeed.
+
+    ``process_changes`` reads the changefeed from a stored byte offset, so each
+    new or changed tender is matched exactly once, and appends hits to
+    ``<digest_dir>/<user>.jsonl``.
+    """
+
+    def __init__(self, path=DEFAULT_SAVED_SEARCHES_FILE, digest_dir=DEFAULT_DIGEST_DIR,
+                 changefeed_path=DEFAULT_CHANGEFEED_FILE):
+        self.path = path
+        self.digest_dir = digest_dir
+        self.changefeed_path = changefeed_path
+        self._lock = threading.Lock()
+        self._index = None
+        self._index_version = None
+        # Digest entry timestamps per user, tail-read from the digest files: user -> (offset, [ts, ...])
+        self._digest_times = {}
+
+    @contextmanager
+    def _locked_state(self, write=False):
+        # Replicas share the state file; the flock keeps checkpoints and edits from racing
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock, open(self.path + ".lock", "w") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                state = self._read_state()
+                yield state
+                if write:
+                    tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                    with open(tmp_path, "w", encoding="utf-8") as f:
+                        json.dump(state, f, ensure_ascii=False, indent=1)
+                    os.replace(tmp_path, self.path)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_state(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+        state.setdefault("searches", {})
+        state.setdefault("seen", {})
+        state.setdefault("changefeed_offset", None)
+        return state
+
+    def searches(self, user):
+        """Saved searches of one user: {name: search}"""
+        with self._locked_state() as state:
+            return dict(state["searches"].get(user, {}))
+
+    def save(self, user, name, search):
+        """Create or replace a saved search"""
+        with self._locked_state(write=True) as state:
+            state["searches"].setdefault(user, {})[name] = search
+
+    def delete(self, user, name):
+        """Remove a saved search"""
+        with self._locked_state(write=True) as state:
+            state["searches"].get(user, {}).pop(name, None)
+
+    def _search_index(self, state):
+        # Rebuilt only when the saved searches themselves change
+        version = json.dumps(state["searches"], sort_keys=True)
+        if version != self._index_version:
+            searches = {
+                (user, name): search for user, saved in state["searches"].items() for name, search in saved.items()
+            }
+            self._index, self._index_version = SearchIndex(searches), version
+        return self._index
+
+    def _read_changes(self, offset):
+        # Complete changefeed lines after a byte offset: returns ([tender_id, ...], new offset)
+        try:
+            with open(self.changefeed_path, "rb") as f:
+                if offset is None:
+                    # First run: start from the end instead of replaying the whole history
+                    return [], f.seek(0, os.SEEK_END)
+                f.seek(offset)
+                data = f.read()
+        except OSError:
+            return [], offset or 0
+        end = data.rfind(b"\n") + 1
+        tender_ids = []
+        for line in data[:end].splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if entry.get("change") in ("new", "changed"):
+                tender_ids.append(entry["tender_id"])
+        return list(dict.fromkeys(tender_ids)), offset + end
+
+    def process_changes(self, lookup):
+        """Match tenders added or changed since the last call against all saved searches.
+
+        ``lookup(tender_ids)`` returns the processed rows (a DataFrame) of those
+        tenders. Returns the number of matches appended to user digests.
+        """
+        with self._locked_state(write=True) as state:
+            tender_ids, state["changefeed_offset"] = self._read_changes(state["changefeed_offset"])
+            index = self._search_index(state)
+            if not tender_ids or not len(index):
+                return 0
+
+            timestamp = datetime.now().isoformat(timespec="seconds")
+            digests = defaultdict(list)
+            for tender in lookup(tender_ids).to_dict("records"):
+                for user, name in index.match(tender):
+                    digests[user].append({
+                        "ts": timestamp,
+                        "search": name,
+                        "tender_id": tender["tender_id"],
+                        "title": tender["title"],
+                        "deadline": str(tender["deadline"]),
+                        "link": tender["link"],
+                    })
+
+            os.makedirs(self.digest_dir, exist_ok=True)
+            for user, entries in digests.items():
+                with open(self.digest_path(user), "a", encoding="utf-8") as f:
+                    for entry in entries:
+                        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            return sum(map(len, digests.values()))
+
+    def digest_path(self, user):
+        """Digest file of one user"""
+        return os.path.join(self.digest_dir, f"{_unsafe.sub('_', user) or '_'}.jsonl")
+
+    def _digest_entries(self, user):
+        offset, times = self._digest_times.get(user, (0, []))
+        try:
+            with open(self.digest_path(user), "rb") as f:
+                f.seek(offset)
+                data = f.read()
+        except OSError:
+            return times
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            try:
+                times.append(json.loads(line).get("ts", ""))
+            except ValueError:
+                continue
+        self._digest_times[user] = (offset + end, times)
+        return times
+
+    def unseen_count(self, user):
+        """Digest entries recorded since the user last marked their matches as seen"""
+        with self._locked_state() as state:
+            seen = state["seen"].get(user, "")
+            times = self._digest_entries(user)
+        return len(times) - bisect_right(times, seen)
+
+    def recent_matches(self, user, limit=20):
+        """Latest digest entries of one user, newest first"""
+        try:
+            with open(self.digest_path(user), "r", encoding="utf-8") as f:
+                lines = f.readlines()[-limit:]
+        except OSError:
+            return []
+        return [json.loads(line) for line in reversed(lines) if line.strip()]
+
+    def mark_seen(self, user):
+        """Reset a user's "new matches" badge"""
+        with self._locked_state(write=True) as state:
+            state["seen"][user] = datetime.now().isoformat(timespec="seconds")
+
+
+_saved_searches = {}
+
+
+def get_saved_searches(path=DEFAULT_SAVED_SEARCHES_FILE):
+    """Shared SavedSearches instance per state file within this process"""
+    if path not in _saved_searches:
+        _saved_searches[path] = SavedSearches(path)
+    return _saved_searches[path]
@@ -0,0 +1,119 @@
+import gzip
+import http.client
+import json
+import threading
+from datetime import date, datetime, timedelta
+from urllib.parse import quote
+
+import pytest
+
+from tender_api import _etag_matches, create_server
+from tender_data import load_and_process_data
+
+ETAG = '"7-0123456789abcdef"'
+IT = "72000000 - IT services"
+
+
+def test_if_none_match_compares_whole_tags():
+    assert _etag_matches(ETAG, ETAG)
+    assert _etag_matches(f'"other", W/{ETAG}', ETAG)
+    assert _etag_matches("*", ETAG)
+    assert _etag_matches(ETAG, f"W/{ETAG}")
+    # A tag that merely contains ours, or an unquoted one, is a different tag
+    assert not _etag_matches('"x7-0123456789abcdefx", 7-0123456789abcdef', ETAG)
+    assert not _etag_matches(None, ETAG)
+    assert not _etag_matches(f"x{ETAG}", ETAG)
+
+
+def synthetic_tender(i):
+    cpv = ("72000000", "IT services") if i % 2 else ("90910000", "Cleaning services")
+    return {
+        "title": f"Synthetic tender {i} covering a long description of the work to be delivered",
+        "link": f"https://example.org/tender/{i}",
+        "organisation": f"Buyer {i % 3}",
+        "cpv_codes": [cpv[0]],
+        "cpv_descriptions": [cpv[1]],
+        "details": {
+            # Tender 0 has already closed
+            "Submission deadline": (datetime.today() + timedelta(days=i if i else -3)).strftime("%d %B %Y"),
+            "Contract location": "UKI41 - Hackney" if i % 3 else "UKD3 - Greater Manchester",
+        },
+    }
+
+
+@pytest.fixture(scope="module")
+def server(tmp_path_factory):
+    source = tmp_path_factory.mktemp("api") / "tenders.json"
+    source.write_text(json.dumps({"tenders": [synthetic_tender(i) for i in range(13)]}))
+    build = lambda path: load_and_process_data(path, quarantine_file=None, changefeed_file=None)
+    server = create_server(str(source), port=0, build=build)
+    server.watcher.current(timeout=10)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.watcher.stop()
+    server.server_close()
+
+
+def get(server, path, **headers):
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=10)
+    connection.request("GET", path, headers=headers)
+    response = connection.getresponse()
+    body = response.read()
+    connection.close()
+    return response, body
+
+
+def get_json(server, path):
+    response, body = get(server, path)
+    assert response.status == 200
+    return json.loads(body)
+
+
+def test_tenders_filters_and_pages(server):
+    everything = get_json(server, "/tenders?limit=500")
+    assert everything["total"] == 12
+    assert all(tender["deadline"] >= date.today().isoformat() for tender in everything["tenders"])
+
+    it = get_json(server, f"/tenders?cpv={quote(IT)}")
+    assert it["total"] == 6
+    assert all(tender["cpvs"] == [IT] for tender in it["tenders"])
+    assert get_json(server, "/tenders?location=" + quote("ukI41 - hackney"))["total"] == 8
+
+    page = get_json(server, "/tenders?offset=10&limit=5")
+    assert (page["total"], page["offset"], page["limit"]) == (12, 10, 5)
+    assert page["tenders"] == everything["tenders"][10:]
+
+
+def test_day_lists_the_tenders_due_that_day(server):
+    day = (date.today() + timedelta(days=4)).isoformat()
+    result = get_json(server, f"/day/{day}")
+    assert result["date"] == day
+    assert [tender["link"] for tender in result["tenders"]] == ["https://example.org/tender/4"]
+
+
+def test_revalidation_and_gzip_share_a_weak_etag(server):
+    plain, body = get(server, "/tenders?limit=500")
+    etag = plain.getheader("ETag")
+    assert etag.startswith('W/"')
+
+    compressed, gzipped = get(server, "/tenders?limit=500", **{"Accept-Encoding": "gzip"})
+    assert compressed.getheader("Content-Encoding") == "gzip"
+    assert compressed.getheader("ETag") == etag
+    assert json.loads(gzip.decompress(gzipped)) == json.loads(body)
+
+    not_modified, empty = get(server, "/tenders?limit=500", **{"If-None-Match": etag})
+    assert (not_modified.status, empty) == (304, b"")
+    assert get(server, "/tenders?limit=499", **{"If-None-Match": etag})[0].status == 200
+
+
+@pytest.mark.parametrize("path", ["/tenders?from=tomorrow", "/tenders?limit=-1", "/tenders?offset=x", "/day/soon"])
+def test_invalid_parameters_are_400(server, path):
+    response, body = get(server, path)
+    assert response.status == 400
+    assert "error" in json.loads(body)
+
+
+def test_unknown_path_is_404(server):
+    assert get(server, "/nothing")[0].status == 404
@@ -0,0 +1,157 @@
+import glob
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+import tender_archive
+import tender_data
+import tender_store
+from tender_archive import archive_rows, as_of, backfill, iter_archive, partition_dir, trends
+from tender_data import iter_records, load_and_process_data
+from tender_store import TenderStore, sync_store
+
+
+def make_tender(i, deadline):
+    return {
+        "title": f"tender number {i}",
+        "link": f"https://example.org/tender/{i}",
+        "organisation": f"Buyer {i}",
+        "cpv_codes": ["72000000"],
+        "cpv_descriptions": ["IT services"],
+        "details": {"Submission deadline": deadline.strftime("%d %B %Y"), "Contract location": "Unknown"},
+    }
+
+
+def write_source(path, tenders):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"tenders": tenders}, f)
+
+
+def archived_ids(archive_dir):
+    frames = iter_archive(str(archive_dir), columns=["tender_id"])
+    return sorted(tender_id for df in frames for tender_id in df["tender_id"])
+
+
+def test_store_sync_archives_expired_tenders_in_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(tender_store, "BACKFILL_BATCH_ROWS", 2)
+    batches = []
+    original = tender_store.archive_rows
+    monkeypatch.setattr(
+        tender_store, "archive_rows", lambda rows, directory: batches.append(len(rows)) or original(rows, directory)
+    )
+
+    today = datetime.today()
+    source = tmp_path / "tenders.json"
+    expired = [make_tender(i, today - timedelta(days=10 + i)) for i in range(5)]
+    write_source(source, expired + [make_tender(9, today + timedelta(days=5))])
+    store = TenderStore(str(tmp_path / "tenders.sqlite"))
+    _, _, _, stats = sync_store(store, str(source), changefeed_file=None, archive_dir=str(tmp_path / "archive"))
+
+    assert stats["archived"] == 5
+    assert max(batches) <= 2
+    assert len(archived_ids(tmp_path / "archive")) == 5
+
+
+
+def shifted_datetime(days):
+    class Shifted(datetime):
+        @classmethod
+        def today(cls):
+            return datetime.today() + timedelta(days=days)
+    return Shifted
+
+
+def test_memory_load_archives_tenders_dropped_after_expiry(tmp_path, monkeypatch):
+    today = datetime.today()
+    source, archive_dir = tmp_path / "tenders.json", str(tmp_path / "archive")
+    write_source(source, [make_tender(1, today + timedelta(days=1)), make_tender(2, today + timedelta(days=30))])
+    load_and_process_data(str(source), None, None, archive_dir=archive_dir)
+
+    # Three days later the scraper has dropped both: the first expired, the second was withdrawn while still open
+    monkeypatch.setattr(tender_data, "datetime", shifted_datetime(3))
+    write_source(source, [make_tender(3, today + timedelta(days=30))])
+    _, _, _, stats = load_and_process_data(str(source), None, None, archive_dir=archive_dir)
+
+    assert stats["archived"] == 1
+    assert archived_ids(archive_dir) == ["https://example.org/tender/1"]
+
+
+def test_store_sync_archives_tenders_dropped_after_expiry(tmp_path):
+    today = datetime.today()
+    source, archive_dir = tmp_path / "tenders.json", str(tmp_path / "archive")
+    store = TenderStore(str(tmp_path / "tenders.sqlite"))
+    write_source(source, [make_tender(1, today - timedelta(days=2)), make_tender(2, today + timedelta(days=30))])
+    # Stored while both were in the source (upserts do not filter by deadline)
+    store.upsert_records(iter_records(str(source)))
+
+    write_source(source, [make_tender(3, today + timedelta(days=30))])
+    _, _, _, stats = sync_store(store, str(source), changefeed_file=None, archive_dir=archive_dir)
+
+    assert stats["removed"] == 2
+    assert stats["archived"] == 1
+    assert archived_ids(archive_dir) == ["https://example.org/tender/1"]
+
+
+def test_as_of_leaves_out_tenders_without_a_published_date(tmp_path):
+    archive_dir = str(tmp_path / "archive")
+    dated = make_tender(1, datetime(2025, 3, 20))
+    dated["details"]["Published date"] = "01 March 2025"
+    late = make_tender(2, datetime(2025, 3, 25))
+    late["details"]["Published date"] = "15 March 2025"
+    undated = make_tender(3, datetime(2025, 12, 1))
+    source = tmp_path / "tenders.json"
+    write_source(source, [dated, late, undated])
+    backfill(str(source), archive_dir)
+
+    open_then, undated_count = as_of(archive_dir, datetime(2025, 3, 10))
+    assert open_then["tender_id"].tolist() == ["https://example.org/tender/1"]
+    assert undated_count == 1
+
+
+def test_buyer_trends_merge_cc_with_the_spelled_out_council(tmp_path):
+    archive_dir = str(tmp_path / "archive")
+    tenders = [make_tender(i, datetime(2025, 3, 10 + i)) for i in range(4)]
+    for tender, organisation in zip(tenders, ["Leeds CC", "Leeds City Council", "Leeds City Council", "Kent CC"]):
+        tender["organisation"] = organisation
+    source = tmp_path / "tenders.json"
+    write_source(source, tenders)
+    backfill(str(source), archive_dir)
+
+    counts = trends(archive_dir, by="buyer").set_index("Buyer")["Tender Count"].to_dict()
+    assert counts == {"Leeds City Council": 3, "Kent CC": 1}
+
+
+def test_partitions_are_compacted_and_ids_come_from_the_manifest(tmp_path, monkeypatch):
+    monkeypatch.setattr(tender_archive, "MAX_PARTITION_PARTS", 3)
+    archive_dir = str(tmp_path / "archive")
+    source = tmp_path / "tenders.json"
+    write_source(source, [make_tender(i, datetime(2025, 3, 1 + i)) for i in range(20)])
+    rows = [record.to_row() for record in iter_records(str(source))]
+
+    id_reads = []
+    read_table = pq.read_table
+
+    def counting_read_table(path, **kwargs):
+        if kwargs.get("columns") == ["tender_id"]:
+            id_reads.append(path)
+        return read_table(path, **kwargs)
+
+    monkeypatch.setattr(pq, "read_table", counting_read_table)
+    directory = partition_dir(archive_dir, "2025-03")
+    for i in range(10):
+        # Each ingest offers every tender seen so far, as the expiry sweep does
+        assert archive_rows(rows[:2 * (i + 1)], archive_dir) == 2
+        assert len(glob.glob(os.path.join(directory, "part-*.parquet"))) <= 3
+    assert id_reads == []
+    assert archived_ids(archive_dir) == sorted(row[10] for row in rows)
+
+    # A manifest that does not list the current parts is rebuilt from the Parquet files
+    os.remove(os.path.join(directory, tender_archive.MANIFEST_FILE))
+    assert archive_rows(rows, archive_dir) == 0
+    assert id_reads
+    assert archive_rows(rows, archive_dir) == 0
+    assert len(archived_ids(archive_dir)) == 20
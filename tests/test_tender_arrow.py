@@ -0,0 +1,45 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from tender_arrow import load_shared_snapshot
+from tender_data import build_events, load_and_process_data
+
+
+def portal_tender(i, host, title):
+    return {
+        "title": title,
+        "link": f"https://{host}/notice/{i}",
+        "organisation": "Leeds City Council",
+        "cpv_codes": ["77310000"],
+        "cpv_descriptions": ["Grounds maintenance"],
+        "details": {
+            "Submission deadline": (datetime.today() + timedelta(days=10 + i % 2)).strftime("%d %B %Y"),
+            "Contract location": "UKE42 - Leeds",
+        },
+    }
+
+
+def test_arrow_events_match_the_pandas_path(tmp_path):
+    tenders = [
+        portal_tender(0, "find-tender.example", "Grounds maintenance framework for parks and open spaces"),
+        portal_tender(2, "contracts-finder.example", "Grounds maintenance framework for parks and open spaces"),
+        portal_tender(1, "find-tender.example", "Street lighting maintenance and repair services"),
+    ]
+    source = tmp_path / "tenders.json"
+    source.write_text(json.dumps({"tenders": tenders}))
+    build = lambda path: load_and_process_data(path, quarantine_file=None, changefeed_file=None)
+
+    df, events, _, stats = build(str(source))
+    assert stats["duplicates"] == 1
+    arrow_df, arrow_events, _, _ = load_shared_snapshot(str(source), str(tmp_path / "snapshots"), build=build)
+    assert arrow_events is None
+
+    rebuilt = build_events(arrow_df)
+    assert rebuilt == events
+    assert [event["extendedProps"].get("sources") for event in rebuilt] == [
+        ["https://find-tender.example/notice/0", "https://contracts-finder.example/notice/2"], None,
+    ]
@@ -0,0 +1,44 @@
+from datetime import datetime
+
+from tender_buyers import BuyerAggregates, buyer_key_variants, normalise_buyer
+
+
+def test_name_variants_share_a_key():
+    key = normalise_buyer("Leeds Borough Council")
+    assert normalise_buyer("The Leeds B.C.") == key
+    assert normalise_buyer("LEEDS BC") == key
+    assert normalise_buyer("Leeds Borough Council Ltd") == key
+
+
+def entry(organisation):
+    return (organisation, "title", "", datetime(2030, 1, 1), "Leeds", (), None)
+
+
+def test_cc_joins_the_council_of_the_same_place():
+    buyers = BuyerAggregates()
+    buyers.sync({
+        1: entry("Leeds CC"), 2: entry("Leeds City Council"),
+        3: entry("Kent C.C."), 4: entry("Kent County Council"),
+    })
+    assert sorted(buyers.ranking_frame()["key"]) == ["kent county council", "leeds city council"]
+    assert buyers.buyer("leeds city council")["count"] == 2
+
+
+def test_cc_stays_apart_until_its_expansion_is_known():
+    buyers = BuyerAggregates()
+    buyers.sync({1: entry("Leeds CC")})
+    assert buyers.buyer("leeds cc")["count"] == 1
+
+    # The spelled-out council appears later: the earlier tender moves over to it
+    buyers.sync({1: entry("Leeds CC"), 2: entry("Leeds City Council")})
+    assert buyers.buyer("leeds cc") is None
+    assert buyers.buyer("leeds city council")["count"] == 2
+
+    # Both expansions present: "CC" cannot be placed, so it keeps its own key
+    buyers.sync({1: entry("Leeds CC"), 2: entry("Leeds City Council"), 3: entry("Leeds County Council")})
+    assert buyers.buyer("leeds cc")["count"] == 1
+
+
+def test_key_variants_include_the_abbreviation():
+    assert buyer_key_variants("leeds city council") == {"leeds city council", "leeds cc"}
+    assert buyer_key_variants("leeds cc") == {"leeds cc", "leeds city council", "leeds county council"}
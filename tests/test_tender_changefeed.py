@@ -0,0 +1,40 @@
+import json
+
+from tender_changefeed import STORE_HASH_SCHEME, ChangeFeed
+
+
+def feed_entries(path):
+    with open(path, encoding="utf-8") as f:
+        return [(entry["change"], entry["tender_id"]) for entry in map(json.loads, f)]
+
+
+def test_first_snapshot_is_a_baseline(tmp_path):
+    feed = ChangeFeed(str(tmp_path / "changefeed.jsonl"))
+    assert feed.apply({"a": ("h1", "A")}) == {"new": [], "changed": [], "removed": []}
+
+    changes = feed.apply({"a": ("h2", "A"), "b": ("h1", "B")})
+    assert changes == {"new": [("b", "B")], "changed": [("a", "A")], "removed": []}
+
+
+def test_processes_sharing_a_feed_report_each_change_once(tmp_path):
+    path = str(tmp_path / "changefeed.jsonl")
+    # Two instances stand in for the dashboard and API processes
+    dashboard, api = ChangeFeed(path), ChangeFeed(path)
+    dashboard.apply({"a": ("h1", "A")})
+
+    assert api.apply({"a": ("h1", "A"), "b": ("h1", "B")})["new"] == [("b", "B")]
+    assert dashboard.apply({"a": ("h1", "A"), "b": ("h1", "B")})["new"] == []
+    assert api.apply({"b": ("h1", "B")})["removed"] == [("a", "A")]
+    assert dashboard.apply({"b": ("h1", "B")})["removed"] == []
+    assert feed_entries(path) == [("new", "b"), ("removed", "a")]
+
+
+def test_hash_schemes_keep_separate_state(tmp_path):
+    feed = ChangeFeed(str(tmp_path / "changefeed.jsonl"))
+    feed.apply({"a": ("raw-hash", "A")})
+    feed.apply({"a": ("raw-hash", "A")})
+
+    # Switching to the store's hashes starts a new baseline instead of reporting every tender as changed
+    assert feed.apply({"a": ("store-hash", "A")}, scheme=STORE_HASH_SCHEME)["changed"] == []
+    assert feed.apply({"a": ("store-hash", "A")}, scheme=STORE_HASH_SCHEME)["changed"] == []
+    assert feed.apply({"a": ("raw-hash", "A")})["changed"] == []
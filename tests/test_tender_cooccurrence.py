@@ -0,0 +1,79 @@
+import random
+from collections import Counter
+from itertools import combinations
+
+import pytest
+
+from tender_cooccurrence import CpvCooccurrence
+
+CODES = [f"{n}0000000 - Code {n}" for n in range(1, 7)]
+
+
+def recount(current):
+    code_counts, pair_counts = Counter(), Counter()
+    for pairs in current.values():
+        pairs = sorted(set(pairs))
+        code_counts.update(pairs)
+        pair_counts.update(combinations(pairs, 2))
+    return code_counts, pair_counts
+
+
+def expected_related(current, code, limit=5, min_count=2):
+    code_counts, pair_counts = recount(current)
+    results = []
+    for (first, second), together in pair_counts.items():
+        if code not in (first, second) or together < min_count:
+            continue
+        other = second if first == code else first
+        lift = together * len(current) / (code_counts[code] * code_counts[other])
+        if lift > 1:
+            results.append((other, together, lift))
+    results.sort(key=lambda result: (-result[2], -result[1], result[0]))
+    return results[:limit]
+
+
+def test_incremental_sync_matches_a_full_recount():
+    rng = random.Random(2)
+    index = CpvCooccurrence()
+    current = {}
+    for _ in range(30):
+        # Add, change and remove tenders between refreshes; duplicate pairs count once
+        current = {tender_id: pairs for tender_id, pairs in current.items() if rng.random() > 0.2}
+        for tender_id in rng.sample(range(60), 15):
+            current[tender_id] = rng.choices(CODES, k=rng.randint(0, 4))
+        index.sync(current)
+
+        code_counts, pair_counts = recount(current)
+        assert index.code_counts == code_counts
+        assert index.pair_counts == pair_counts
+        assert len(index) == len(current)
+        for code in CODES:
+            assert index.related(code) == pytest.approx(expected_related(current, code))
+
+
+def test_sync_reports_added_and_removed_tenders():
+    index = CpvCooccurrence()
+    assert index.sync({"a": [CODES[0], CODES[1]], "b": [CODES[0]]}) == (2, 0)
+    # Unchanged tenders are skipped, even when their pairs arrive in another order
+    assert index.sync({"a": [CODES[1], CODES[0], CODES[1]], "b": [CODES[0]]}) == (0, 0)
+    # A changed tender is removed and re-added; a dropped one is removed
+    assert index.sync({"a": [CODES[0], CODES[2]]}) == (1, 2)
+    assert index.pair_counts == Counter({(CODES[0], CODES[2]): 1})
+    assert index.sync({}) == (0, 1)
+    assert not index.code_counts and not index.pair_counts
+    assert index.related(CODES[0], min_count=1) == []
+
+
+def test_related_ranks_by_lift_and_drops_rare_or_unrelated_pairs():
+    a, b, c, d, e = CODES[:5]
+    current = {
+        1: [a, b], 2: [a, b], 3: [a, c], 4: [a, c], 5: [c], 6: [a, d], 7: [e], 8: [e], 9: [e],
+    }
+    index = CpvCooccurrence()
+    index.sync(current)
+    # b only ever appears with a, so it has a higher lift than c; d is tagged with a only once
+    assert [other for other, _, _ in index.related(a)] == [b, c]
+    # Equal lift ranks the more frequent pair first
+    assert [other for other, _, _ in index.related(a, min_count=1)] == [b, d, c]
+    assert index.related(a, limit=1)[0][:2] == (b, 2)
+    assert index.related("unknown") == []
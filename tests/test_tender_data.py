@@ -0,0 +1,19 @@
+from datetime import datetime
+
+from tender_data import process_tenders
+
+
+def raw_tender(i, deadline):
+    details = {"Contract location": "Unknown"}
+    if deadline is not None:
+        details["Submission deadline"] = deadline
+    return {"title": f"tender {i}", "link": f"https://example.org/tender/{i}", "details": details}
+
+
+def test_missing_deadline_is_skipped_but_a_bad_one_is_quarantined():
+    result = process_tenders(
+        [raw_tender(1, "01 December 2030"), raw_tender(2, None), raw_tender(3, "sometime soon")],
+        datetime(2030, 11, 1),
+    )
+    assert list(result["tenders"]) == ["https://example.org/tender/1"]
+    assert [entry["tender"]["link"] for entry in result["quarantined"]] == ["https://example.org/tender/3"]
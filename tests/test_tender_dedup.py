@@ -0,0 +1,70 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from tender_dedup import _MERSENNE_PRIME, deduplicate, minhash_signatures
+
+
+def test_minhash_matches_exact_modular_hashing():
+    values = np.array([0, 1, 0xFFFFFFFF, 0xDEADBEEF, 12345], dtype=np.uint64)
+    signatures = minhash_signatures(values, np.array([5]), num_permutations=8, seed=3)
+
+    rng = np.random.default_rng(3)
+    a = rng.integers(1, 1 << 32, size=8, dtype=np.uint64)
+    b = rng.integers(0, 1 << 32, size=8, dtype=np.uint64)
+    p = int(_MERSENNE_PRIME)
+    expected = [min(((int(ai) * int(x) + int(bi)) % p) & 0xFFFFFFFF for x in values) for ai, bi in zip(a, b)]
+    assert signatures[0].tolist() == expected
+
+
+def test_canonical_copy_is_the_earliest_published():
+    deadline = datetime(2030, 1, 10)
+    df = pd.DataFrame({
+        "title": ["Road resurfacing framework for the north region"] * 3,
+        "organisation": ["Leeds City Council"] * 3,
+        "deadline": [deadline] * 3,
+        "link": ["https://a.example/1", "https://b.example/1", "https://c.example/1"],
+        "published": [datetime(2029, 12, 5), None, datetime(2029, 12, 1)],
+    })
+    events = [{"extendedProps": {}} for _ in range(3)]
+
+    deduped, _, removed = deduplicate(df, events)
+    assert removed == 2
+    assert deduped["link"].tolist() == ["https://c.example/1"]
+    assert deduped["sources"][0] == ["https://c.example/1", "https://a.example/1", "https://b.example/1"]
+
+
+def dedup_frame(titles, links):
+    return pd.DataFrame({
+        "title": titles,
+        "organisation": ["Leeds City Council"] * len(titles),
+        "deadline": [datetime(2030, 1, 10)] * len(titles),
+        "link": links,
+        "published": [None] * len(titles),
+    })
+
+
+def test_lots_from_one_portal_are_kept_apart():
+    titles = [f"Lot {n} - Grounds maintenance services for parks and open spaces" for n in range(1, 5)]
+    links = [f"https://www.find-tender.service.gov.uk/Notice/{n}" for n in range(4)]
+    df = dedup_frame(titles, links)
+    deduped, events, removed = deduplicate(df, [{"extendedProps": {}} for _ in titles])
+    assert removed == 0
+    assert len(deduped) == len(events) == 4
+
+
+def test_numbered_titles_are_distinct_even_across_portals():
+    titles = ["Tender 1 for road works", "Tender 2 for road works"]
+    df = dedup_frame(titles, ["https://a.example/1", "https://b.example/2"])
+    assert deduplicate(df, [{"extendedProps": {}}, {"extendedProps": {}}])[2] == 0
+
+
+def test_one_copy_per_portal_in_a_group():
+    title = "Road resurfacing framework for the north region"
+    links = ["https://a.example/1", "https://b.example/1", "https://a.example/2", ""]
+    df = dedup_frame([title] * 4, links)
+    deduped, _, removed = deduplicate(df, [{"extendedProps": {}} for _ in links])
+    # The second notice on a.example and the unlinked notice stay separate
+    assert removed == 1
+    assert deduped["sources"][0] == ["https://a.example/1", "https://b.example/1"]
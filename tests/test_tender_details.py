@@ -0,0 +1,33 @@
+import json
+
+import pandas as pd
+
+from tender_details import decode_details, detail_column, detail_keys, parse_detail_date, parse_money
+
+
+def test_parse_money():
+    assert parse_money("£623,000") == 623000
+    assert parse_money("£1.2m") == 1200000
+    assert parse_money("£10,000 - £20,000") == 10000
+    assert parse_money("N/A") is None
+
+
+def test_parse_detail_date_reads_iso_before_day_first():
+    assert parse_detail_date("2025-03-04T10:00:00+01:00") == pd.Timestamp("2025-03-04 09:00")
+    assert parse_detail_date("2025-03-04") == pd.Timestamp("2025-03-04")
+    assert parse_detail_date("04/03/2025") == pd.Timestamp("2025-03-04")
+    assert parse_detail_date("not a date") is None
+
+
+def test_detail_columns_are_typed_from_decoded_details():
+    decoded = decode_details([
+        json.dumps({"Value": "£1m", "Published date": "2025-03-04", "Procedure type": "Open"}),
+        json.dumps({"Value": "£250k"}),
+        "",
+    ])
+    assert detail_keys(decoded) == [("Value", "money"), ("Procedure type", "text"), ("Published date", "date")]
+
+    values = detail_column(["a", "b", "c"], decoded, "Value")
+    assert values["a"] == 1e6 and values["b"] == 250000 and pd.isna(values["c"])
+    published = detail_column(["a", "b", "c"], decoded, "Published date")
+    assert published["a"] == pd.Timestamp("2025-03-04") and pd.isna(published["b"])
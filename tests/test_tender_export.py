@@ -0,0 +1,86 @@
+import csv
+import io
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from tender_export import _ics_fold, export_frame, iter_csv, iter_ics, iter_parquet
+
+
+def tenders(n=5):
+    return pd.DataFrame({
+        "title": [f"Tender {i}; roads, bridges \\ tunnels\nphase {i}" for i in range(n)],
+        "deadline": [datetime(2030, 1, 1 + i, 12) for i in range(n)],
+        "organisation": ["Café Council"] * n,
+        "cpv_pairs": [["45233000 - Road works", "45221000 - Bridges"]] * n,
+        "link": [f"https://example.org/{i}" if i else "" for i in range(n)],
+        "Contract location": ["UKI41 - Hackney"] * n,
+        "latitude": [51.5] * n,
+        "longitude": [-0.05] * n,
+    })
+
+
+def unfold(text):
+    return text.replace("\r\n ", "")
+
+
+def unescape(value):
+    out, i = [], 0
+    while i < len(value):
+        if value[i] == "\\":
+            out.append("\n" if value[i + 1] == "n" else value[i + 1])
+            i += 2
+        else:
+            out.append(value[i])
+            i += 1
+    return "".join(out)
+
+
+@pytest.mark.parametrize("line", ["SUMMARY:" + "x" * 200, "SUMMARY:" + "é" * 100, "SUMMARY:" + "a€" * 70, "SHORT:ok"])
+def test_fold_keeps_lines_within_75_octets_without_splitting_characters(line):
+    folded = _ics_fold(line)
+    physical = folded.split("\r\n")[:-1]
+    assert all(len(part.encode("utf-8")) <= 75 for part in physical)
+    assert all(part.startswith(" ") for part in physical[1:])
+    assert unfold(folded) == line + "\r\n"
+
+
+def test_ics_escapes_text_and_folds_long_properties():
+    df = tenders()
+    feed = b"".join(iter_ics(df, chunk_rows=2)).decode("utf-8")
+    assert feed.startswith("BEGIN:VCALENDAR\r\n") and feed.endswith("END:VCALENDAR\r\n")
+    assert all(len(line.encode("utf-8")) <= 75 for line in feed.split("\r\n"))
+
+    lines = unfold(feed).split("\r\n")
+    summaries = [line[len("SUMMARY:"):] for line in lines if line.startswith("SUMMARY:")]
+    assert [unescape(summary) for summary in summaries] == df["title"].tolist()
+    assert r"SUMMARY:Tender 0\; roads\, bridges \\ tunnels\nphase 0" in lines
+    assert lines.count("BEGIN:VEVENT") == 5
+    assert "DTSTART;VALUE=DATE:20300101" in lines and "DTEND;VALUE=DATE:20300102" in lines
+    # Only tenders with a link get a URL
+    assert sum(line.startswith("URL:") for line in lines) == 4
+    assert "CATEGORIES:45233000 - Road works | 45221000 - Bridges" in lines
+
+
+def test_csv_round_trips_through_the_csv_module():
+    df = tenders()
+    rows = list(csv.reader(io.StringIO(b"".join(iter_csv(df, chunk_rows=2)).decode("utf-8"))))
+    assert rows[0][:2] == ["title", "deadline"]
+    assert [row[0] for row in rows[1:]] == df["title"].tolist()
+
+
+def test_parquet_streams_one_row_group_per_chunk():
+    pq = pytest.importorskip("pyarrow.parquet")
+    df = tenders()
+    parts = list(iter_parquet(df, chunk_rows=2))
+    # Bytes are yielded as each row group is written, not only at the end
+    assert sum(1 for part in parts[:-1] if part) >= 3
+
+    table = pq.read_table(io.BytesIO(b"".join(parts)))
+    assert table.num_rows == 5
+    assert pq.ParquetFile(io.BytesIO(b"".join(parts))).num_row_groups == 3
+    expected = export_frame(df)
+    result = table.to_pandas()
+    assert result["title"].tolist() == expected["title"].tolist()
+    assert (result["deadline"] == expected["deadline"]).all()
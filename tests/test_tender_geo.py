@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from tender_geo import GridIndex, haversine_km, location_code, parse_points, proximity_mask
+
+
+def test_country_token_does_not_widen_a_regional_match():
+    assert location_code("UKI41 - Hackney, UK") == "UKI41"
+    assert location_code("UKI4, UKI3, UK") == "UKI"
+
+
+def test_country_code_alone_still_resolves():
+    assert location_code("UK") == "UK"
+    assert location_code("UKD3 - Greater Manchester") == "UKD3"
+
+
+def test_shared_names_resolve_to_the_most_specific_code():
+    assert location_code("Lincolnshire") == "UKF30"
+
+
+def test_ordinary_words_are_not_region_codes():
+    assert location_code("TLC Facilities, Leeds") is None
+    assert location_code("UKAS accredited laboratory") is None
+    assert location_code("uki41 - Hackney") is None
+    assert location_code("TLC - North East") == "UKC"
+    assert location_code("TLI41 - Hackney") == "UKI41"
+
+
+def grid_points():
+    rng = np.random.default_rng(11)
+    # Random UK-ish points plus points exactly on grid lines, repeated like shared region centroids
+    latitude = np.concatenate([rng.uniform(49.5, 59, 300), [51.0, 51.5, 52.0, 51.5, 51.25], [np.nan]])
+    longitude = np.concatenate([rng.uniform(-8, 2, 300), [-0.5, 0.0, -1.0, -0.5, 0.0], [0.0]])
+    return np.repeat(latitude, 2), np.repeat(longitude, 2)
+
+
+@pytest.mark.parametrize("cell_degrees", [0.5, 0.1, 3.0])
+def test_radius_queries_match_a_full_scan(cell_degrees):
+    latitude, longitude = grid_points()
+    index = GridIndex(latitude, longitude, cell_degrees)
+    for centres, radius_km in [
+        ([(51.5, 0.0)], 0.0), ([(51.5, 0.0)], 55.6), ([(51.5, -0.5)], 120.0),
+        ([(51.0, -0.5), (55.9, -3.2)], 40.0), ([(53.0, -8.0)], 500.0),
+    ]:
+        expected = np.zeros(len(latitude), dtype=bool)
+        for centre in centres:
+            with np.errstate(invalid="ignore"):
+                expected |= haversine_km(latitude, longitude, *centre) <= radius_km
+        assert (index.within_radius(centres, radius_km) == expected).all()
+
+
+def test_radius_includes_points_exactly_on_the_boundary():
+    latitude, longitude = np.array([51.5, 51.5]), np.array([0.0, 0.5])
+    distance = float(haversine_km(latitude[1:], longitude[1:], 51.5, 0.0)[0])
+    index = GridIndex(latitude, longitude)
+    assert index.within_radius([(51.5, 0.0)], distance).tolist() == [True, True]
+    assert index.within_radius([(51.5, 0.0)], distance * 0.999).tolist() == [True, False]
+
+
+@pytest.mark.parametrize("cell_degrees", [0.5, 0.1])
+def test_bbox_edges_are_inclusive(cell_degrees):
+    latitude, longitude = grid_points()
+    index = GridIndex(latitude, longitude, cell_degrees)
+    for south, west, north, east in [(51.0, -1.0, 52.0, 0.0), (51.5, 0.0, 51.5, 0.0), (50, -8, 59, 2), (60, 0, 61, 1)]:
+        with np.errstate(invalid="ignore"):
+            expected = (latitude >= south) & (latitude <= north) & (longitude >= west) & (longitude <= east)
+        assert (index.within_bbox(south, west, north, east) == expected).all()
+    # Rows without coordinates never match
+    assert not index.within_bbox(-90, -180, 90, 180)[-2:].any()
+
+
+def test_proximity_mask_and_point_parsing():
+    index = GridIndex([51.5], [0.0])
+    assert proximity_mask(index, None) is None
+    assert proximity_mask(index, ("radius", parse_points("51.5, 0.0; 55, -3"), 1)).tolist() == [True]
+    assert proximity_mask(index, ("bbox", (51, -1, 52, 1))).tolist() == [True]
+    with pytest.raises(ValueError):
+        parse_points("91, 0")
+    with pytest.raises(ValueError):
+        parse_points("51.5")
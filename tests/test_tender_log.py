@@ -0,0 +1,117 @@
+import json
+import os
+from datetime import datetime, timedelta
+
+import tender_data
+from tender_data import load_and_process_data
+from tender_log import append_tenders, compact_log
+
+
+def make_tender(i, title=None):
+    deadline = datetime.today() + timedelta(days=30 + i % 100)
+    return {
+        "title": title or f"tender number {i} for distinct work {i * 7919}",
+        "link": f"https://example.org/tender/{i}",
+        "organisation": f"Buyer {i}",
+        "cpv_codes": ["72000000"],
+        "cpv_descriptions": ["IT services"],
+        "details": {"Submission deadline": deadline.strftime("%d %B %Y"), "Contract location": "Unknown"},
+    }
+
+
+def load(path):
+    df, _, _, stats = load_and_process_data(str(path), quarantine_file=None, changefeed_file=None)
+    return df, stats
+
+
+def test_partial_last_line_waits_for_its_newline(tmp_path):
+    path = tmp_path / "tenders.ndjson"
+    append_tenders(path, [make_tender(i) for i in range(3)])
+    line = json.dumps(make_tender(3))
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line[:20])
+
+    df, stats = load(path)
+    assert len(df) == 3
+    assert stats["log_lines"] == 3
+
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line[20:] + "\n")
+    df, stats = load(path)
+    assert len(df) == 4
+    assert stats["log_lines"] == 1
+    assert stats["quarantined"] == 0
+
+
+def test_later_versions_supersede_earlier_ones(tmp_path):
+    path = tmp_path / "tenders.ndjson"
+    append_tenders(path, [make_tender(i) for i in range(3)])
+    load(path)
+
+    append_tenders(path, [make_tender(1, title="amended title")])
+    df, stats = load(path)
+    assert stats["log_lines"] == 1
+    assert len(df) == 3
+    assert (df["title"] == "amended title").sum() == 1
+
+
+def test_external_compaction_rereads_the_new_file(tmp_path):
+    path = tmp_path / "tenders.ndjson"
+    append_tenders(path, [make_tender(i) for i in range(5)])
+    append_tenders(path, [make_tender(i, title=f"second version {i}") for i in range(5)])
+    load(path)
+    inode = os.stat(path).st_ino
+
+    stats = compact_log(path)
+    assert (stats["lines"], stats["kept"]) == (10, 5)
+    assert os.stat(path).st_ino != inode
+
+    append_tenders(path, [make_tender(5)])
+    df, stats = load(path)
+    # The checkpoint pointed into the replaced file, so the compacted log is read in full
+    assert stats["log_lines"] == 6
+    assert len(df) == 6
+    assert df["title"].str.startswith("second version").sum() == 5
+
+
+def test_truncated_log_is_read_from_the_start(tmp_path):
+    path = tmp_path / "tenders.ndjson"
+    append_tenders(path, [make_tender(i) for i in range(5)])
+    load(path)
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(make_tender(9)) + "\n")
+    df, stats = load(path)
+    assert stats["log_lines"] == 1
+    assert df["link"].tolist() == ["https://example.org/tender/9"]
+
+
+def test_loader_does_not_compact_by_default(tmp_path):
+    path = tmp_path / "tenders.ndjson"
+    for version in range(3):
+        append_tenders(path, [make_tender(i, title=f"version {version} of {i}") for i in range(400)])
+    inode = os.stat(path).st_ino
+
+    _, stats = load(path)
+    assert stats["compacted"] == 0
+    assert os.stat(path).st_ino == inode
+
+
+def test_self_compaction_keeps_following_the_rewritten_log(tmp_path, monkeypatch):
+    monkeypatch.setattr(tender_data, "COMPACT_RATIO", 2.0)
+    path = tmp_path / "tenders.ndjson"
+    for version in range(3):
+        append_tenders(path, [make_tender(i, title=f"version {version} of {i}") for i in range(400)])
+
+    df, stats = load(path)
+    assert stats["compacted"] == 800
+    assert len(df) == 400
+    with open(path, encoding="utf-8") as f:
+        assert sum(1 for _ in f) == 400
+
+    append_tenders(path, [make_tender(400)])
+    df, stats = load(path)
+    # Resumed from the end of the compacted versions instead of re-reading them
+    assert stats["log_lines"] == 1
+    assert len(df) == 401
+    assert df["title"].str.startswith("version 2").sum() == 400
@@ -0,0 +1,49 @@
+import threading
+
+from tender_memory import DerivedCache, FilterPopularity
+
+
+def test_popularity_ranks_and_decays_old_states():
+    popularity = FilterPopularity(max_tracked=3)
+    for _ in range(4):
+        popularity.record("popular")
+    popularity.record("once")
+    popularity.record("twice")
+    popularity.record("twice")
+    assert popularity.most_common(1) == [("popular", 4)]
+
+    # A fourth state halves every count and forgets the ones that reach zero
+    popularity.record("new")
+    assert dict(popularity.most_common(10)) == {"popular": 2, "twice": 1}
+
+
+def test_ranking_while_recording_from_other_threads():
+    popularity = FilterPopularity(max_tracked=500)
+    stop = threading.Event()
+
+    def record():
+        i = 0
+        while not stop.is_set():
+            popularity.record(("cpv", i % 2000))
+            i += 1
+
+    threads = [threading.Thread(target=record) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    try:
+        for _ in range(200):
+            assert len(popularity.most_common(12)) <= 12
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+    assert len(popularity) <= 500
+
+
+def test_cached_none_is_a_hit():
+    cache = DerivedCache(1 << 20)
+    calls = []
+    for _ in range(3):
+        assert cache.get_or_compute(("shared", "map", 1), lambda: calls.append(1)) is None
+    assert len(calls) == 1
+    assert cache.usage()["hits"]["map"] == 2
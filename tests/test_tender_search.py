@@ -0,0 +1,47 @@
+import random
+
+import pandas as pd
+
+from tender_search import CpvIndex, live_cpv_counts
+
+COUNTS = {
+    "72000000 - IT services": 40,
+    "72200000 - Software programming and consultancy services": 12,
+    "90910000 - Cleaning services": 40,
+    "90911200 - Building-cleaning services": 3,
+    "45233000 - Road works": 0,
+    "85100000 - Health services": 25,
+}
+
+
+def brute_force(counts, query, limit):
+    ranked = sorted(counts, key=lambda label: (-counts[label], label))
+    return [label for label in ranked if query.strip().lower() in label.lower()][:limit]
+
+
+def test_search_ranks_substring_matches_by_live_count():
+    index = CpvIndex(COUNTS)
+    assert index.search("SERVICES", limit=3) == [
+        "72000000 - IT services", "90910000 - Cleaning services", "85100000 - Health services",
+    ]
+    assert index.search("7220") == ["72200000 - Software programming and consultancy services"]
+    assert index.search("  clean ") == ["90910000 - Cleaning services", "90911200 - Building-cleaning services"]
+    assert index.search("no such work") == []
+    assert index.count("45233000 - Road works") == 0
+    assert index.count("unknown") == 0
+
+
+def test_search_matches_a_linear_scan():
+    index = CpvIndex(COUNTS)
+    queries = ["", "s", "se", "ser", "9091", "ing s", "-", " - ", "road", "ices", "x"]
+    random.seed(5)
+    queries += ["".join(random.choice("aeinorstcl 90") for _ in range(3)) for _ in range(50)]
+    for query in queries:
+        for limit in (1, 2, 50):
+            assert index.search(query, limit) == brute_force(COUNTS, query, limit), query
+
+
+def test_live_counts_explode_cpv_pairs():
+    df = pd.DataFrame({"cpv_pairs": [["a", "b"], ["a"], []]})
+    assert live_cpv_counts(df) == {"a": 2, "b": 1}
+    assert live_cpv_counts(pd.DataFrame()) == {}
@@ -0,0 +1,39 @@
+import sys
+from datetime import datetime
+
+import pandas as pd
+
+from tender_memory import DerivedCache
+from tender_similar import SimilarityIndex
+
+
+def frame():
+    return pd.DataFrame({
+        "tender_id": ["a", "b", "c"],
+        "title": ["road resurfacing works", "road resurfacing and repairs", "school catering"],
+        "link": ["", "https://example.org/b", ""],
+        "organisation": ["Kent County Council"] * 3,
+        "deadline": [datetime(2026, 11, 1)] * 3,
+        "cpv_pairs": [["45233000 - Road works"], ["45233000 - Road works"], ["55520000 - Catering"]],
+    })
+
+
+def test_tenders_without_links_get_neighbours():
+    index = SimilarityIndex.from_frame(frame())
+    similar = index.similar_to("a")
+    assert similar[0]["link"] == "https://example.org/b"
+    assert [tender["title"] for tender in index.similar_to("b")][0] == "road resurfacing works"
+    assert index.similar_to("missing") == []
+
+
+def test_memo_growth_is_counted_in_the_cache_budget():
+    cache = DerivedCache(1 << 30)
+    key = ("shared", "similar", 1)
+    index = cache.put(key, SimilarityIndex.from_frame(frame()))
+    stored = cache.usage()["derived_bytes"]
+
+    index.similar_to("a")
+    index.similar_to("b")
+    cache.refresh(key)
+    assert cache.usage()["derived_bytes"] > stored
+    assert cache.usage()["derived_bytes"] >= sys.getsizeof(index)
@@ -0,0 +1,27 @@
+import threading
+import time
+
+from tender_snapshot import SnapshotWatcher
+
+
+def test_first_snapshot_is_ready_before_derived_indexes(tmp_path):
+    source = tmp_path / "tenders.json"
+    source.write_text("{}")
+    release, indexed = threading.Event(), []
+    watcher = SnapshotWatcher(str(source), lambda path: (None, [], []), poll_interval=0.05)
+    watcher.on_publish.append(lambda snapshot: release.wait(10) and indexed.append(snapshot.version))
+    watcher.start()
+    try:
+        # Served while the slow callback is still running
+        assert watcher.current(timeout=5).version == 1
+        assert watcher.indexed_version == 0
+        release.set()
+        for _ in range(100):
+            if watcher.indexed_version == 1:
+                break
+            time.sleep(0.05)
+        assert indexed == [1]
+        assert watcher.indexed_version == 1
+    finally:
+        watcher.stop()
+        watcher.join(5)
@@ -0,0 +1,74 @@
+import json
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from tender_data import filter_tenders, load_and_process_data
+from tender_store import TenderStore, sync_store
+
+CPVS = [("72000000", "IT services"), ("90910000", "Cleaning services"), ("45233000", "Road works")]
+COLUMNS = ["tender_id", "title", "organisation", "deadline", "Contract location", "cpv_pairs"]
+
+
+def make_tender(i):
+    codes = [CPVS[i % 3], CPVS[(i + 1) % 3]] if i % 4 == 0 else [CPVS[i % 3]]
+    return {
+        "title": f"Store tender {i} for contract number {i * 31}",
+        "link": f"https://example.org/tender/{i}",
+        "organisation": f"Buyer {i % 5}",
+        "cpv_codes": [code for code, _ in codes],
+        "cpv_descriptions": [description for _, description in codes],
+        # Four of the thirty have already closed
+        "details": {
+            "Submission deadline": (datetime.today() + timedelta(days=i - 4)).strftime("%d %B %Y"),
+            "Contract location": ["UKI41 - Hackney", "UKD3 - Greater Manchester", "Unknown"][i % 3],
+        },
+    }
+
+
+@pytest.fixture(scope="module")
+def frames(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("store")
+    source = directory / "tenders.json"
+    source.write_text(json.dumps({"tenders": [make_tender(i) for i in range(30)]}))
+    store = TenderStore(str(directory / "tenders.sqlite"))
+    sync_store(store, str(source), changefeed_file=None)
+    df, _, _, _ = load_and_process_data(str(source), quarantine_file=None, changefeed_file=None)
+    return store, df
+
+
+def comparable(df):
+    if df.empty:
+        return []
+    return sorted(
+        (row[0], row[1], row[2], pd.Timestamp(row[3]), row[4], tuple(row[5]))
+        for row in df[COLUMNS].itertuples(index=False)
+    )
+
+
+@pytest.mark.parametrize("cpv", ["All", "72000000 - IT services", "45233000 - Road works", "99999999 - None"])
+@pytest.mark.parametrize("days", [0, 5, 40])
+def test_query_matches_filter_tenders(frames, cpv, days):
+    store, df = frames
+    selected_date = (datetime.today() + timedelta(days=days)).date()
+    expected = filter_tenders(df, cpv, date_from=selected_date)
+    assert comparable(store.query_tenders(cpv, selected_date)) == comparable(expected)
+
+    summary = store.summary(cpv, selected_date)
+    assert summary["count"] == len(expected)
+    counts = store.location_counts(cpv, selected_date).set_index("Contract location")["Tender Count"].to_dict()
+    assert counts == expected["Contract location"].value_counts().to_dict()
+
+
+def test_day_and_id_lookups_match_the_snapshot(frames):
+    store, df = frames
+    day = (datetime.today() + timedelta(days=6)).date()
+    expected = filter_tenders(df, date_from=day, date_to=day)
+    assert len(expected) == 1
+    assert comparable(store.tenders_for_date(day)) == comparable(expected)
+
+    ids = df["tender_id"].tolist()[:3] + ["https://example.org/tender/0"]
+    # Closed tenders are not returned
+    assert comparable(store.tenders_by_ids(ids)) == comparable(df[df["tender_id"].isin(ids)])
+    assert store.cpv_details() == sorted({pair for pairs in df["cpv_pairs"] for pair in pairs})
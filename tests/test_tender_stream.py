@@ -0,0 +1,45 @@
+import io
+import json
+
+import pytest
+
+import tender_data
+from tender_data import JsonStreamReader, iter_tenders
+
+DOCUMENTS = [
+    '{"tenders":[0.1]}',
+    '{"tenders": [1e5, -2.5E-3, 10, true, null, false, "a\\"b", {"x": [1.25, {"y": "z"}]}]}',
+    '{"version": 1.5, "scraped": "2026-10-19", "tenders": [{"title": "Lot 1", "value": 12345.678}], "count": 1}',
+    '{"tenders": []}',
+    '{}',
+    ' { "meta" : { "pages" : [ 1 , 2.0 ] } , "tenders" : [ 3.14159 , { } ] } ',
+]
+
+
+def parse(document, chunk_size):
+    return list(iter_tenders(io.StringIO(document), chunk_size))
+
+
+@pytest.mark.parametrize("document", DOCUMENTS)
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 7, 64])
+def test_matches_json_load_at_any_chunk_size(document, chunk_size):
+    assert parse(document, chunk_size) == json.loads(document).get("tenders", [])
+
+
+@pytest.mark.parametrize("document", ['{"tenders": [1 2]}', '{"tenders": [1.]}', '{"a": 1 "tenders": []}'])
+def test_rejects_missing_separators_and_truncated_numbers(document):
+    with pytest.raises(ValueError):
+        parse(document, 2)
+
+
+def test_decode_value_waits_for_the_rest_of_a_number():
+    reader = JsonStreamReader(io.StringIO("12.5e3]"), chunk_size=1)
+    assert reader.decode_value() == 12.5e3
+    assert reader.next_separator("]")
+
+
+def test_metadata_float_across_the_default_chunk_boundary():
+    # The number starts 16 characters before the end of the first chunk and runs 14 past it
+    prefix = '{"note": "' + "x" * (tender_data.STREAM_CHUNK_SIZE - 40) + '", "version": '
+    document = prefix + "1" * 16 + '.25e-3, "tenders": [{"a": 1}]}'
+    assert list(iter_tenders(io.StringIO(document))) == [{"a": 1}]
@@ -0,0 +1,141 @@
+import json
+import random
+from datetime import datetime
+
+import pandas as pd
+
+from tender_changefeed import ChangeFeed
+from tender_watchlist import SavedSearches, SearchIndex, normalise_search, search_matches
+
+CPVS = ["45233000 - Road works", "45221000 - Bridges", "72000000 - IT services"]
+LOCATIONS = ["UKI41 - Hackney", "UKC - North East", "UKF30 - Lincolnshire"]
+WORDS = ["road", "bridge", "software", "cleaning", "council", "leeds"]
+
+
+def random_tender(rng, i):
+    latitude = rng.choice([51.5, 54.9, 53.2, float("nan")])
+    return {
+        "tender_id": f"t{i}",
+        "title": " ".join(rng.sample(WORDS, 2)) + f" {i}",
+        "organisation": rng.choice(["Leeds City Council", "Hackney Council", "Bridge Trust"]),
+        "cpv_pairs": rng.sample(CPVS, rng.randint(0, 2)),
+        "Contract location": rng.choice(LOCATIONS + [""]),
+        "latitude": latitude,
+        "longitude": -1.0 if latitude == latitude else float("nan"),
+        "deadline": datetime(2030, 1, 1),
+        "link": f"https://example.org/{i}",
+    }
+
+
+def random_search(rng):
+    proximity = rng.choice([
+        None,
+        ["radius", [[51.5, -1.0]], 100.0],
+        ["bbox", [53.0, -2.0, 55.0, 0.0]],
+    ])
+    return normalise_search(
+        rng.choice(["All"] + CPVS),
+        rng.choice([None, ""] + [location.lower() for location in LOCATIONS]),
+        rng.choice([None, "", "!!"] + WORDS + ["road bridge", "leeds council"]),
+        proximity,
+    )
+
+
+def test_index_matches_every_search_checked_directly():
+    rng = random.Random(4)
+    searches = {("user", n): random_search(rng) for n in range(200)}
+    # A search with no predicates matches everything and is checked against every tender
+    searches[("user", "everything")] = normalise_search()
+    index = SearchIndex(searches)
+
+    for i in range(300):
+        tender = random_tender(rng, i)
+        expected = {key for key, search in searches.items() if search_matches(search, tender)}
+        assert set(index.match(tender)) == expected
+
+
+def test_text_searches_need_every_word():
+    tender = random_tender(random.Random(0), 0) | {"title": "Road resurfacing", "organisation": "Leeds City Council"}
+    assert search_matches({"text": "road LEEDS"}, tender)
+    assert not search_matches({"text": "road bridge"}, tender)
+
+
+class Store:
+    """Stand-in for the processed tender lookup"""
+
+    def __init__(self):
+        self.rows = {}
+        self.requested = []
+
+    def __call__(self, tender_ids):
+        self.requested.append(list(tender_ids))
+        return pd.DataFrame([self.rows[tender_id] for tender_id in tender_ids if tender_id in self.rows])
+
+
+def tender(tender_id, title):
+    return {
+        "tender_id": tender_id, "title": title, "organisation": "Leeds City Council", "cpv_pairs": [],
+        "Contract location": "", "latitude": float("nan"), "longitude": float("nan"),
+        "deadline": datetime(2030, 1, 1), "link": "",
+    }
+
+
+def digest(saved, user):
+    with open(saved.digest_path(user), encoding="utf-8") as f:
+        return [(entry["search"], entry["tender_id"]) for entry in map(json.loads, f)]
+
+
+def test_process_changes_matches_each_change_once_from_the_checkpoint(tmp_path):
+    feed_path = str(tmp_path / "changefeed.jsonl")
+    feed = ChangeFeed(feed_path)
+    store = Store()
+    saved = SavedSearches(str(tmp_path / "saved.json"), str(tmp_path / "digests"), feed_path)
+    saved.save("ana", "roads", {"text": "road"})
+
+    store.rows["a"] = tender("a", "Road works")
+    feed.apply({"a": ("h1", "Road works")})
+    # First run checkpoints the end of the feed instead of replaying history
+    assert saved.process_changes(store) == 0
+    assert store.requested == []
+
+    store.rows["b"] = tender("b", "Road bridge")
+    store.rows["c"] = tender("c", "Cleaning")
+    feed.apply({"a": ("h2", "Road works"), "b": ("h1", "Road bridge"), "c": ("h1", "Cleaning")})
+    assert saved.process_changes(store) == 2
+    assert [sorted(ids) for ids in store.requested] == [["a", "b", "c"]]
+    assert sorted(digest(saved, "ana")) == [("roads", "a"), ("roads", "b")]
+
+    # Nothing new: the stored offset skips the lines already processed
+    assert saved.process_changes(store) == 0
+    assert len(store.requested) == 1
+
+    # Removals are not matched; a later change is
+    feed.apply({"a": ("h2", "Road works"), "b": ("h2", "Road bridge")})
+    assert saved.process_changes(store) == 1
+    assert store.requested[-1] == ["b"]
+    assert digest(saved, "ana")[-1] == ("roads", "b")
+
+
+def test_checkpoint_is_shared_and_partial_lines_wait(tmp_path):
+    feed_path = tmp_path / "changefeed.jsonl"
+    feed_path.write_text("")
+    state_path = str(tmp_path / "saved.json")
+    store = Store()
+    store.rows["a"] = tender("a", "Road works")
+    first = SavedSearches(state_path, str(tmp_path / "digests"), str(feed_path))
+    first.save("ana", "roads", {"text": "road"})
+    first.process_changes(store)
+
+    line = json.dumps({"ts": "2030-01-01T00:00:00", "change": "new", "tender_id": "a", "title": "Road works"})
+    with open(feed_path, "a", encoding="utf-8") as f:
+        f.write(line[:20])
+    # A line still being written is left for the next call
+    assert first.process_changes(store) == 0
+    with open(feed_path, "a", encoding="utf-8") as f:
+        f.write(line[20:] + "\n")
+
+    # Another replica reading the same state file resumes from the stored offset
+    second = SavedSearches(state_path, str(tmp_path / "digests"), str(feed_path))
+    assert second.process_changes(store) == 1
+    assert first.process_changes(store) == 0
+    assert digest(first, "ana") == [("roads", "a")]